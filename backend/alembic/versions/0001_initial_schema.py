@@ -0,0 +1,202 @@
+"""initial schema: tables, keys and unique indexes of app/models.py
+
+Secondary indexes are created online in 0002_online_indexes.
+
+Revision ID: 0001_initial
+Revises:
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0001_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+JSONType = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def upgrade() -> None:
+    op.create_table('generated_recipe_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('recipe', JSONType, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('expiry_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expired', sa.Integer(), nullable=False),
+    sa.Column('today', sa.Integer(), nullable=False),
+    sa.Column('within_3_days', sa.Integer(), nullable=False),
+    sa.Column('within_7_days', sa.Integer(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('ingredients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('location', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=True),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('canonical_quantity', sa.Float(), nullable=True),
+    sa.Column('canonical_unit', sa.String(), nullable=True),
+    sa.Column('expiry_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'name', name='uq_ingredients_user_id_name')
+    )
+    op.create_index(op.f('ix_ingredients_id'), 'ingredients', ['id'], unique=False)
+    op.create_table('news',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.Column('is_published', sa.Boolean(), nullable=True),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_news_id'), 'news', ['id'], unique=False)
+    op.create_index(op.f('ix_news_slug'), 'news', ['slug'], unique=True)
+    op.create_table('page_content',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('page_key', sa.String(), nullable=True),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('updated_by_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['updated_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_page_content_id'), 'page_content', ['id'], unique=False)
+    op.create_index(op.f('ix_page_content_page_key'), 'page_content', ['page_key'], unique=True)
+    op.create_table('recipe_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipe_jobs_id'), 'recipe_jobs', ['id'], unique=False)
+    op.create_table('recipes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('ingredients', JSONType, nullable=False),
+    sa.Column('instructions', JSONType, nullable=False),
+    sa.Column('prep_time', sa.Integer(), nullable=True),
+    sa.Column('cook_time', sa.Integer(), nullable=True),
+    sa.Column('servings', sa.Integer(), nullable=True),
+    sa.Column('calories', sa.Integer(), nullable=True),
+    sa.Column('is_healthy', sa.Boolean(), nullable=True),
+    sa.Column('difficulty', sa.String(), nullable=True),
+    sa.Column('tags', JSONType, nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipes_id'), 'recipes', ['id'], unique=False)
+    op.create_table('shopping_lists',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shopping_lists_id'), 'shopping_lists', ['id'], unique=False)
+    op.create_table('recipe_ingredients',
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('recipe_id', 'name')
+    )
+    op.create_table('recipe_job_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('ingredients', JSONType, nullable=False),
+    sa.Column('preferences', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('recipe_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['recipe_jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipe_job_items_id'), 'recipe_job_items', ['id'], unique=False)
+    op.create_table('shopping_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shopping_list_id', sa.Integer(), nullable=True),
+    sa.Column('item_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=True),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('canonical_quantity', sa.Float(), nullable=True),
+    sa.Column('canonical_unit', sa.String(), nullable=True),
+    sa.Column('is_purchased', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['shopping_list_id'], ['shopping_lists.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shopping_items_id'), 'shopping_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_shopping_items_id'), table_name='shopping_items')
+    op.drop_table('shopping_items')
+    op.drop_index(op.f('ix_recipe_job_items_id'), table_name='recipe_job_items')
+    op.drop_table('recipe_job_items')
+    op.drop_table('recipe_ingredients')
+    op.drop_index(op.f('ix_shopping_lists_id'), table_name='shopping_lists')
+    op.drop_table('shopping_lists')
+    op.drop_index(op.f('ix_recipes_id'), table_name='recipes')
+    op.drop_table('recipes')
+    op.drop_index(op.f('ix_recipe_jobs_id'), table_name='recipe_jobs')
+    op.drop_table('recipe_jobs')
+    op.drop_index(op.f('ix_page_content_page_key'), table_name='page_content')
+    op.drop_index(op.f('ix_page_content_id'), table_name='page_content')
+    op.drop_table('page_content')
+    op.drop_index(op.f('ix_news_slug'), table_name='news')
+    op.drop_index(op.f('ix_news_id'), table_name='news')
+    op.drop_table('news')
+    op.drop_index(op.f('ix_ingredients_id'), table_name='ingredients')
+    op.drop_table('ingredients')
+    op.drop_table('expiry_summaries')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_table('generated_recipe_cache')
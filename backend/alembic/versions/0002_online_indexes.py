@@ -0,0 +1,53 @@
+"""secondary indexes, built online
+
+CREATE INDEX CONCURRENTLY can't run inside a transaction, so the indexes are
+created in an autocommit block; IF NOT EXISTS makes the revision safe to run on
+databases that already got some of them from migrations/*.sql. If a concurrent
+build fails it leaves an INVALID index behind: drop it and upgrade again.
+
+Revision ID: 0002_online_indexes
+Revises: 0001_initial
+"""
+from alembic import op
+
+revision = '0002_online_indexes'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, extra options)
+INDEXES = [
+    ('ix_generated_recipe_cache_created_at', 'generated_recipe_cache', ['created_at'], {}),
+    ('ix_ingredients_name', 'ingredients', ['name'], {}),
+    ('ix_ingredients_user_id_id', 'ingredients', ['user_id', 'id'], {}),
+    ('ix_ingredients_user_id_expiry', 'ingredients', ['user_id', 'expiry_date', 'id'], {}),
+    ('ix_ingredients_user_id_location', 'ingredients', ['user_id', 'location', 'id'], {}),
+    ('ix_news_published_feed', 'news', ['is_published', 'published_at', 'id'], {}),
+    ('ix_news_created_at_id', 'news', ['created_at', 'id'], {}),
+    ('ix_recipes_name', 'recipes', ['name'], {}),
+    ('ix_recipes_user_id_id', 'recipes', ['user_id', 'id'], {}),
+    ('ix_recipes_tags_gin', 'recipes', ['tags'], {'postgresql_using': 'gin'}),
+    ('ix_recipes_ingredients_gin', 'recipes', ['ingredients'], {
+        'postgresql_using': 'gin', 'postgresql_ops': {'ingredients': 'jsonb_path_ops'},
+    }),
+    ('ix_recipe_ingredients_name_recipe', 'recipe_ingredients', ['name', 'recipe_id'], {}),
+    ('ix_recipe_jobs_user_id', 'recipe_jobs', ['user_id'], {}),
+    ('ix_recipe_job_items_status_id', 'recipe_job_items', ['status', 'id'], {}),
+    ('ix_recipe_job_items_job_id', 'recipe_job_items', ['job_id'], {}),
+    ('ix_shopping_lists_user_id_id', 'shopping_lists', ['user_id', 'id'], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True, if_not_exists=True, **options,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""search_vector columns and GIN indexes for recipe and news search
+
+The columns are filled by the mapper events in app/models.py on insert/update;
+rows written before this revision are filled by backfill_search_vectors.py.
+
+Revision ID: 0003_search_vectors
+Revises: 0002_online_indexes
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0003_search_vectors'
+down_revision = '0002_online_indexes'
+branch_labels = None
+depends_on = None
+
+SearchVectorType = sa.Text().with_variant(postgresql.TSVECTOR(), "postgresql")
+TABLES = ['recipes', 'news']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('search_vector', SearchVectorType, nullable=True))
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f'ix_{table}_search_vector', table, ['search_vector'],
+                postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                f'ix_{table}_search_vector', table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
+    for table in TABLES:
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,51 @@
+"""canonical ingredient catalog and canonical_id on pantry items and recipe index rows
+
+canonical_id is filled on write (flush hook in app/models.py); existing rows are
+filled by canonicalize_ingredients.py.
+
+Revision ID: 0004_canonical_ingredients
+Revises: 0003_search_vectors
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_canonical_ingredients'
+down_revision = '0003_search_vectors'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_ingredients_user_id_canonical', 'ingredients', ['user_id', 'canonical_id']),
+    ('ix_recipe_ingredients_canonical_recipe', 'recipe_ingredients', ['canonical_id', 'recipe_id']),
+]
+
+
+def upgrade() -> None:
+    op.create_table('canonical_ingredients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    # batch mode: SQLite can't add a foreign key with ALTER TABLE
+    for table in ('ingredients', 'recipe_ingredients'):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column('canonical_id', sa.Integer(), nullable=True))
+            batch.create_foreign_key(
+                f'{table}_canonical_id_fkey', 'canonical_ingredients', ['canonical_id'], ['id']
+            )
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in ('ingredients', 'recipe_ingredients'):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_constraint(f'{table}_canonical_id_fkey', type_='foreignkey')
+            batch.drop_column('canonical_id')
+    op.drop_table('canonical_ingredients')
@@ -2,13 +2,17 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from . import models, schemas_auth
+from . import metrics, models, schemas_auth
+from .cache import TTLCache
+from .config import get_settings
 from .database import get_db
+from .services import password_hasher, token_revocation
 
 # ---------------------------
 # Security settings
@@ -17,20 +21,30 @@ SECRET_KEY = "your-secret-key-here-change-in-production"  # TODO: Move to .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = password_hasher.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Per-process cache of token subject (user id) -> detached User snapshot.
+# Entries are dropped when an admin changes or deletes the user; other workers
+# pick the change up once the TTL expires.
+USER_CACHE_TTL_SECONDS = get_settings().user_cache_ttl_seconds
+_user_cache = TTLCache(
+    maxsize=get_settings().user_cache_size,
+    ttl=USER_CACHE_TTL_SECONDS,
+)
+
 # ---------------------------
 # Password utilities
 # ---------------------------
+# Blocking versions for scripts; endpoints use the async password_hasher functions,
+# which run on the bounded hashing pool.
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
 
 def get_password_hash(password: str):
-    truncated = password[:72]  # کوتاه کردن به 72 کاراکتر
-    return pwd_context.hash(truncated)
+    return password_hasher.hash_sync(password)  # truncated to bcrypt's 72 bytes
 
 
 # ---------------------------
@@ -44,38 +58,93 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# ---------------------------
+# User cache utilities
+# ---------------------------
+def _snapshot_user(user: models.User) -> models.User:
+    """Detached copy of a user's columns, safe to share between sessions"""
+    snapshot = models.User(
+        **{column.key: getattr(user, column.key) for column in models.User.__table__.columns}
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop a cached user, e.g. after is_active / is_admin changed"""
+    _user_cache.delete(user_id)
+
+
 # ---------------------------
 # Dependency functions
 # ---------------------------
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+stateless_auth = metrics.counter("auth_stateless_total", "Requests authorized from token claims without loading the user")
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _claims_user(claims: dict) -> models.User:
+    """Detached User holding only what the token carries (id, roles); other columns are not loaded"""
+    user = models.User(id=int(claims["uid"]), is_active=True, is_admin="admin" in claims["roles"])
+    make_transient_to_detached(user)
+    return user
+
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """Verified claims of the bearer token"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = schemas_auth.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
-    # --- این قسمت را جایگزین کن ---
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
 
-    db.refresh(user)   # ← این خط باعث می‌شود آخرین مقادیر از دیتابیس خوانده شوند
+async def get_current_user(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db)
+) -> models.User:
+    """Get current authenticated user.
+
+    Tokens from services/auth_tokens.py carry the user id and roles and are
+    authorized without a database lookup (unless the revocation filter flags
+    them); the returned User only has id, is_active and is_admin loaded.
+    """
+    if "uid" in claims and "roles" in claims:
+        if await token_revocation.is_revoked(db, claims.get("jti"), claims.get("sid")):
+            raise _credentials_exception()
+        stateless_auth.inc()
+        return _claims_user(claims)
+
+    subject: str = claims["sub"]
+    if not subject.isdigit():
+        # tokens issued before the subject carried the user id
+        result = await db.execute(select(models.User).where(models.User.email == subject))
+        user = result.scalars().first()
+        if user is None:
+            raise _credentials_exception()
+        return user
+
+    user_id = int(subject)
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        # attach a copy to this session without emitting a SELECT
+        return await db.merge(cached, load=False)
+
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    _user_cache.set(user_id, _snapshot_user(user))
     return user
 
 
-
 async def get_current_active_user(
     current_user: models.User = Depends(get_current_user)
 ) -> models.User:
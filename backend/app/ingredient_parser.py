@@ -0,0 +1,161 @@
+"""
+Parser for free-text ingredient lines and canonical ingredient names.
+
+"2 medium tomatoes, diced" -> quantity 2, unit "", name "tomato", note "diced".
+Quantities may be decimals, fractions ("1 1/2", "½") or ranges ("2-3", taken
+at the upper end so a shopping list never comes up short). Units are the ones
+known to app.units plus countable containers (clove, slice, can, ...).
+
+`canonical_name` is the key ingredient names are compared by: lowercased, size
+and preparation words dropped, last word singularized ("Fresh Tomatoes" ->
+"tomato"). Like app.units this module has no app imports, so models can use it.
+"""
+import re
+from fractions import Fraction
+from typing import NamedTuple, Optional
+
+from app import units
+
+UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4",
+    "⅕": "1/5", "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6", "⅚": "5/6",
+    "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+# units that only count things; kept as their own canonical unit (see units.dimension_of)
+CONTAINER_UNITS = {
+    "bag", "bottle", "box", "bunch", "can", "clove", "dash", "drop", "fillet", "handful",
+    "head", "jar", "leaf", "loaf", "package", "packet", "pinch", "sheet", "slice", "sprig",
+    "stalk", "stick", "tin",
+}
+DESCRIPTORS = {
+    "small", "medium", "large", "extra-large", "big", "fresh", "freshly", "ripe", "raw",
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "peeled", "crushed",
+    "finely", "roughly", "thinly", "coarsely", "halved", "quartered", "softened", "melted",
+    "beaten", "cooked", "boneless", "skinless", "heaping", "level", "packed", "about",
+    "approximately", "optional",
+}
+NOTE_PHRASES = ("to taste", "for garnish", "for serving", "as needed", "or more", "if desired")
+# plurals the suffix rules get wrong, and words that only look plural
+IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife", "geese": "goose"}
+UNCOUNTABLE = {"oats", "molasses", "grits", "greens", "hummus", "couscous", "asparagus", "swiss", "series"}
+
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?"
+_QUANTITY = re.compile(rf"^\s*({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*")
+_ARTICLE = re.compile(r"^\s*(?:a|an|one)\s+", re.IGNORECASE)
+_PARENTHETICAL = re.compile(r"\(([^)]*)\)")
+_NOT_NAME = re.compile(r"[^\w\s&'-]+")
+_NOTE_SEPARATOR = re.compile(r",(?!\d)")
+
+
+class ParsedIngredient(NamedTuple):
+    quantity: Optional[float]
+    unit: Optional[str]
+    name: str
+    note: Optional[str] = None
+
+
+def parse_quantity(value) -> Optional[float]:
+    """Parse 2, "2", "1.5", "1,5", "1/2", "1 1/2", "1½" or "2-3" (upper end); None when there is no usable number"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    match = _QUANTITY.match(_expand_fractions(value))
+    if not match:
+        return None
+    return _number(match.group(2) or match.group(1))
+
+
+def _expand_fractions(text: str) -> str:
+    for char, fraction in UNICODE_FRACTIONS.items():
+        text = text.replace(char, f" {fraction} ")
+    return text
+
+
+def _number(text: str) -> Optional[float]:
+    try:
+        return float(sum(Fraction(part.replace(",", ".")) for part in text.split()))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def singularize(word: str) -> str:
+    if word in UNCOUNTABLE or len(word) <= 3:
+        return word
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def canonical_name(name: Optional[str]) -> str:
+    """Key an ingredient name is matched by: "Fresh Tomatoes" -> "tomato", "" when nothing is left"""
+    words = _NOT_NAME.sub(" ", (name or "").lower()).split()
+    words = [w for w in words if w not in DESCRIPTORS]
+    if words and words[0] == "of":
+        words = words[1:]
+    if not words:
+        return ""
+    words[-1] = singularize(words[-1])
+    return " ".join(words)
+
+
+def _take_unit(words: list) -> Optional[str]:
+    """Remove and return a leading unit from `words` (two-word units first)"""
+    for size in (2, 1):
+        if len(words) < size:
+            continue
+        candidate = units.normalize_unit_name(" ".join(words[:size]))
+        if not candidate:
+            continue
+        if candidate in units.UNITS or singularize(candidate) in CONTAINER_UNITS:
+            del words[:size]
+            return candidate if candidate in units.UNITS else singularize(candidate)
+    return None
+
+
+def parse_ingredient_line(line: str) -> ParsedIngredient:
+    """Split a recipe line like "1 can (400 g) chopped tomatoes" into quantity, unit, name and note"""
+    text = " ".join(_expand_fractions(line or "").split())
+    notes = _PARENTHETICAL.findall(text)
+    text = _PARENTHETICAL.sub(" ", text)
+    # "200 g butter, softened": everything after the first comma (not a decimal comma) is a note
+    parts = _NOTE_SEPARATOR.split(text, 1)
+    if len(parts) == 2:
+        text = parts[0]
+        notes.append(parts[1].strip())
+    lowered = text.lower()
+    for phrase in NOTE_PHRASES:
+        if phrase in lowered:
+            lowered = lowered.replace(phrase, " ")
+            notes.append(phrase)
+
+    quantity = None
+    match = _QUANTITY.match(lowered)
+    if match:
+        quantity = _number(match.group(2) or match.group(1))
+        lowered = lowered[match.end():]
+    elif _ARTICLE.match(lowered):
+        quantity = 1.0
+        lowered = _ARTICLE.sub("", lowered, count=1)
+
+    words = lowered.split()
+    unit = _take_unit(words) if quantity is not None else None
+    if quantity is not None and unit is None:
+        unit = ""  # a bare count: "2 tomatoes"
+    name = canonical_name(" ".join(words))
+    note = ", ".join(n.strip() for n in notes if n.strip()) or None
+    return ParsedIngredient(quantity, unit, name, note)
+
+
+def ngrams(text: str, n: int = 3) -> set:
+    """Character n-grams of a name, padded so word starts and ends count"""
+    padded = f"  {' '.join(text.split())} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
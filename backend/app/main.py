@@ -1,24 +1,18 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
-from app.routers import auth, ingredients, shopping_lists, recipes, admin, news
-from dotenv import load_dotenv
-import os
+from app import metrics
+from app.rate_limit import RateLimitMiddleware
+from app.database import AsyncSessionLocal
+from app.routers import auth, ingredients, shopping_lists, recipes, recipe_jobs, admin, news, pages
+from app.services import expiry_summary, password_hasher
 
 # --------------------------
-# Load environment variables
+# Database schema
 # --------------------------
-load_dotenv("/root/grocery-mate/backend/.env")  # حتما قبل از استفاده
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY is None:
-    raise ValueError("GEMINI_API_KEY not found in .env")
-
-# --------------------------
-# Initialize database
-# --------------------------
-Base.metadata.create_all(bind=engine)
+# Managed by Alembic (`alembic upgrade head`, run once per deploy); startup does no DDL.
 
 # --------------------------
 # Create FastAPI app
@@ -30,12 +24,32 @@ origins = [
     "https://grocerymate.tech",  # اگر با IP خارجی دسترسی داری
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # start the password hashing threads now rather than on the first logins
+    await password_hasher.warm_up()
+    # refresh the dashboard's expiring-items summary in the background
+    refresher = None
+    if expiry_summary.EXPIRY_SUMMARY_REFRESH_SECONDS > 0:
+        refresher = asyncio.create_task(expiry_summary.refresh_periodically(AsyncSessionLocal))
+    yield
+    if refresher:
+        refresher.cancel()
+
+
 app = FastAPI(
     title="GroceryMate API",
     description="API for managing groceries, shopping lists, and recipes",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# --------------------------
+# Rate limiting (expensive endpoints; see app/rate_limit.py)
+# --------------------------
+# added before CORS so 429 responses still carry the CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # --------------------------
 # Enable CORS
 # --------------------------
@@ -45,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],  # keyset pagination cursor, response cache, rate limits
 )
 
 # --------------------------
@@ -54,8 +69,10 @@ app.include_router(auth.router)          # مسیرها: /auth/register, /auth/l
 app.include_router(ingredients.router)
 app.include_router(shopping_lists.router)
 app.include_router(recipes.router)
+app.include_router(recipe_jobs.router)
 app.include_router(admin.router)
 app.include_router(news.router)
+app.include_router(pages.router)
 
 # --------------------------
 # Root endpoint
@@ -74,3 +91,10 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+# --------------------------
+# Metrics endpoint (per worker; restrict to internal networks at the proxy)
+# --------------------------
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
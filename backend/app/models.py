@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, Text, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, Text, DateTime, Index, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, deferred, relationship
 from datetime import datetime
+from . import search, units
 from .database import Base
 
+# JSONB on Postgres (GIN-indexable), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+# weighted tsvector on Postgres, lowercased document text elsewhere (see app/search.py)
+SearchVectorType = Text().with_variant(TSVECTOR(), "postgresql")
+
 
 class User(Base):
     __tablename__ = "users"
@@ -25,17 +33,43 @@ class Ingredient(Base):
     __tablename__ = "ingredients"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, index=True, nullable=False)
     category = Column(String, nullable=False)
     location = Column(String, nullable=False)
     quantity = Column(Float, default=0)
     unit = Column(String, nullable=False)
+    # quantity in units.CANONICAL_UNITS (g / ml / pcs), kept in sync on every ORM write
+    canonical_quantity = Column(Float, nullable=True)
+    canonical_unit = Column(String, nullable=True)
+    canonical_id = Column(Integer, ForeignKey("canonical_ingredients.id"), nullable=True)  # catalog entry of name
     expiry_date = Column(Date, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="ingredients")
 
+    __table_args__ = (
+        Index("ix_ingredients_user_id_id", "user_id", "id"),  # keyset pagination
+        Index("ix_ingredients_user_id_expiry", "user_id", "expiry_date", "id"),  # expiring soon
+        Index("ix_ingredients_user_id_location", "user_id", "location", "id"),  # location filter
+        Index("ix_ingredients_user_id_canonical", "user_id", "canonical_id"),  # pantry matching
+        # also serves (user_id, name) lookups
+        UniqueConstraint("user_id", "name", name="uq_ingredients_user_id_name"),  # upsert target
+    )
+
+
+class ExpirySummary(Base):
+    """Per-user counts of expiring pantry items, refreshed periodically (see services/expiry_summary.py)"""
+    __tablename__ = "expiry_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    expired = Column(Integer, default=0, nullable=False)
+    today = Column(Integer, default=0, nullable=False)
+    within_3_days = Column(Integer, default=0, nullable=False)  # today .. today + 3
+    within_7_days = Column(Integer, default=0, nullable=False)  # today .. today + 7
+    as_of = Column(Date, nullable=False)  # the day the buckets were computed for
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 
 class ShoppingList(Base):
     __tablename__ = "shopping_lists"
@@ -47,6 +81,10 @@ class ShoppingList(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="shopping_lists")
 
+    __table_args__ = (
+        Index("ix_shopping_lists_user_id_id", "user_id", "id"),  # keyset pagination
+    )
+
 
 class ShoppingItem(Base):
     __tablename__ = "shopping_items"
@@ -56,6 +94,8 @@ class ShoppingItem(Base):
     item_name = Column(String, nullable=False)
     quantity = Column(Float, default=1)
     unit = Column(String, nullable=False)
+    canonical_quantity = Column(Float, nullable=True)
+    canonical_unit = Column(String, nullable=True)
     is_purchased = Column(Boolean, default=False)
     shopping_list = relationship("ShoppingList", back_populates="items")
 
@@ -66,18 +106,104 @@ class Recipe(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     description = Column(Text)
-    ingredients = Column(Text, nullable=False)
-    instructions = Column(Text, nullable=False)
+    ingredients = Column(JSONType, nullable=False)  # list of names or {name, quantity, unit}
+    instructions = Column(JSONType, nullable=False)  # list of steps
     prep_time = Column(Integer, default=0)
     cook_time = Column(Integer, default=0)   # اگر لازم داری
     servings = Column(Integer, default=2)
     calories = Column(Integer, nullable=True)
     is_healthy = Column(Boolean, default=True)
     difficulty = Column(String, default="Unknown")  # اضافه شد
-    tags = Column(Text, default="[]")              # اگر لازم داری
+    tags = Column(JSONType, default=list)
     created_at = Column(DateTime, default=datetime.utcnow)
+    search_vector = deferred(Column(SearchVectorType))  # name, ingredients, tags, description
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="recipes")
+    ingredient_index = relationship(
+        "RecipeIngredient", back_populates="recipe", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("ix_recipes_user_id_id", "user_id", "id"),  # keyset pagination
+        Index("ix_recipes_tags_gin", "tags", postgresql_using="gin"),
+        Index(
+            "ix_recipes_ingredients_gin", "ingredients",
+            postgresql_using="gin", postgresql_ops={"ingredients": "jsonb_path_ops"},
+        ),
+        Index("ix_recipes_search_vector", "search_vector", postgresql_using="gin"),  # full-text search
+    )
+
+
+class RecipeIngredient(Base):
+    """Canonical ingredient names per recipe, used as an inverted index for matching"""
+    __tablename__ = "recipe_ingredients"
+
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    canonical_id = Column(Integer, ForeignKey("canonical_ingredients.id"), nullable=True)
+    recipe = relationship("Recipe", back_populates="ingredient_index")
+
+    __table_args__ = (
+        # name -> recipe_id posting list; the PK already covers recipe_id -> name
+        Index("ix_recipe_ingredients_name_recipe", "name", "recipe_id"),
+        Index("ix_recipe_ingredients_canonical_recipe", "canonical_id", "recipe_id"),
+    )
+
+
+class CanonicalIngredient(Base):
+    """Catalog of canonical ingredient names (see services/ingredient_catalog.py)"""
+    __tablename__ = "canonical_ingredients"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class GeneratedRecipeCache(Base):
+    """Parsed Gemini responses keyed by a hash of the normalized request"""
+    __tablename__ = "generated_recipe_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex of ingredients + preferences
+    recipe = Column(JSONType, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class RecipeJob(Base):
+    """Batch of recipe generation requests, processed by recipe_worker.py"""
+    __tablename__ = "recipe_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, default="pending", nullable=False)  # pending, running, done
+    total = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    items = relationship("RecipeJobItem", back_populates="job", cascade="all, delete-orphan")
+
+
+class RecipeJobItem(Base):
+    """One ingredient set of a RecipeJob"""
+    __tablename__ = "recipe_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("recipe_jobs.id", ondelete="CASCADE"), nullable=False)
+    ingredients = Column(JSONType, nullable=False)  # [{name, quantity, unit}]
+    preferences = Column(String, nullable=True)
+    status = Column(String, default="pending", nullable=False)  # pending, running, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="SET NULL"), nullable=True)
+    job = relationship("RecipeJob", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_recipe_job_items_status_id", "status", "id"),  # worker queue scan
+        Index("ix_recipe_job_items_job_id", "job_id"),
+    )
+
 
 class News(Base):
     __tablename__ = "news" 
@@ -93,9 +219,17 @@ class News(Base):
     published_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)   
+    search_vector = deferred(Column(SearchVectorType))  # title, summary, content
 
     # Relationship
     author = relationship("User") 
+
+    __table_args__ = (
+        # keyset pagination of the public feed and the admin list
+        Index("ix_news_published_feed", "is_published", "published_at", "id"),
+        Index("ix_news_created_at_id", "created_at", "id"),
+        Index("ix_news_search_vector", "search_vector", postgresql_using="gin"),  # full-text search
+    )
     
     
 class PageContent(Base):
@@ -109,4 +243,88 @@ class PageContent(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
-    updated_by = relationship("User")
\ No newline at end of file
+    updated_by = relationship("User")
+
+
+class RefreshToken(Base):
+    """Opaque refresh tokens (stored as sha256), rotated on every use (see services/auth_tokens.py)"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id = Column(String(32), nullable=False)  # one per login; also the `sid` of its access tokens
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    used_at = Column(DateTime, nullable=True)  # rotated; a second use revokes the family
+    revoked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
+
+
+class RevokedToken(Base):
+    """Revoked access token ids (jti) and sessions (sid), kept until their tokens expire"""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # incremental loads
+
+
+# ---------------------------
+# Canonical quantities
+# ---------------------------
+# Core bulk INSERTs bypass these hooks and set the columns with units.canonical_columns()
+@event.listens_for(Ingredient, "before_insert")
+@event.listens_for(Ingredient, "before_update")
+def _ingredient_canonical_quantity(mapper, connection, target):
+    for key, value in units.canonical_columns(target.quantity, target.unit, target.name).items():
+        setattr(target, key, value)
+
+
+@event.listens_for(ShoppingItem, "before_insert")
+@event.listens_for(ShoppingItem, "before_update")
+def _shopping_item_canonical_quantity(mapper, connection, target):
+    for key, value in units.canonical_columns(target.quantity, target.unit, target.item_name).items():
+        setattr(target, key, value)
+
+
+# ---------------------------
+# Search vectors
+# ---------------------------
+@event.listens_for(Recipe, "before_insert")
+@event.listens_for(News, "before_insert")
+def _index_search_vector(mapper, connection, target):
+    target.search_vector = search.search_vector(search.document(target), connection.dialect.name)
+
+
+@event.listens_for(Recipe, "before_update")
+@event.listens_for(News, "before_update")
+def _reindex_search_vector(mapper, connection, target):
+    if search.needs_reindex(inspect(target)):
+        _index_search_vector(mapper, connection, target)
+
+
+# ---------------------------
+# Canonical ingredient ids
+# ---------------------------
+# Core bulk writes bypass this hook and resolve ids with ingredient_catalog.resolve_ids()
+@event.listens_for(Session, "before_flush")
+def _resolve_canonical_ids(session, flush_context, instances):
+    pending = [obj for obj in session.new if isinstance(obj, (Ingredient, RecipeIngredient))]
+    pending += [
+        obj for obj in session.dirty
+        if isinstance(obj, Ingredient) and inspect(obj).attrs.name.history.has_changes()
+    ]
+    if not pending:
+        return
+    from .services import ingredient_catalog  # imports this module
+
+    ids = ingredient_catalog.resolve_ids(session.connection(), {obj.name for obj in pending})
+    for obj in pending:
+        obj.canonical_id = ids.get(obj.name)
@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+from sqlalchemy import Select, inspect, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# ---------------------------
+# Cursor encoding
+# ---------------------------
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps(jsonable_encoder(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Decode a cursor back into values typed like the given sort columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        decoded = []
+        for value, column in zip(values, columns):
+            python_type = column.type.python_type
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ---------------------------
+# Keyset pagination
+# ---------------------------
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Return one page of `stmt` ordered by (sort_column, id_column) and the next cursor.
+
+    Rows after the cursor are selected with a row-value comparison, so every page
+    costs an index range scan no matter how deep it is.
+    """
+    columns = [sort_column] if sort_column is id_column else [sort_column, id_column]
+    key = tuple_(*columns)
+    if cursor:
+        values = tuple(decode_cursor(cursor, columns))
+        stmt = stmt.where(key < values if descending else key > values)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    result = await db.execute(stmt.order_by(*order).limit(limit + 1))
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
+
+
+# ---------------------------
+# Field projection
+# ---------------------------
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Validate a comma-separated `fields=` parameter against a response schema"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def project(stmt: Select, model, fields: Optional[List[str]], *always) -> Select:
+    """Only load the requested columns (plus the sort key) from the database"""
+    if not fields:
+        return stmt
+    column_names = set(inspect(model).columns.keys())
+    attrs = [getattr(model, f) for f in fields if f in column_names]
+    attrs += [a for a in always if a.key not in fields]
+    return stmt.options(load_only(*attrs))
+
+
+@lru_cache
+def _partial_schema(schema: Type[BaseModel]) -> Type[BaseModel]:
+    """`schema` with every field optional, so a projected row validates with its own validators"""
+    optional = {name: (Optional[info.annotation], None) for name, info in schema.model_fields.items()}
+    return create_model(f"{schema.__name__}Fields", __base__=schema, **optional)
+
+
+def project_items(items: list, fields: List[str], schema: Type[BaseModel]) -> List[dict]:
+    """Reduce each item to the requested fields, serialized through the response schema
+    (nested objects only expose their schema's fields)"""
+    partial = _partial_schema(schema)
+    return [
+        partial.model_validate({f: getattr(item, f) for f in fields}, from_attributes=True)
+        .model_dump(mode="json", include=set(fields))
+        for item in items
+    ]
+
+
+def page_response(
+    response: Response,
+    items: list,
+    next_cursor: Optional[str],
+    fields: Optional[List[str]] = None,
+    schema: Optional[Type[BaseModel]] = None,
+):
+    """Attach the next cursor header and, if requested, project each item to `fields` of `schema`"""
+    if fields:
+        content = project_items(items, fields, schema)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return JSONResponse(content=jsonable_encoder(content), headers=headers)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
@@ -0,0 +1,28 @@
+from typing import List
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Records every SQL statement executed on an engine while active"""
+
+    def __init__(self, engine):
+        # AsyncEngine exposes its events through the wrapped sync engine
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
+
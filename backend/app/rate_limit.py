@@ -0,0 +1,244 @@
+"""
+Token-bucket rate limiting for expensive endpoints (Gemini calls, bcrypt).
+
+Each rule covers a set of routes and keeps one bucket per client: the user id
+from a valid bearer token (`per="user"`), otherwise the client IP. A bucket
+holds up to `burst` tokens and refills at `requests / period` tokens per
+second; a request takes one token or is answered with 429 and Retry-After.
+
+Limits are overridden per rule with RATE_LIMIT_<NAME>, e.g.
+RATE_LIMIT_LOGIN=10/60 (10 per minute) or RATE_LIMIT_GENERATE=30/3600:5
+(30 per hour, bursts of 5); "off" disables a rule.
+
+The in-process backend is per worker, so with N workers a client gets up to N
+times the limit. Set RATE_LIMIT_REDIS_URL to share buckets between workers.
+"""
+import logging
+import math
+import time
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+
+from . import metrics
+from .auth import ALGORITHM, SECRET_KEY
+from .cache import TTLCache
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+RATE_LIMIT_ENABLED = _settings.rate_limit_enabled
+RATE_LIMIT_REDIS_URL = _settings.rate_limit_redis_url
+RATE_LIMIT_MAX_KEYS = _settings.rate_limit_max_keys  # buckets kept per worker
+# behind a reverse proxy: take the client IP from the last X-Forwarded-For entry
+RATE_LIMIT_TRUST_FORWARDED = _settings.rate_limit_trust_forwarded
+
+throttled = metrics.counter("rate_limit_throttled_total", "Requests rejected with 429")
+backend_errors = metrics.counter("rate_limit_backend_errors_total", "Rate limit checks skipped because the store failed")
+
+
+class Rule(NamedTuple):
+    name: str
+    routes: FrozenSet[Tuple[str, str]]  # (method, path)
+    requests: float
+    period: float  # seconds
+    burst: int
+    per: str = "user"  # "user" (falls back to the IP) or "ip"
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second"""
+        return self.requests / self.period
+
+
+def _routes(*routes: str) -> FrozenSet[Tuple[str, str]]:
+    return frozenset(tuple(route.split(" ", 1)) for route in routes)
+
+
+DEFAULT_RULES = [
+    Rule("login", _routes("POST /auth/login"), 10, 60, 10, per="ip"),
+    Rule("register", _routes("POST /auth/register"), 5, 3600, 5, per="ip"),
+    Rule("generate", _routes("POST /recipes/generate", "POST /recipes/generate/stream"), 30, 3600, 5),
+    Rule("recipe_jobs", _routes("POST /recipes/jobs"), 10, 3600, 2),
+]
+
+
+def parse_limit(spec: str) -> Optional[Tuple[float, float, int]]:
+    """ "30/3600:5" -> (30, 3600, 5); burst defaults to the request count; None for "off" / "0" """
+    spec = spec.strip().lower()
+    if spec in ("off", "0", ""):
+        return None
+    rate, _, burst = spec.partition(":")
+    requests, _, period = rate.partition("/")
+    requests, period = float(requests), float(period or 1)
+    if requests <= 0 or period <= 0:
+        return None
+    return requests, period, int(burst) if burst else max(1, int(requests))
+
+
+def load_rules(defaults: List[Rule] = DEFAULT_RULES) -> List[Rule]:
+    """Default rules with RATE_LIMIT_<NAME> overrides applied"""
+    rules = []
+    for rule in defaults:
+        spec = getattr(get_settings(), f"rate_limit_{rule.name}", None)
+        if spec is None:
+            rules.append(rule)
+            continue
+        try:
+            limit = parse_limit(spec)
+        except ValueError:
+            logger.warning("Invalid RATE_LIMIT_%s=%r; using %s/%s", rule.name.upper(), spec, rule.requests, rule.period)
+            rules.append(rule)
+            continue
+        if limit is not None:
+            requests, period, burst = limit
+            rules.append(rule._replace(requests=requests, period=period, burst=burst))
+    return rules
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class MemoryBackend:
+    def __init__(self):
+        # key -> (tokens, updated_at); an entry expires once its bucket would be full again
+        self._buckets = TTLCache(maxsize=RATE_LIMIT_MAX_KEYS)
+
+    async def take(self, key: str, rule: Rule) -> Tuple[bool, float]:
+        """(allowed, tokens left)"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - updated_at) * rule.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=(rule.burst - tokens) / rule.rate + 1)
+        return allowed, tokens
+
+
+# atomic refill-and-take; uses the server clock so workers agree on time
+_TAKE_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(((burst - tokens) / rate + 1) * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rule: Rule) -> Tuple[bool, float]:
+        allowed, tokens = await self._take(keys=[f"rl:{key}"], args=[rule.burst, rule.rate])
+        return bool(allowed), float(tokens)
+
+
+def _create_backend():
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisBackend(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed; using in-process rate limit buckets")
+    return MemoryBackend()
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            # the proxy appends the address it saw; earlier entries are client-supplied
+            return forwarded.split(",")[-1].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def token_user_id(scope) -> Optional[str]:
+    """User id of a valid bearer token (no database access); None when absent or invalid"""
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:].strip(), SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject else None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the token-bucket rules to matching requests"""
+
+    def __init__(self, app, rules: Optional[List[Rule]] = None, backend=None):
+        self.app = app
+        rules = load_rules() if rules is None else rules
+        self.rules: Dict[Tuple[str, str], Rule] = {
+            route: rule for rule in rules for route in rule.routes
+        }
+        self.backend = backend or _create_backend()
+        self._throttled = {
+            rule.name: metrics.counter(
+                f"rate_limit_{rule.name}_throttled_total", f"Requests rejected by the {rule.name} rate limit"
+            )
+            for rule in rules
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        path = scope["path"].rstrip("/") or "/"
+        rule = self.rules.get((scope["method"], path))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        identity = None
+        if rule.per == "user":
+            user_id = token_user_id(scope)
+            identity = f"user:{user_id}" if user_id else None
+        identity = identity or f"ip:{client_ip(scope)}"
+        try:
+            allowed, tokens = await self.backend.take(f"{rule.name}:{identity}", rule)
+        except Exception as e:
+            # a broken store must not take the API down with it
+            backend_errors.inc()
+            logger.warning("Rate limit check failed (%s); allowing request", e)
+            return await self.app(scope, receive, send)
+
+        if allowed:
+            return await self.app(scope, receive, send)
+        throttled.inc()
+        self._throttled[rule.name].inc()
+        retry_after = max(1, math.ceil((1 - tokens) / rule.rate))
+        response = JSONResponse(
+            {"detail": "Too many requests, please try again later"},
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,169 @@
+"""
+Response cache for public, read-mostly endpoints (news feed, news articles, pages).
+
+Serialized JSON bodies are cached per namespace with a TTL and served with a
+strong ETag and Cache-Control, so browsers and the nginx proxy can revalidate
+with If-None-Match and get a 304 without the app touching Postgres.
+Admin writes call `invalidate(namespace)`, which bumps the namespace version so
+every cached entry of that namespace is skipped from then on.
+
+The in-process backend is per worker: other workers see an invalidation once
+their entries expire (RESPONSE_CACHE_TTL_SECONDS). Set RESPONSE_CACHE_REDIS_URL
+to share the cache (and invalidations) between workers. If Redis fails, responses
+are rendered uncached and invalidations are skipped (entries still expire by TTL).
+"""
+import hashlib
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from . import metrics
+from .cache import TTLCache
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+RESPONSE_CACHE_TTL_SECONDS = _settings.response_cache_ttl_seconds
+RESPONSE_CACHE_MAX_AGE = _settings.response_cache_max_age  # browser / proxy max-age
+RESPONSE_CACHE_SIZE = _settings.response_cache_size
+RESPONSE_CACHE_REDIS_URL = _settings.response_cache_redis_url
+
+cache_hits = metrics.counter("response_cache_hits_total", "Responses served from the cache")
+cache_misses = metrics.counter("response_cache_misses_total", "Responses rendered from the database")
+cache_not_modified = metrics.counter("response_cache_not_modified_total", "304 responses sent")
+backend_errors = metrics.counter("response_cache_backend_errors_total", "Cache store calls that failed (request served uncached)")
+
+# (body, etag, extra headers)
+Entry = Tuple[bytes, str, Dict[str, str]]
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class MemoryBackend:
+    def __init__(self):
+        self._entries = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS)
+        self._versions: Dict[str, int] = {}
+
+    async def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> None:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    async def get(self, key: str) -> Optional[Entry]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, entry: Entry) -> None:
+        self._entries.set(key, entry)
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+
+    async def version(self, namespace: str) -> int:
+        return int(await self._redis.get(f"rc:version:{namespace}") or 0)
+
+    async def bump(self, namespace: str) -> None:
+        await self._redis.incr(f"rc:version:{namespace}")
+
+    async def get(self, key: str) -> Optional[Entry]:
+        raw = await self._redis.get(f"rc:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data["body"].encode(), data["etag"], data["headers"]
+
+    async def set(self, key: str, entry: Entry) -> None:
+        body, etag, headers = entry
+        raw = json.dumps({"body": body.decode(), "etag": etag, "headers": headers})
+        await self._redis.set(f"rc:{key}", raw, ex=int(RESPONSE_CACHE_TTL_SECONDS))
+
+
+def _create_backend():
+    if RESPONSE_CACHE_REDIS_URL:
+        try:
+            return RedisBackend(RESPONSE_CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed; using the in-process response cache")
+    return MemoryBackend()
+
+
+backend = _create_backend()
+
+
+# ---------------------------
+# Public helpers
+# ---------------------------
+def _backend_failed(action: str, error: Exception) -> None:
+    # a broken store must not fail the request (or an admin write that already committed)
+    backend_errors.inc()
+    logger.warning("Response cache %s failed (%s); continuing without the cache", action, error)
+
+
+async def invalidate(namespace: str) -> None:
+    """Drop every cached response of a namespace (call after admin writes)"""
+    try:
+        await backend.bump(namespace)
+    except Exception as e:
+        _backend_failed("invalidation", e)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
+
+async def cached_response(
+    request: Request,
+    namespace: str,
+    key: str,
+    render: Callable[[], Awaitable[Tuple[object, Dict[str, str]]]],
+) -> Response:
+    """Serve `render()`'s (content, headers) from the cache, with ETag / 304 support.
+
+    `render` is only awaited on a cache miss; exceptions (e.g. 404) are not cached.
+    """
+    try:
+        version = await backend.version(namespace)
+        cache_key = f"{namespace}:v{version}:{key}"
+        entry = await backend.get(cache_key)
+    except Exception as e:
+        _backend_failed("read", e)
+        cache_key, entry = None, None
+    if entry is None:
+        cache_misses.inc()
+        content, headers = await render()
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+        entry = (body, _etag(body), headers or {})
+        if cache_key is not None:
+            try:
+                await backend.set(cache_key, entry)
+            except Exception as e:
+                _backend_failed("write", e)
+    else:
+        cache_hits.inc()
+
+    body, etag, headers = entry
+    headers = {
+        **headers,
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={RESPONSE_CACHE_MAX_AGE}",
+    }
+    if _etag_matches(request, etag):
+        cache_not_modified.inc()
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timedelta
 from .. import models, schemas_admin
 from ..database import get_db
-from ..auth import get_current_admin_user
+from ..auth import get_current_admin_user, invalidate_user_cache
+from ..services import auth_tokens
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, paginate, parse_fields, project
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -14,35 +16,43 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 # Get all users
 # ---------------------------
 @router.get("/users", response_model=List[schemas_admin.UserAdmin])
-def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
+async def get_all_users(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all users (admin only)"""
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+    selected = parse_fields(fields, schemas_admin.UserAdmin)
+    stmt = project(select(models.User), models.User, selected)
+    users, next_cursor = await paginate(db, stmt, models.User.id, models.User.id, cursor, limit)
+    return page_response(response, users, next_cursor, selected, schemas_admin.UserAdmin)
 
 
 # ---------------------------
 # Get user statistics
 # ---------------------------
 @router.get("/users/stats", response_model=schemas_admin.UserStats)
-def get_user_stats(
+async def get_user_stats(
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user statistics (admin only)"""
-    total = db.query(models.User).count()
-    active = db.query(models.User).filter(models.User.is_active == True).count()
-    admins = db.query(models.User).filter(models.User.is_admin == True).count()
-
     # Users created in last 30 days
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    new_users = db.query(models.User).filter(
-        models.User.created_at >= thirty_days_ago
-    ).count()
+
+    # All four counts in a single table scan
+    result = await db.execute(
+        select(
+            func.count(),
+            func.count().filter(models.User.is_active == True),
+            func.count().filter(models.User.is_admin == True),
+            func.count().filter(models.User.created_at >= thirty_days_ago),
+        ).select_from(models.User)
+    )
+    total, active, admins, new_users = result.one()
 
     return {
         "total_users": total,
@@ -56,13 +66,13 @@ def get_user_stats(
 # Get specific user
 # ---------------------------
 @router.get("/users/{user_id}", response_model=schemas_admin.UserAdmin)
-def get_user(
+async def get_user(
     user_id: int,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -72,14 +82,14 @@ def get_user(
 # Update user
 # ---------------------------
 @router.patch("/users/{user_id}", response_model=schemas_admin.UserAdmin)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: schemas_admin.UserUpdate,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -91,13 +101,21 @@ def update_user(
         )
 
     # Update fields
+    changed = (
+        (user_update.is_active is not None and user_update.is_active != user.is_active)
+        or (user_update.is_admin is not None and user_update.is_admin != user.is_admin)
+    )
     if user_update.is_active is not None:
         user.is_active = user_update.is_active
     if user_update.is_admin is not None:
         user.is_admin = user_update.is_admin
+    if changed:
+        # access tokens carry is_admin / imply is_active: end the user's sessions
+        await auth_tokens.revoke_user(db, user.id)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    invalidate_user_cache(user.id)
+    await db.refresh(user)
     return user
 
 
@@ -105,13 +123,13 @@ def update_user(
 # Delete user
 # ---------------------------
 @router.delete("/users/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -122,6 +140,8 @@ def delete_user(
             detail="Cannot delete your own account"
         )
 
-    db.delete(user)
-    db.commit()
+    await auth_tokens.revoke_user(db, user.id)
+    await db.delete(user)
+    await db.commit()
+    invalidate_user_cache(user_id)
     return {"message": "User deleted successfully"}
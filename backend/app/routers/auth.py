@@ -1,47 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
 
 from .. import models, schemas_auth
 from app import auth
 from ..database import get_db
+from ..services import auth_tokens, password_hasher
 from .. import schemas_admin
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please try again",
+        headers={"Retry-After": "1"},
+    )
+
 
 # ---------------------------
 # Register new user
 # ---------------------------
 @router.post("/register", response_model=schemas_auth.User)
-def register(user: schemas_auth.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas_auth.UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if email exists
-    if db.query(models.User).filter(models.User.email == user.email).first():
+    if await db.scalar(select(models.User.id).where(models.User.email == user.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
     # Check if username exists
-    if db.query(models.User).filter(models.User.username == user.username).first():
+    if await db.scalar(select(models.User.id).where(models.User.username == user.username)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
 
     # Create new user
-    hashed_password = auth.get_password_hash(user.password)
+    # bcrypt is CPU-bound: hashed on the dedicated password pool, off the event loop
+    try:
+        hashed_password = await password_hasher.hash_password(user.password)
+    except password_hasher.PasswordHasherBusy:
+        raise _hasher_busy()
     db_user = models.User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
@@ -49,14 +63,21 @@ def register(user: schemas_auth.UserCreate, db: Session = Depends(get_db)):
 # Login and get access token
 # ---------------------------
 @router.post("/login", response_model=schemas_auth.Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login and receive access token"""
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    result = await db.execute(select(models.User).where(models.User.email == form_data.username))
+    user = result.scalars().first()
+
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except password_hasher.PasswordHasherBusy:
+            raise _hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -70,22 +91,58 @@ def login(
             detail="Account is deactivated. Contact administrator."
         )
 
-    # Update last login
+    # Update last login (and the hash, when it was made with a lower bcrypt cost)
     user.last_login = datetime.utcnow()
-    db.commit()
+    if new_hash:
+        user.hashed_password = new_hash
 
-    # Create access token
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    # Access token (user id and roles) plus a refresh token starting a new session
+    tokens = auth_tokens.issue(db, user)
+    await db.commit()
+    auth.invalidate_user_cache(user.id)
+    return tokens
 
-    return {"access_token": access_token, "token_type": "bearer"}
+
+# ---------------------------
+# Exchange a refresh token for a new token pair (rotation)
+# ---------------------------
+@router.post("/refresh", response_model=schemas_auth.Token)
+async def refresh(request: schemas_auth.RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """New access and refresh token; the refresh token sent can't be used again"""
+    try:
+        return await auth_tokens.rotate(db, request.refresh_token)
+    except auth_tokens.InvalidRefreshToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# ---------------------------
+# Logout: end the session of the current tokens
+# ---------------------------
+@router.post("/logout")
+async def logout(
+    request: Optional[schemas_auth.LogoutRequest] = None,
+    claims: dict = Depends(auth.get_token_claims),
+    db: AsyncSession = Depends(get_db)
+):
+    await auth_tokens.logout(db, claims, request.refresh_token if request else None)
+    await db.commit()
+    return {"message": "Logged out"}
 
 
 # ---------------------------
 # Get current user info
 # ---------------------------
 @router.get("/me", response_model=schemas_admin.UserAdmin)
-async def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
-   return schemas_admin.UserAdmin.from_orm(current_user)
+async def read_users_me(
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # the token only carries id and roles; profile fields come from the database
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return schemas_admin.UserAdmin.from_orm(user)
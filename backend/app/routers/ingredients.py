@@ -1,56 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import json
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timedelta
 from .. import models, schemas
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_db
 from ..auth import get_current_user
-from app import schemas
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, paginate, parse_fields, project
+from ..services import expiry_summary
+from ..services.ingredient_import import EXPORT_FIELDS, csv_line, export_row, import_ingredients
 
 
 router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
 
 @router.get("/", response_model=List[schemas.Ingredient])
-def get_ingredients(
+async def get_ingredients(
+    response: Response,
     location: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     current_user: models.User = Depends(get_current_user),  # user-specific
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all ingredients for current user, optionally filtered by location (Fridge/Pantry)"""
-    query = db.query(models.Ingredient).filter(models.Ingredient.user_id == current_user.id)
+    """Get ingredients for current user, optionally filtered by location (Fridge/Pantry)"""
+    selected = parse_fields(fields, schemas.Ingredient)
+    stmt = select(models.Ingredient).where(models.Ingredient.user_id == current_user.id)
     if location:
-        query = query.filter(models.Ingredient.location == location)
-    return query.all()
+        stmt = stmt.where(models.Ingredient.location == location)
+    stmt = project(stmt, models.Ingredient, selected)
+    items, next_cursor = await paginate(db, stmt, models.Ingredient.id, models.Ingredient.id, cursor, limit)
+    return page_response(response, items, next_cursor, selected, schemas.Ingredient)
+
+
+def _bulk_format(fmt: Optional[str], content_type: str) -> str:
+    fmt = fmt or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return fmt
+
+
+class _ImportResponse(StreamingResponse):
+    """A streaming response that doesn't read `receive` while it streams.
+
+    StreamingResponse listens on `receive` for a disconnect, which would swallow
+    the body chunks the import is still reading; a disconnect surfaces through
+    request.stream() instead."""
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await anyio.sleep_forever()  # cancelled once the body is sent
+
+
+@router.post("/import")
+async def import_ingredients_bulk(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Upsert ingredients from a CSV (header row) or NDJSON body; streams one NDJSON result per row
+    as soon as its batch is committed"""
+    fmt = _bulk_format(format, request.headers.get("content-type", ""))
+    user_id = current_user.id
+
+    async def results():
+        # the request-scoped session is closed before the body is streamed, so use our own
+        async with AsyncSessionLocal() as db:
+            try:
+                async for result in import_ingredients(db, user_id, request.stream(), fmt):
+                    yield json.dumps(result) + "\n"
+            except ClientDisconnect:
+                pass  # batches committed so far are kept
+
+    return _ImportResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/export")
+async def export_ingredients(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Stream the current user's whole inventory as CSV or NDJSON"""
+    user_id = current_user.id
+
+    async def rows():
+        if format == "csv":
+            yield csv_line(EXPORT_FIELDS)
+        # the request-scoped session is closed before the body is streamed, so use our own
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(models.Ingredient)
+                .where(models.Ingredient.user_id == user_id)
+                .order_by(models.Ingredient.id)
+                .execution_options(yield_per=1000)
+            )
+            async for ingredient in result.scalars():
+                yield export_row(ingredient, format)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ingredients.{format}"'},
+    )
 
 
 @router.get("/{ingredient_id}", response_model=schemas.Ingredient)
-def get_ingredient(
+async def get_ingredient(
     ingredient_id: int,
     current_user: models.User = Depends(get_current_user),  # user-specific
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific ingredient by ID for current user"""
-    ingredient = db.query(models.Ingredient).filter(
+    result = await db.execute(select(models.Ingredient).where(
         models.Ingredient.id == ingredient_id,
         models.Ingredient.user_id == current_user.id
-    ).first()
+    ))
+    ingredient = result.scalars().first()
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
     return ingredient
 
 
 @router.post("/", response_model=schemas.Ingredient)
-def create_ingredient(
+async def create_ingredient(
     ingredient: schemas.IngredientCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new ingredient for current user"""
-    existing = db.query(models.Ingredient).filter(
+    result = await db.execute(select(models.Ingredient).where(
         models.Ingredient.name == ingredient.name,
         models.Ingredient.user_id == current_user.id
-    ).first()
+    ))
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Ingredient already exists")
 
@@ -65,24 +152,26 @@ def create_ingredient(
     )
 
     db.add(db_ingredient)
-    db.commit()
-    db.refresh(db_ingredient)
+    await expiry_summary.invalidate(db, current_user.id)
+    await db.commit()
+    await db.refresh(db_ingredient)
     return db_ingredient
  
 
 
 @router.put("/{ingredient_id}", response_model=schemas.Ingredient)
-def update_ingredient(
+async def update_ingredient(
     ingredient_id: int,
     ingredient: schemas.IngredientUpdate,
     current_user: models.User = Depends(get_current_user),  # user-specific
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an ingredient for current user"""
-    db_ingredient = db.query(models.Ingredient).filter(
+    result = await db.execute(select(models.Ingredient).where(
         models.Ingredient.id == ingredient_id,
         models.Ingredient.user_id == current_user.id
-    ).first()
+    ))
+    db_ingredient = result.scalars().first()
     if not db_ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
 
@@ -90,42 +179,63 @@ def update_ingredient(
     for key, value in update_data.items():
         setattr(db_ingredient, key, value)
 
-    db.commit()
-    db.refresh(db_ingredient)
+    await expiry_summary.invalidate(db, current_user.id)
+    await db.commit()
+    await db.refresh(db_ingredient)
     return db_ingredient
 
 
 @router.delete("/{ingredient_id}")
-def delete_ingredient(
+async def delete_ingredient(
     ingredient_id: int,
     current_user: models.User = Depends(get_current_user),  # user-specific
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an ingredient for current user"""
-    db_ingredient = db.query(models.Ingredient).filter(
+    result = await db.execute(select(models.Ingredient).where(
         models.Ingredient.id == ingredient_id,
         models.Ingredient.user_id == current_user.id
-    ).first()
+    ))
+    db_ingredient = result.scalars().first()
     if not db_ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
 
-    db.delete(db_ingredient)
-    db.commit()
+    await db.delete(db_ingredient)
+    await expiry_summary.invalidate(db, current_user.id)
+    await db.commit()
     return {"message": "Ingredient deleted successfully"}
 
 
 @router.get("/expiring/soon", response_model=List[schemas.Ingredient])
-def get_expiring_soon(
+async def get_expiring_soon(
+    response: Response,
     days: int = 7,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     current_user: models.User = Depends(get_current_user),  # user-specific
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get ingredients for current user expiring within specified days"""
+    """Get ingredients for current user expiring within specified days, soonest first"""
+    selected = parse_fields(fields, schemas.Ingredient)
     expiry_threshold = datetime.now().date() + timedelta(days=days)
 
-    ingredients = db.query(models.Ingredient).filter(
+    stmt = select(models.Ingredient).where(
         models.Ingredient.user_id == current_user.id,
         models.Ingredient.expiry_date.isnot(None),
         models.Ingredient.expiry_date <= expiry_threshold
-    ).all()
-    return ingredients
+    )
+    stmt = project(stmt, models.Ingredient, selected, models.Ingredient.expiry_date)
+    items, next_cursor = await paginate(
+        db, stmt, models.Ingredient.expiry_date, models.Ingredient.id, cursor, limit
+    )
+    return page_response(response, items, next_cursor, selected, schemas.Ingredient)
+
+
+@router.get("/expiring/summary", response_model=schemas.ExpirySummary)
+async def get_expiry_summary(
+    current_user: models.User = Depends(get_current_user),  # user-specific
+    db: AsyncSession = Depends(get_db)
+):
+    """Counts of expired / expiring items for the dashboard (precomputed per user)"""
+    return await expiry_summary.get_summary(db, current_user.id)
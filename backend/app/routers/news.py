@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 import re
 
-from .. import models, schemas_news
+from .. import models, response_cache, schemas_news, search
 from ..database import get_db
 from ..auth import get_current_admin_user, get_current_active_user
+from ..pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    page_response, paginate, parse_fields, project, project_items,
+)
 
 router = APIRouter(prefix="/news", tags=["news"])
 
@@ -24,65 +29,109 @@ def create_slug(title: str) -> str:
 # PUBLIC ENDPOINTS (no auth required)
 # --------------------------
 @router.get("/public", response_model=List[schemas_news.NewsPublic])
-def get_published_news(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Get all published news (public)"""
-    news = (
-        db.query(models.News)
-        .filter(models.News.is_published == True)
-        .order_by(models.News.published_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+async def get_published_news(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get published news, newest first (public, cached)"""
+    selected = parse_fields(fields, schemas_news.NewsPublic)
+
+    async def render():
+        stmt = select(models.News).where(models.News.is_published == True)
+        stmt = project(stmt, models.News, selected, models.News.published_at)
+        news, next_cursor = await paginate(
+            db, stmt, models.News.published_at, models.News.id, cursor, limit, descending=True
+        )
+        if selected:
+            content = project_items(news, selected, schemas_news.NewsPublic)
+        else:
+            content = [schemas_news.NewsPublic.model_validate(n, from_attributes=True) for n in news]
+        return content, ({NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {})
+
+    return await response_cache.cached_response(
+        request, "news", f"public:{cursor}:{limit}:{','.join(selected or [])}", render
     )
-    return news
 
-@router.get("/public/{slug}", response_model=schemas_news.NewsPublic)
-def get_news_by_slug(slug: str, db: Session = Depends(get_db)):
-    """Get specific news article by slug (public)"""
-    news = (
-        db.query(models.News)
-        .filter(models.News.slug == slug, models.News.is_published == True)
-        .first()
+@router.get("/search", response_model=List[schemas_news.NewsSearchHit])
+async def search_news(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Full-text search in published news, best match first (public, cached)"""
+    async def render():
+        hits, next_cursor = await search.search(
+            db, models.News, q, models.News.is_published == True, cursor=cursor, limit=limit
+        )
+        content = [
+            schemas_news.NewsSearchHit(
+                news=schemas_news.NewsPublic.model_validate(news, from_attributes=True),
+                rank=rank,
+                highlights=highlights,
+            )
+            for news, rank, highlights in hits
+        ]
+        return content, ({NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {})
+
+    return await response_cache.cached_response(
+        request, "news", f"search:{' '.join(q.split()).lower()}:{cursor}:{limit}", render
     )
-    if not news:
-        raise HTTPException(status_code=404, detail="News not found")
-    return news
+
+@router.get("/public/{slug}", response_model=schemas_news.NewsPublic)
+async def get_news_by_slug(slug: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get specific news article by slug (public, cached)"""
+    async def render():
+        result = await db.execute(
+            select(models.News)
+            .where(models.News.slug == slug, models.News.is_published == True)
+        )
+        news = result.scalars().first()
+        if not news:
+            raise HTTPException(status_code=404, detail="News not found")
+        return schemas_news.NewsPublic.model_validate(news, from_attributes=True), {}
+
+    return await response_cache.cached_response(request, "news", f"slug:{slug}", render)
 
 # --------------------------
 # ADMIN ENDPOINTS (auth required)
 # --------------------------
 @router.get("/", response_model=List[schemas_news.News])
-def get_all_news(
-    skip: int = 0,
-    limit: int = 100,
+async def get_all_news(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get all news articles (admin only)"""
-    news = (
-        db.query(models.News)
-        .order_by(models.News.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    """Get all news articles, newest first (admin only)"""
+    selected = parse_fields(fields, schemas_news.News)
+    stmt = project(select(models.News), models.News, selected, models.News.created_at)
+    news, next_cursor = await paginate(
+        db, stmt, models.News.created_at, models.News.id, cursor, limit, descending=True
     )
-    return news
+    return page_response(response, news, next_cursor, selected, schemas_news.News)
 
 @router.post("/", response_model=schemas_news.News)
-def create_news(
+async def create_news(
     news: schemas_news.NewsCreate,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create news article (admin only)"""
     # Generate slug
     slug = create_slug(news.title)
     # Check if slug exists
-    existing = db.query(models.News).filter(models.News.slug == slug).first()
+    existing = await db.scalar(select(models.News.id).where(models.News.slug == slug))
     if existing:
         # Append number to make unique
         counter = 1
-        while db.query(models.News).filter(models.News.slug == f"{slug}-{counter}").first():
+        while await db.scalar(select(models.News.id).where(models.News.slug == f"{slug}-{counter}")):
             counter += 1
         slug = f"{slug}-{counter}"
     
@@ -92,27 +141,28 @@ def create_news(
         image_url = "https://picsum.photos/200/150"
 
     db_news = models.News(
-        **news.model_dump(),
+        **news.model_dump(exclude={"image_url"}),
         image_url=image_url,
         slug=slug,
         author_id=current_admin.id,
         published_at=datetime.utcnow() if news.is_published else None
     )
     db.add(db_news)
-    db.commit()
-    db.refresh(db_news)
+    await db.commit()
+    await response_cache.invalidate("news")
+    await db.refresh(db_news)
     return db_news
 
 
 @router.put("/{news_id}", response_model=schemas_news.News)
-def update_news(
+async def update_news(
     news_id: int,
     news_update: schemas_news.NewsUpdate,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update news article (admin only)"""
-    db_news = db.query(models.News).filter(models.News.id == news_id).first()
+    db_news = await db.get(models.News, news_id)
     if not db_news:
         raise HTTPException(status_code=404, detail="News not found")
 
@@ -129,21 +179,23 @@ def update_news(
     for key, value in update_data.items():
         setattr(db_news, key, value)
 
-    db.commit()
-    db.refresh(db_news)
+    await db.commit()
+    await response_cache.invalidate("news")
+    await db.refresh(db_news)
     return db_news
 
 @router.delete("/{news_id}")
-def delete_news(
+async def delete_news(
     news_id: int,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete news article (admin only)"""
-    db_news = db.query(models.News).filter(models.News.id == news_id).first()
+    db_news = await db.get(models.News, news_id)
     if not db_news:
         raise HTTPException(status_code=404, detail="News not found")
 
-    db.delete(db_news)
-    db.commit()
+    await db.delete(db_news)
+    await db.commit()
+    await response_cache.invalidate("news")
     return {"message": "News deleted successfully"}
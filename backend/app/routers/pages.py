@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas_pages
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import models, response_cache, schemas_pages
 from ..database import get_db
 from ..auth import get_current_admin_user
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, paginate, parse_fields, project
 
 router = APIRouter(prefix="/pages", tags=["pages"])
 
@@ -11,43 +13,54 @@ router = APIRouter(prefix="/pages", tags=["pages"])
 # PUBLIC ENDPOINTS
 # -----------------------------
 @router.get("/public/{page_key}", response_model=schemas_pages.PageContentPublic)
-def get_page_content(page_key: str, db: Session = Depends(get_db)):
-    """Get page content by key (public)"""
-    page = db.query(models.PageContent).filter(
-        models.PageContent.page_key == page_key
-    ).first()
-    if not page:
-        # Return default content if page doesn't exist
-        return {
-            "title": page_key.capitalize(),
-            "content": f"Content for {page_key} page is not available yet.",
-            "updated_at": None
-        }
-    return page
+async def get_page_content(page_key: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get page content by key (public, cached)"""
+    async def render():
+        result = await db.execute(select(models.PageContent).where(
+            models.PageContent.page_key == page_key
+        ))
+        page = result.scalars().first()
+        if not page:
+            # Return default content if page doesn't exist
+            return {
+                "title": page_key.capitalize(),
+                "content": f"Content for {page_key} page is not available yet.",
+                "updated_at": None
+            }, {}
+        return schemas_pages.PageContentPublic.model_validate(page, from_attributes=True), {}
+
+    return await response_cache.cached_response(request, "pages", page_key, render)
 
 # -----------------------------
 # ADMIN ENDPOINTS
 # -----------------------------
 @router.get("/", response_model=List[schemas_pages.PageContent])
-def get_all_pages(
+async def get_all_pages(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all pages (admin only)"""
-    pages = db.query(models.PageContent).all()
-    return pages
+    selected = parse_fields(fields, schemas_pages.PageContent)
+    stmt = project(select(models.PageContent), models.PageContent, selected)
+    pages, next_cursor = await paginate(db, stmt, models.PageContent.id, models.PageContent.id, cursor, limit)
+    return page_response(response, pages, next_cursor, selected, schemas_pages.PageContent)
 
 @router.post("/", response_model=schemas_pages.PageContent)
-def create_page(
+async def create_page(
     page: schemas_pages.PageContentCreate,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create page content (admin only)"""
     # Check if page key exists
-    existing = db.query(models.PageContent).filter(
+    result = await db.execute(select(models.PageContent).where(
         models.PageContent.page_key == page.page_key
-    ).first()
+    ))
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Page key already exists")
     
@@ -56,21 +69,23 @@ def create_page(
         updated_by_id=current_admin.id
     )
     db.add(db_page)
-    db.commit()
-    db.refresh(db_page)
+    await db.commit()
+    await response_cache.invalidate("pages")
+    await db.refresh(db_page)
     return db_page
 
 @router.put("/{page_key}", response_model=schemas_pages.PageContent)
-def update_page(
+async def update_page(
     page_key: str,
     page_update: schemas_pages.PageContentUpdate,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update page content (admin only)"""
-    db_page = db.query(models.PageContent).filter(
+    result = await db.execute(select(models.PageContent).where(
         models.PageContent.page_key == page_key
-    ).first()
+    ))
+    db_page = result.scalars().first()
     if not db_page:
         raise HTTPException(status_code=404, detail="Page not found")
     
@@ -79,23 +94,26 @@ def update_page(
         setattr(db_page, key, value)
     
     db_page.updated_by_id = current_admin.id
-    db.commit()
-    db.refresh(db_page)
+    await db.commit()
+    await response_cache.invalidate("pages")
+    await db.refresh(db_page)
     return db_page
 
 @router.delete("/{page_key}")
-def delete_page(
+async def delete_page(
     page_key: str,
     current_admin: models.User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete page content (admin only)"""
-    db_page = db.query(models.PageContent).filter(
+    result = await db.execute(select(models.PageContent).where(
         models.PageContent.page_key == page_key
-    ).first()
+    ))
+    db_page = result.scalars().first()
     if not db_page:
         raise HTTPException(status_code=404, detail="Page not found")
     
-    db.delete(db_page)
-    db.commit()
+    await db.delete(db_page)
+    await db.commit()
+    await response_cache.invalidate("pages")
     return {"message": "Page deleted successfully"}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from app.database import get_db
+from app.auth import get_current_user
+from app.services.recipe_jobs import create_job, job_recipe_ids
+
+router = APIRouter(prefix="/recipes/jobs", tags=["recipe jobs"])
+
+
+# ---------------------------
+# Queue a batch of recipe generations (processed by recipe_worker.py)
+# ---------------------------
+@router.post("/", response_model=schemas.RecipeJob, status_code=202)
+async def create_recipe_job(
+    job: schemas.RecipeJobCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    requests = [
+        {"ingredients": [i.model_dump() for i in r.ingredients], "preferences": r.preferences}
+        for r in job.items
+    ]
+    return await create_job(db, current_user.id, requests)
+
+
+# ---------------------------
+# Job status and progress
+# ---------------------------
+@router.get("/{job_id}", response_model=schemas.RecipeJob)
+async def get_recipe_job(
+    job_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await db.get(models.RecipeJob, job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    result = schemas.RecipeJob.model_validate(job, from_attributes=True)
+    result.recipe_ids = await job_recipe_ids(db, job_id)
+    return result
@@ -1,38 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app import models, schemas
-from app.database import get_db
-from app.auth import get_current_user
-from app.services.gemini_service import generate_recipe
 import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import models, schemas, search
+from app.database import AsyncSessionLocal, get_db
+from app.auth import get_current_user
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, paginate, parse_fields, project
+from app.services import gemini_service, recipe_cache
+from app.services.json_stream import IncrementalJSONParser
+from app.services.recipe_cache import get_or_generate
+from app.services.recipe_index import index_recipe, match_recipe_ids, rank_pantry_matches
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
+logger = logging.getLogger(__name__)
 
 # ---------------------------
 # Get all recipes for current user
 # ---------------------------
+def _has_tag(db: AsyncSession, tag: str):
+    if db.bind.dialect.name == "postgresql":
+        # tags @> '["tag"]' is served by the GIN index on recipes.tags
+        return type_coerce(models.Recipe.tags, JSONB).contains([tag])
+    # SQLite (local runs): scan the JSON array
+    tags = func.json_each(models.Recipe.tags).table_valued("value")
+    return select(tags.c.value).where(tags.c.value == tag).exists()
+
+
 @router.get("/", response_model=List[schemas.Recipe])
-def get_recipes(
+async def get_recipes(
+    response: Response,
+    tag: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    selected = parse_fields(fields, schemas.Recipe)
+    stmt = select(models.Recipe).where(models.Recipe.user_id == current_user.id)
+    if tag:
+        stmt = stmt.where(_has_tag(db, tag))
+    stmt = project(stmt, models.Recipe, selected)
+    items, next_cursor = await paginate(db, stmt, models.Recipe.id, models.Recipe.id, cursor, limit)
+    return page_response(response, items, next_cursor, selected, schemas.Recipe)
+
+
+# ---------------------------
+# Full-text search in the current user's recipes
+# ---------------------------
+@router.get("/search", response_model=List[schemas.RecipeSearchHit])
+async def search_recipes(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    return db.query(models.Recipe).filter(models.Recipe.user_id == current_user.id).all()
+    hits, next_cursor = await search.search(
+        db, models.Recipe, q, models.Recipe.user_id == current_user.id, cursor=cursor, limit=limit
+    )
+    items = [
+        schemas.RecipeSearchHit(
+            recipe=schemas.Recipe.model_validate(recipe, from_attributes=True),
+            rank=rank,
+            highlights=highlights,
+        )
+        for recipe, rank, highlights in hits
+    ]
+    return page_response(response, items, next_cursor)
 
 
 # ---------------------------
 # Get a specific recipe by ID
 # ---------------------------
 @router.get("/{recipe_id}", response_model=schemas.Recipe)
-def get_recipe(
+async def get_recipe(
     recipe_id: int,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    recipe = db.query(models.Recipe).filter(
+    result = await db.execute(select(models.Recipe).where(
         models.Recipe.id == recipe_id,
         models.Recipe.user_id == current_user.id
-    ).first()
+    ))
+    recipe = result.scalars().first()
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
@@ -41,17 +98,27 @@ def get_recipe(
 # ---------------------------
 # Generate a recipe using Gemini
 # ---------------------------
-@router.post("/generate", response_model=schemas.Recipe)
-async def create_recipe(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _generate_args(request: Optional[schemas.RecipeGenerateRequest]):
+    """Ingredients and preferences for the model (the old fixed request when no body is sent)"""
+    if request and request.ingredients:
+        return [i.model_dump() for i in request.ingredients], request.preferences
     ingredients = [
         {"name": "tomato", "quantity": "2", "unit": "pcs"},
         {"name": "onion", "quantity": "1", "unit": "pcs"}
     ]
-    
-    recipe_data = await generate_recipe(ingredients, preferences="vegan")
+    return ingredients, "vegan"
+
+
+@router.post("/generate", response_model=schemas.Recipe)
+async def create_recipe(
+    request: Optional[schemas.RecipeGenerateRequest] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    ingredients, preferences = _generate_args(request)
+
+    # identical ingredient sets / preferences are answered from the cache
+    recipe_data = await get_or_generate(db, ingredients, preferences)
     
     if "error" in recipe_data:
         raise HTTPException(status_code=500, detail=f"Gemini error: {recipe_data['error']}")
@@ -59,60 +126,107 @@ async def create_recipe(
     if not recipe_data.get("ingredients") or not recipe_data.get("instructions"):
         raise HTTPException(status_code=500, detail="Gemini returned invalid recipe data")
 
-    def parse_time(t: str) -> int:
-        try:
-            return int(t.split()[0])
-        except:
-            return 0
-
-    new_recipe = models.Recipe(
-        name=recipe_data.get("name", "Unknown Recipe"),
-        description=recipe_data.get("description", ""),
-        ingredients=json.dumps(recipe_data.get("ingredients", [])),
-        instructions=json.dumps(recipe_data.get("instructions", [])),
-        prep_time=parse_time(recipe_data.get("prep_time", "0")),
-        cook_time=parse_time(recipe_data.get("cook_time", "0")),
-        servings=recipe_data.get("servings", 1),
-        calories=recipe_data.get("calories", 0),
-        difficulty=recipe_data.get("difficulty", "Unknown"),
-        tags=json.dumps(recipe_data.get("tags", [])),
-        user_id=current_user.id
-    )
-    
+    new_recipe = gemini_service.build_recipe(recipe_data, current_user.id)
     db.add(new_recipe)
-    db.commit()
-    db.refresh(new_recipe)
+    await db.commit()
+    await db.refresh(new_recipe)
     
     return new_recipe
 
 
+# ---------------------------
+# Generate a recipe, streamed as Server-Sent Events
+# ---------------------------
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _replay(text: str):
+    yield text
+
+
+@router.post("/generate/stream")
+async def create_recipe_stream(
+    request: Optional[schemas.RecipeGenerateRequest] = None,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Stream the recipe while Gemini writes it.
+
+    Events: `start`, `field` / `item` (from the incremental JSON parser, e.g. the name,
+    each ingredient, each instruction step), then `recipe` with the saved recipe,
+    or `error`.
+    """
+    ingredients, preferences = _generate_args(request)
+    user_id = current_user.id
+
+    async def events():
+        yield _sse("start", {})
+        # the request-scoped session is closed before the body is streamed, so use our own
+        async with AsyncSessionLocal() as db:
+            key = recipe_cache.cache_key(ingredients, preferences)
+            parser = IncrementalJSONParser()
+            try:
+                cached = await recipe_cache.lookup(db, key)
+                if cached is not None:
+                    chunks = _replay(json.dumps(cached))
+                else:
+                    recipe_cache.misses.inc()
+                    chunks = gemini_service.stream_recipe_text(ingredients, preferences)
+                async for chunk in chunks:
+                    for event in parser.feed(chunk):
+                        yield _sse(event["type"], event)
+            except Exception as e:
+                logger.error("Error streaming recipe: %s", e)
+                yield _sse("error", {"detail": f"Gemini error: {e}"})
+                return
+
+            recipe_data = parser.result
+            if not parser.done or not recipe_cache.is_valid_recipe(recipe_data):
+                yield _sse("error", {"detail": "Gemini returned invalid recipe data"})
+                return
+            if cached is None:
+                await recipe_cache.store(db, key, recipe_data)
+            new_recipe = gemini_service.build_recipe(recipe_data, user_id)
+            db.add(new_recipe)
+            await db.commit()
+            await db.refresh(new_recipe)
+            yield _sse("recipe", schemas.Recipe.model_validate(new_recipe, from_attributes=True))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
+    )
+
+
 # ---------------------------
 # Seed sample recipes (for testing)
 # ---------------------------
 @router.post("/seed-sample")
-def seed_sample_recipes(
-    db: Session = Depends(get_db),
+async def seed_sample_recipes(
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     sample_recipes = [
         {
             "name": "Tomato Pasta",
             "description": "Delicious tomato pasta",
-            "ingredients": json.dumps([{"name": "tomato", "quantity": 2, "unit": "pcs"}]),
-            "instructions": json.dumps(["Boil pasta", "Add tomato sauce"]),
+            "ingredients": [{"name": "tomato", "quantity": 2, "unit": "pcs"}],
+            "instructions": ["Boil pasta", "Add tomato sauce"],
             "prep_time": 10,
             "cook_time": 15,
             "servings": 2,
             "calories": 300,
             "difficulty": "Easy",
-            "tags": json.dumps(["pasta", "vegan"]),
+            "tags": ["pasta", "vegan"],
             "user_id": current_user.id
         }
     ]
     for r in sample_recipes:
         db_recipe = models.Recipe(**r)
+        index_recipe(db_recipe)
         db.add(db_recipe)
-    db.commit()
+    await db.commit()
     return {"message": "Sample recipes added"}
 
 
@@ -120,51 +234,52 @@ def seed_sample_recipes(
 # Match recipes based on ingredients
 # ---------------------------
 @router.get("/match/ingredients", response_model=List[schemas.Recipe])
-def match_recipes(
+async def match_recipes(
     ingredients: List[str] = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    recipes = db.query(models.Recipe).all()
-    matched = []
+    recipe_ids = await match_recipe_ids(db, ingredients)
+    if not recipe_ids:
+        return []
+    result = await db.execute(select(models.Recipe).where(models.Recipe.id.in_(recipe_ids)))
+    return result.scalars().all()
 
-    for r in recipes:
-        try:
-            recipe_ingredients_json = json.loads(r.ingredients)
-            recipe_ingredients = [
-                i['name'] if isinstance(i, dict) and 'name' in i else str(i)
-                for i in recipe_ingredients_json
-            ]
-            if all(ing in recipe_ingredients for ing in ingredients):
-                matched.append(r)
-        except Exception:
-            # JSON خراب یا نامعتبر را نادیده می‌گیریم
-            continue
 
-    return matched
+# ---------------------------
+# Rank recipes by how much of them the user's pantry covers
+# ---------------------------
+@router.get("/match/pantry", response_model=List[schemas.RecipeMatch])
+async def match_pantry(
+    limit: int = Query(10, ge=1, le=100),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await rank_pantry_matches(db, current_user.id, limit)
 
 # ---------------------------
 # Create a new recipe manually (used when AI-generated recipe is saved from frontend)
 # ---------------------------
 @router.post("/", response_model=schemas.Recipe)
-def create_recipe_manual(
+async def create_recipe_manual(
     recipe: schemas.RecipeCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     new_recipe = models.Recipe(
         name=recipe.name,
         description=recipe.description,
-        ingredients=json.dumps(recipe.ingredients),
-        instructions=json.dumps(recipe.instructions),
+        ingredients=recipe.ingredients,
+        instructions=recipe.instructions,
         prep_time=recipe.prep_time,
         cook_time=recipe.cook_time,
         servings=recipe.servings,
         calories=recipe.calories,
         difficulty=recipe.difficulty,
-        tags=json.dumps(recipe.tags),
+        tags=recipe.tags or [],
         user_id=current_user.id
     )
+    index_recipe(new_recipe)
     db.add(new_recipe)
-    db.commit()
-    db.refresh(new_recipe)
+    await db.commit()
+    await db.refresh(new_recipe)
     return new_recipe
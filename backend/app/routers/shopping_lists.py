@@ -1,87 +1,185 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 from app import models, schemas
 from app.database import get_db
 from app.auth import get_current_user
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, paginate, parse_fields, project
+from app.services.shopping_planner import plan_items
 
 router = APIRouter(prefix="/shopping-lists", tags=["shopping-lists"])
 
 @router.get("/", response_model=List[schemas.ShoppingList])
-def get_shopping_lists(current_user: models.User = Depends(get_current_user),
-                       db: Session = Depends(get_db)):
-    return db.query(models.ShoppingList).filter(models.ShoppingList.user_id == current_user.id).all()
+async def get_shopping_lists(response: Response,
+                       cursor: Optional[str] = None,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       fields: Optional[str] = None,
+                       current_user: models.User = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_db)):
+    selected = parse_fields(fields, schemas.ShoppingList)
+    stmt = select(models.ShoppingList).where(models.ShoppingList.user_id == current_user.id)
+    if not selected or "items" in selected:
+        # one extra SELECT ... WHERE shopping_list_id IN (...) for the whole page
+        stmt = stmt.options(selectinload(models.ShoppingList.items))
+    stmt = project(stmt, models.ShoppingList, selected)
+    items, next_cursor = await paginate(db, stmt, models.ShoppingList.id, models.ShoppingList.id, cursor, limit)
+    return page_response(response, items, next_cursor, selected, schemas.ShoppingList)
 
 @router.get("/{list_id}", response_model=schemas.ShoppingList)
-def get_shopping_list(list_id:int, current_user: models.User = Depends(get_current_user),
-                      db: Session = Depends(get_db)):
-    shopping_list = db.query(models.ShoppingList).filter(
+async def get_shopping_list(list_id:int, current_user: models.User = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.ShoppingList).options(
+        selectinload(models.ShoppingList.items)
+    ).where(
         models.ShoppingList.id == list_id,
         models.ShoppingList.user_id == current_user.id
-    ).first()
+    ))
+    shopping_list = result.scalars().first()
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     return shopping_list
 
 @router.post("/", response_model=schemas.ShoppingList)
-def create_shopping_list(shopping_list:schemas.ShoppingListCreate,
+async def create_shopping_list(shopping_list:schemas.ShoppingListCreate,
                          current_user: models.User = Depends(get_current_user),
-                         db: Session = Depends(get_db)):
-    db_list = models.ShoppingList(**shopping_list.dict(), user_id=current_user.id)
+                         db: AsyncSession = Depends(get_db)):
+    # a new list has no items; setting the collection avoids a lazy load when serializing
+    db_list = models.ShoppingList(**shopping_list.dict(), user_id=current_user.id, items=[])
     db.add(db_list)
-    db.commit()
-    db.refresh(db_list)
+    await db.commit()
+    await db.refresh(db_list, ["id", "name", "created_at"])
     return db_list
 
+@router.post("/from-recipes", response_model=schemas.ShoppingList)
+async def create_list_from_recipes(request:schemas.ShoppingListFromRecipes,
+                             current_user: models.User = Depends(get_current_user),
+                             db: AsyncSession = Depends(get_db)):
+    """Create a list with everything the recipes need that the pantry doesn't already cover"""
+    recipe_ids = {r.recipe_id for r in request.recipes}
+    result = await db.execute(select(models.Recipe).where(
+        models.Recipe.id.in_(recipe_ids),
+        models.Recipe.user_id==current_user.id
+    ))
+    recipes = {r.id: r for r in result.scalars()}
+    missing = sorted(recipe_ids - set(recipes))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Recipes not found: {', '.join(map(str, missing))}")
+
+    wanted = [(recipes[r.recipe_id], r.servings or recipes[r.recipe_id].servings) for r in request.recipes]
+    items = await plan_items(db, current_user.id, wanted, request.subtract_pantry)
+
+    name = request.name or "Shopping for " + ", ".join(recipe.name for recipe, _ in wanted)
+    db_list = models.ShoppingList(name=name[:200], user_id=current_user.id)
+    db.add(db_list)
+    await db.flush()
+    if items:
+        # one executemany INSERT for all items
+        await db.execute(
+            insert(models.ShoppingItem),
+            [{**item, "shopping_list_id": db_list.id, "is_purchased": False} for item in items]
+        )
+    await db.commit()
+
+    result = await db.execute(select(models.ShoppingList).options(
+        selectinload(models.ShoppingList.items)
+    ).where(models.ShoppingList.id==db_list.id).execution_options(populate_existing=True))
+    return result.scalars().first()
+
 @router.delete("/{list_id}")
-def delete_shopping_list(list_id:int, current_user: models.User = Depends(get_current_user),
-                         db: Session = Depends(get_db)):
-    db_list = db.query(models.ShoppingList).filter(
+async def delete_shopping_list(list_id:int, current_user: models.User = Depends(get_current_user),
+                         db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.ShoppingList).where(
         models.ShoppingList.id==list_id,
         models.ShoppingList.user_id==current_user.id
-    ).first()
+    ))
+    db_list = result.scalars().first()
     if not db_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
-    db.delete(db_list)
-    db.commit()
+    await db.delete(db_list)
+    await db.commit()
     return {"message":"Shopping list deleted successfully"}
 
 @router.post("/{list_id}/items", response_model=schemas.ShoppingItem)
-def add_item_to_list(list_id:int, item:schemas.ShoppingItemCreate,
+async def add_item_to_list(list_id:int, item:schemas.ShoppingItemCreate,
                      current_user: models.User = Depends(get_current_user),
-                     db: Session = Depends(get_db)):
-    shopping_list = db.query(models.ShoppingList).filter(
+                     db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.ShoppingList).where(
         models.ShoppingList.id==list_id,
         models.ShoppingList.user_id==current_user.id
-    ).first()
+    ))
+    shopping_list = result.scalars().first()
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     db_item = models.ShoppingItem(**item.model_dump(), shopping_list_id=list_id)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
+@router.patch("/{list_id}/items", response_model=schemas.ShoppingList)
+async def batch_update_items(list_id:int, batch:schemas.ShoppingItemBatch,
+                       current_user: models.User = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_db)):
+    """Apply add/update/delete operations, in order, in one transaction; returns the new list"""
+    result = await db.execute(select(models.ShoppingList).options(
+        selectinload(models.ShoppingList.items)
+    ).where(
+        models.ShoppingList.id==list_id,
+        models.ShoppingList.user_id==current_user.id
+    ))
+    shopping_list = result.scalars().first()
+    if not shopping_list:
+        raise HTTPException(status_code=404, detail="Shopping list not found")
+
+    # nothing is written until every operation has been checked
+    items = {item.id: item for item in shopping_list.items}
+    for operation in batch.operations:
+        if operation.op == "add":
+            shopping_list.items.append(
+                models.ShoppingItem(**operation.model_dump(exclude={"op"}))
+            )
+            continue
+        db_item = items.pop(operation.id, None) if operation.op == "delete" else items.get(operation.id)
+        if db_item is None:
+            raise HTTPException(status_code=404, detail=f"Shopping item {operation.id} not found")
+        if operation.op == "delete":
+            shopping_list.items.remove(db_item)
+        else:
+            for key, value in operation.model_dump(exclude={"op", "id"}, exclude_none=True).items():
+                setattr(db_item, key, value)
+
+    # a single flush and commit for the whole batch
+    await db.commit()
+    return shopping_list
+
 @router.put("/items/{item_id}", response_model=schemas.ShoppingItem)
-def update_shopping_item(item_id:int, is_purchased:bool,
+async def update_shopping_item(item_id:int, is_purchased:bool,
                          current_user: models.User = Depends(get_current_user),
-                         db: Session = Depends(get_db)):
-    db_item = db.query(models.ShoppingItem).join(models.ShoppingList).filter(
+                         db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.ShoppingItem).join(models.ShoppingList).where(
         models.ShoppingItem.id==item_id,
         models.ShoppingList.user_id==current_user.id
-    ).first()
+    ))
+    db_item = result.scalars().first()
     if not db_item:
         raise HTTPException(status_code=404, detail="Shopping item not found")
     db_item.is_purchased = is_purchased
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 @router.delete("/items/{item_id}")
-def delete_shopping_item(item_id:int, current_user: models.User = Depends(get_current_user),
-                         db: Session = Depends(get_db)):
-    db_item = db.query(models.ShoppingItem).join(models.ShoppingList).filter(
+async def delete_shopping_item(item_id:int, current_user: models.User = Depends(get_current_user),
+                         db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.ShoppingItem).join(models.ShoppingList).where(
         models.ShoppingItem.id==item_id,
         models.ShoppingList.user_id==current_user.id
-    ).first()
-   
+    ))
+    db_item = result.scalars().first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Shopping item not found")
+    await db.delete(db_item)
+    await db.commit()
+    return {"message":"Shopping item deleted successfully"}
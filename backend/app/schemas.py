@@ -1,7 +1,8 @@
 # schemas.py
-from typing import Optional, List
+from typing import Annotated, Any, Dict, Literal, Optional, List, Union
 from datetime import date, datetime
-from pydantic import BaseModel, EmailStr
+import json
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 
 # ---------------------------
@@ -36,6 +37,17 @@ class Ingredient(IngredientBase):
     class Config:
         orm_mode = True
 
+class ExpirySummary(BaseModel):
+    expired: int = 0
+    today: int = 0
+    within_3_days: int = 0
+    within_7_days: int = 0
+    as_of: date
+    refreshed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
 
 # ---------------------------
 # Shopping List Schemas
@@ -56,6 +68,38 @@ class ShoppingItem(ShoppingItemBase):
     class Config:
         orm_mode = True
 
+class ShoppingItemAddOp(ShoppingItemCreate):
+    op: Literal["add"]
+
+class ShoppingItemUpdateOp(BaseModel):
+    op: Literal["update"]
+    id: int
+    item_name: Optional[str] = None
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+    is_purchased: Optional[bool] = None
+
+class ShoppingItemDeleteOp(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+ShoppingItemOperation = Annotated[
+    Union[ShoppingItemAddOp, ShoppingItemUpdateOp, ShoppingItemDeleteOp],
+    Field(discriminator="op"),
+]
+
+class ShoppingItemBatch(BaseModel):
+    operations: List[ShoppingItemOperation] = Field(..., min_length=1, max_length=500)
+
+class RecipeServings(BaseModel):
+    recipe_id: int
+    servings: Optional[int] = Field(None, ge=1)  # defaults to the recipe's own servings
+
+class ShoppingListFromRecipes(BaseModel):
+    name: Optional[str] = None
+    recipes: List[RecipeServings] = Field(..., min_length=1, max_length=50)
+    subtract_pantry: bool = True
+
 class ShoppingListBase(BaseModel):
     name: str
 
@@ -77,16 +121,27 @@ class ShoppingList(ShoppingListBase):
 class RecipeBase(BaseModel):
     name: str
     description: Optional[str] = None
-    ingredients: str  # JSON string
-    instructions: str
+    ingredients: List[Union[str, Dict[str, Any]]]
+    instructions: Union[List[Union[str, Dict[str, Any]]], str]
     prep_time: Optional[int] = None
     cook_time: Optional[int] = None
     servings: int = 2
     calories: Optional[int] = None
     difficulty: Optional[str] = None
-    tags: Optional[str] = None
+    tags: Optional[List[str]] = None
     is_healthy: bool = True
 
+    @field_validator("ingredients", "instructions", "tags", mode="before")
+    @classmethod
+    def parse_json_string(cls, value):
+        # older clients still send these fields as JSON-encoded strings
+        if isinstance(value, str) and value.lstrip().startswith(("[", "{")):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        return value
+
 class RecipeCreate(RecipeBase):
     pass
 
@@ -97,6 +152,44 @@ class Recipe(RecipeBase):
     class Config:
         orm_mode = True
 
+class GenerateIngredient(BaseModel):
+    name: str
+    quantity: Optional[Union[str, float]] = None
+    unit: Optional[str] = None
+
+class RecipeGenerateRequest(BaseModel):
+    ingredients: List[GenerateIngredient]
+    preferences: Optional[str] = None
+
+class RecipeJobCreate(BaseModel):
+    items: List[RecipeGenerateRequest] = Field(..., min_length=1, max_length=1000)
+
+class RecipeJob(BaseModel):
+    id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    recipe_ids: List[int] = []
+
+    class Config:
+        orm_mode = True
+
+class RecipeMatch(BaseModel):
+    recipe: Recipe
+    coverage: float  # matched / total recipe ingredients
+    matched_count: int
+    missing_count: int
+    soonest_expiry: Optional[date] = None  # earliest expiry among pantry items used
+
+class RecipeSearchHit(BaseModel):
+    recipe: Recipe
+    rank: float
+    highlights: Dict[str, str] = {}  # field -> matched text with <mark>…</mark>
+
 
 # ---------------------------
 # User Schemas
@@ -12,7 +12,7 @@ class UserAdmin(BaseModel):
     is_active: bool
     is_admin: bool
     created_at: datetime
-    last_login: datetime
+    last_login: Optional[datetime] = None
 
     model_config = {
         "from_attributes": True
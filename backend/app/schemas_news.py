@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 # Base schema for news
@@ -47,3 +47,9 @@ class NewsPublic(BaseModel):
 
     class Config:
         from_attributes = True
+
+class NewsSearchHit(BaseModel):
+    """Published article matching a search, with its rank and highlighted fields"""
+    news: NewsPublic
+    rank: float
+    highlights: Dict[str, str] = {}
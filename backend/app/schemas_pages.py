@@ -30,7 +30,7 @@ class PageContentPublic(BaseModel):
     """Public page view"""
     title: str
     content: str
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # None for pages that don't exist yet
 
     class Config:
         orm_mode = True
@@ -0,0 +1,194 @@
+"""
+Full-text search over recipes and news.
+
+Every searchable row keeps a `search_vector` column, filled on insert/update by
+the mapper events in app/models.py:
+
+- Postgres: a weighted tsvector (GIN index), queried with websearch_to_tsquery,
+  ranked with ts_rank_cd and highlighted with ts_headline
+- other databases (SQLite in local runs): the lowercased document text, matched
+  with LIKE per term and ranked/highlighted in Python with the same weights
+
+Results are keyset-paginated on (rank, id), both descending.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Text, cast, func, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pagination import decode_cursor, encode_cursor
+
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+MAX_TERMS = 8
+
+# table -> (attribute, weight); lists (tags, ingredients) are indexed by their names
+SEARCH_FIELDS: Dict[str, List[Tuple[str, str]]] = {
+    "recipes": [("name", "A"), ("ingredients", "B"), ("tags", "B"), ("description", "C")],
+    "news": [("title", "A"), ("summary", "B"), ("content", "C")],
+}
+# table -> text attributes returned with highlighted matches
+HIGHLIGHT_FIELDS: Dict[str, List[str]] = {
+    "recipes": ["name", "description"],
+    "news": ["title", "summary", "content"],
+}
+# same defaults as ts_rank: {D, C, B, A} = {0.1, 0.2, 0.4, 1.0}
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+_HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# ---------------------------
+# Documents
+# ---------------------------
+def field_text(value) -> str:
+    """Searchable text of a column value (lists of names or {name: ...} objects are joined)"""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(field_text(v.get("name") if isinstance(v, dict) else v) for v in value)
+    return str(value)
+
+
+def document(target) -> List[Tuple[str, str]]:
+    """(text, weight) parts of a row's search document"""
+    return [
+        (field_text(getattr(target, attr)), weight)
+        for attr, weight in SEARCH_FIELDS[target.__tablename__]
+    ]
+
+
+def search_vector(parts: Sequence[Tuple[str, str]], dialect: str):
+    """Value for the search_vector column: a tsvector expression on Postgres, plain text elsewhere"""
+    if dialect != "postgresql":
+        return " ".join(" ".join(text.lower().split()) for text, _ in parts if text)
+    vector = None
+    for text, weight in parts:
+        part = func.setweight(func.to_tsvector(_CONFIG, cast(text, Text)), literal_column(f"'{weight}'"))
+        vector = part if vector is None else vector.op("||")(part)
+    return vector
+
+
+def needs_reindex(state) -> bool:
+    """Whether an update touches any column of the row's search document"""
+    return any(
+        state.attrs[attr].history.has_changes()
+        for attr, _ in SEARCH_FIELDS[state.class_.__tablename__]
+    )
+
+
+# ---------------------------
+# Queries
+# ---------------------------
+def terms(q: str) -> List[str]:
+    """Lowercased words of a query, in order, without duplicates"""
+    return list(dict.fromkeys(w.lower() for w in _WORD.findall(q)))[:MAX_TERMS]
+
+
+async def search(
+    db: AsyncSession,
+    model,
+    q: str,
+    *where,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Tuple[List[Tuple[object, float, Dict[str, str]]], Optional[str]]:
+    """One page of (row, rank, highlights) matching `q`, best first, and the next cursor"""
+    if not terms(q):
+        return [], None
+    if db.bind.dialect.name == "postgresql":
+        hits = await _search_postgres(db, model, q, where, cursor, limit)
+    else:
+        hits = await _search_fallback(db, model, q, where, cursor, limit)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        row, rank, _ = hits[-1]
+        next_cursor = encode_cursor([rank, row.id])
+    return hits, next_cursor
+
+
+def _cursor_values(cursor: Optional[str], model) -> Optional[tuple]:
+    if not cursor:
+        return None
+    return tuple(decode_cursor(cursor, [literal_column("rank", Float), model.id]))
+
+
+async def _search_postgres(db, model, q, where, cursor, limit):
+    query = func.websearch_to_tsquery(_CONFIG, cast(q, Text))
+    rank = func.ts_rank_cd(model.search_vector, query, type_=Float)
+    fields = HIGHLIGHT_FIELDS[model.__tablename__]
+    headlines = [
+        func.ts_headline(_CONFIG, func.coalesce(getattr(model, f), ""), query, _HEADLINE_OPTIONS)
+        for f in fields
+    ]
+    stmt = (
+        select(model, rank, *headlines)
+        .where(model.search_vector.op("@@")(query), *where)
+        .order_by(rank.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    after = _cursor_values(cursor, model)
+    if after:
+        stmt = stmt.where(tuple_(rank, model.id) < after)
+    result = await db.execute(stmt)
+    return [
+        (row, score, {f: h for f, h in zip(fields, highlighted) if h})
+        for row, score, *highlighted in result.all()
+    ]
+
+
+async def _search_fallback(db, model, q, where, cursor, limit):
+    words = terms(q)
+    stmt = select(model).where(
+        *where, *[model.search_vector.contains(w, autoescape=True) for w in words]
+    )
+    rows = (await db.execute(stmt)).scalars().all()
+    pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\w*", re.IGNORECASE)
+
+    hits = []
+    for row in rows:
+        rank = _rank(document(row), pattern)
+        if rank > 0:
+            hits.append((row, rank))
+    hits.sort(key=lambda hit: (hit[1], hit[0].id), reverse=True)
+    after = _cursor_values(cursor, model)
+    if after:
+        hits = [(row, rank) for row, rank in hits if (rank, row.id) < after]
+
+    fields = HIGHLIGHT_FIELDS[model.__tablename__]
+    return [
+        (row, rank, _highlights(row, fields, pattern))
+        for row, rank in hits[:limit + 1]
+    ]
+
+
+def _rank(parts, pattern) -> float:
+    """Weighted match count, damped for long documents like ts_rank's length normalization"""
+    score = sum(WEIGHTS[weight] * len(pattern.findall(text)) for text, weight in parts)
+    length = sum(len(text.split()) for text, _ in parts)
+    return score / (1 + math.log(1 + length))
+
+
+def _highlights(row, fields, pattern, max_words: int = 30) -> Dict[str, str]:
+    highlights = {}
+    for f in fields:
+        text = getattr(row, f) or ""
+        match = pattern.search(text)
+        if not match:
+            continue
+        # roughly ts_headline: a window of words around the first match
+        words = text.split()
+        first = len(text[:match.start()].split())
+        start = max(0, first - max_words // 3)
+        snippet = " ".join(words[start:start + max_words])
+        highlights[f] = pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}", snippet)
+    return highlights
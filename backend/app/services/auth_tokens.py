@@ -0,0 +1,147 @@
+"""
+Access / refresh token pairs with rotation.
+
+A login starts a session (a refresh token family). It returns a short-lived
+access token (auth.ACCESS_TOKEN_EXPIRE_MINUTES) and an opaque refresh token
+(REFRESH_TOKEN_EXPIRE_DAYS), of which only the sha256 is stored.
+
+POST /auth/refresh trades a refresh token for a new pair in the same family,
+without bcrypt or a last_login update. Each refresh token works once: a used
+token presented again means a copy leaked, and the whole family is revoked.
+
+Access tokens carry the user id, roles, a token id (jti) and the session id
+(sid), so requests are authorized from the token alone. Logging out or an
+admin change to the user revokes the sessions through token_revocation.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import auth, metrics, models
+from app.config import get_settings
+from app.services import token_revocation
+
+REFRESH_TOKEN_EXPIRE_DAYS = get_settings().refresh_token_expire_days
+
+refreshed = metrics.counter("auth_refresh_total", "Refresh tokens exchanged for a new token pair")
+reused = metrics.counter("auth_refresh_reuse_total", "Used refresh tokens presented again (family revoked)")
+
+
+class InvalidRefreshToken(Exception):
+    """Unknown, expired, revoked or already used refresh token"""
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def roles_of(user: models.User) -> List[str]:
+    return ["user", "admin"] if user.is_admin else ["user"]
+
+
+def _access_lifetime() -> timedelta:
+    return timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def issue(db: AsyncSession, user: models.User, family_id: Optional[str] = None) -> dict:
+    """New access + refresh token pair for `user` (the refresh token row is added; the caller commits)"""
+    family_id = family_id or uuid.uuid4().hex
+    refresh_token = secrets.token_urlsafe(32)
+    db.add(models.RefreshToken(
+        token_hash=_hash(refresh_token),
+        user_id=user.id,
+        family_id=family_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    access_token = auth.create_access_token(
+        data={
+            "sub": str(user.id),
+            "uid": user.id,
+            "roles": roles_of(user),
+            "jti": uuid.uuid4().hex,
+            "sid": family_id,
+        },
+        expires_delta=_access_lifetime(),
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": int(_access_lifetime().total_seconds()),
+    }
+
+
+async def rotate(db: AsyncSession, refresh_token: str) -> dict:
+    """Exchange a refresh token for a new pair and commit; InvalidRefreshToken when it can't be used"""
+    now = datetime.utcnow()
+    row = await db.scalar(select(models.RefreshToken).where(models.RefreshToken.token_hash == _hash(refresh_token)))
+    if row is None or row.revoked_at is not None or row.expires_at <= now:
+        raise InvalidRefreshToken()
+
+    # claim the token atomically: of two concurrent uses only one gets the new pair
+    claimed = await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == row.id, models.RefreshToken.used_at.is_(None))
+        .values(used_at=now)
+    )
+    if claimed.rowcount != 1:
+        reused.inc()
+        await revoke_families(db, [row.family_id])
+        await db.commit()
+        raise InvalidRefreshToken()
+
+    user = await db.get(models.User, row.user_id)
+    if user is None or not user.is_active:
+        await db.rollback()
+        raise InvalidRefreshToken()
+    tokens = issue(db, user, row.family_id)
+    await db.commit()
+    refreshed.inc()
+    return tokens
+
+
+async def revoke_families(db: AsyncSession, family_ids: Iterable[str]) -> None:
+    """End sessions: their refresh tokens stop working and their access tokens are revoked (the caller commits)"""
+    family_ids = list(family_ids)
+    if not family_ids:
+        return
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id.in_(family_ids), models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    # access tokens of a session live at most one access lifetime after its last refresh
+    await token_revocation.revoke(db, family_ids, datetime.utcnow() + _access_lifetime())
+
+
+async def revoke_user(db: AsyncSession, user_id: int) -> None:
+    """End every session of a user, e.g. after deactivation or a role change (the caller commits)"""
+    now = datetime.utcnow()
+    families = await db.scalars(
+        select(models.RefreshToken.family_id).distinct().where(
+            models.RefreshToken.user_id == user_id,
+            or_(
+                models.RefreshToken.created_at > now - _access_lifetime(),  # access tokens may be live
+                models.RefreshToken.expires_at > now,
+            ),
+        )
+    )
+    await revoke_families(db, families.all())
+
+
+async def logout(db: AsyncSession, claims: dict, refresh_token: Optional[str] = None) -> None:
+    """Revoke the session of an access token (and of `refresh_token`, if given); the caller commits"""
+    families = {claims.get("sid")}
+    if refresh_token:
+        row = await db.scalar(
+            select(models.RefreshToken).where(models.RefreshToken.token_hash == _hash(refresh_token))
+        )
+        if row is not None and row.user_id == claims.get("uid"):
+            families.add(row.family_id)
+    families.discard(None)
+    await revoke_families(db, families)
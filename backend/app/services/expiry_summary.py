@@ -0,0 +1,162 @@
+"""
+Per-user "expiring soon" counts for the dashboard.
+
+The expiry_summaries table holds one row per user, so the dashboard reads it
+with a primary key lookup. Rows are rebuilt for everyone by a periodic refresh
+(in-app loop or refresh_expiry_summary.py from cron). Ingredient writes delete
+the user's row, and a missing or out-of-date row (computed for an earlier day)
+is rebuilt on read with one query over ix_ingredients_user_id_expiry.
+
+Rows are written with INSERT ... ON CONFLICT (user_id) DO UPDATE, so a refresh
+racing a rebuild on read (or two reads of the same missing row) never fails on
+the primary key. On PostgreSQL the in-app loop runs in one worker only: the one
+holding a session-level advisory lock on a dedicated connection. Behind
+PgBouncer in transaction mode that lock is not reliable; disable the loop there
+(EXPIRY_SUMMARY_REFRESH_SECONDS=0) and run refresh_expiry_summary.py from cron.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app import models
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_SUMMARY_REFRESH_SECONDS = get_settings().expiry_summary_refresh_seconds
+# pg_advisory_lock key shared by all workers of the app
+REFRESH_LOCK_KEY = 7_391_402_118
+
+_COLUMNS = ["user_id", "expired", "today", "within_3_days", "within_7_days", "as_of", "refreshed_at"]
+
+
+def _counts(today: date, user_id: Optional[int] = None):
+    expiry = models.Ingredient.expiry_date
+    stmt = (
+        select(
+            models.Ingredient.user_id,
+            func.count().filter(expiry < today),
+            func.count().filter(expiry == today),
+            func.count().filter(expiry.between(today, today + timedelta(days=3))),
+            func.count().filter(expiry.between(today, today + timedelta(days=7))),
+        )
+        .where(expiry.isnot(None), expiry <= today + timedelta(days=7))
+        .group_by(models.Ingredient.user_id)
+    )
+    if user_id is not None:
+        stmt = stmt.where(models.Ingredient.user_id == user_id)
+    return stmt
+
+
+def _upsert(stmt):
+    """`stmt` (an INSERT built by the dialect's insert()) turned into an upsert on user_id"""
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={c: getattr(stmt.excluded, c) for c in _COLUMNS if c != "user_id"},
+    )
+
+
+def _insert(db: AsyncSession):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(models.ExpirySummary)
+
+
+async def refresh_all(db: AsyncSession) -> int:
+    """Rebuild every user's summary in one transaction"""
+    today = date.today()
+    started = datetime.utcnow()
+    counts = _counts(today).add_columns(literal(today), literal(started))
+    result = await db.execute(_upsert(_insert(db).from_select(_COLUMNS, counts)))
+    # users with nothing expiring any more; their rows are rebuilt (as zeros) on read
+    await db.execute(delete(models.ExpirySummary).where(models.ExpirySummary.refreshed_at < started))
+    await db.commit()
+    return result.rowcount
+
+
+async def get_summary(db: AsyncSession, user_id: int) -> models.ExpirySummary:
+    """The user's summary, rebuilt first if it is missing or from an earlier day"""
+    today = date.today()
+    summary = await db.get(models.ExpirySummary, user_id)
+    if summary is not None and summary.as_of == today:
+        return summary
+
+    row = (await db.execute(_counts(today, user_id))).first()
+    expired, today_count, within_3, within_7 = row[1:] if row else (0, 0, 0, 0)
+    stmt = _upsert(_insert(db).values(
+        user_id=user_id,
+        expired=expired,
+        today=today_count,
+        within_3_days=within_3,
+        within_7_days=within_7,
+        as_of=today,
+        refreshed_at=datetime.utcnow(),
+    )).returning(models.ExpirySummary)
+    summary = await db.scalar(stmt, execution_options={"populate_existing": True})
+    await db.commit()
+    return summary
+
+
+async def invalidate(db: AsyncSession, user_id: int) -> None:
+    """Drop a user's summary (call in the same transaction as an ingredient write)"""
+    await db.execute(delete(models.ExpirySummary).where(models.ExpirySummary.user_id == user_id))
+
+
+class _RefreshLock:
+    """Session-level advisory lock kept on its own connection by the worker that refreshes.
+
+    The lock is released when that connection closes, so when the worker holding it
+    stops another one takes over on its next attempt. Other databases: always held.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.conn: Optional[AsyncConnection] = None
+
+    async def acquire(self) -> bool:
+        """Whether this worker holds the lock (taking it if it is free)"""
+        if self.engine.dialect.name != "postgresql":
+            return True
+        try:
+            if self.conn is not None:
+                await self.conn.execute(select(literal(1)))  # still connected, so still holding it
+                return True
+            # autocommit: the lock is held by the session, not by an open transaction
+            self.conn = await self.engine.execution_options(isolation_level="AUTOCOMMIT").connect()
+            if await self.conn.scalar(select(func.pg_try_advisory_lock(REFRESH_LOCK_KEY))):
+                return True
+        except Exception:
+            await self.release()
+            raise
+        await self.release()
+        return False
+
+    async def release(self) -> None:
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            # closed rather than returned to the pool, which would keep the lock with it
+            await conn.invalidate()
+            await conn.close()
+
+
+async def refresh_periodically(session_factory, interval: float = EXPIRY_SUMMARY_REFRESH_SECONDS) -> None:
+    """Background loop started with the app; on PostgreSQL only one worker refreshes"""
+    lock = None
+    try:
+        while True:
+            try:
+                async with session_factory() as db:
+                    lock = lock or _RefreshLock(db.bind)
+                    if await lock.acquire():
+                        count = await refresh_all(db)
+                        logger.info("refreshed %d expiry summaries", count)
+            except Exception as e:
+                logger.error("Error refreshing expiry summaries: %s", e)
+            await asyncio.sleep(interval)
+    finally:
+        if lock is not None:
+            await lock.release()
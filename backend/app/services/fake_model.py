@@ -0,0 +1,58 @@
+import json
+import time
+from types import SimpleNamespace
+from typing import List
+
+
+class FakeRecipeModel:
+    """Local stand-in for the Gemini model (same `generate_content(prompt)` interface).
+
+    Returns a deterministic recipe built from the ingredient lines of the prompt and
+    records every prompt it was called with, so cache hits can be checked by call count.
+    With `stream=True` the text is returned in `chunk_size` pieces, `delay` seconds apart.
+    Enable it with GEMINI_FAKE_MODEL=true or `gemini_service.set_model(FakeRecipeModel())`.
+    """
+
+    def __init__(self, delay: float = 0.0, chunk_size: int = 16):
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.prompts: List[str] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.prompts.append(prompt)
+        text = self._recipe_text(prompt)
+        if stream:
+            return self._stream(text)
+        if self.delay:
+            time.sleep(self.delay)
+        return SimpleNamespace(text=text)
+
+    def _stream(self, text: str):
+        for start in range(0, len(text), self.chunk_size):
+            if self.delay:
+                time.sleep(self.delay)
+            yield SimpleNamespace(text=text[start:start + self.chunk_size])
+
+    def _recipe_text(self, prompt: str) -> str:
+        names = [
+            line[2:].split(":")[0].strip()
+            for line in prompt.splitlines()
+            if line.startswith("- ")
+        ]
+        recipe = {
+            "name": "Fake " + " & ".join(names or ["Recipe"]),
+            "description": "Generated by the local fake model",
+            "ingredients": [{"name": n, "quantity": "1", "unit": "pcs"} for n in names],
+            "instructions": [f"Prepare the {n}" for n in names] + ["Serve"],
+            "prep_time": "10 minutes",
+            "cook_time": "15 minutes",
+            "servings": 2,
+            "calories": 250,
+            "difficulty": "Easy",
+            "tags": ["fake"],
+        }
+        return "```json\n" + json.dumps(recipe) + "\n```"
@@ -1,33 +1,72 @@
-import os
 import json
 import asyncio
-from typing import List, Dict, Optional
-from dotenv import load_dotenv
-import google.generativeai as genai
+import threading
+from typing import AsyncIterator, List, Dict, Optional
+from app import models
+from app.config import get_settings
+from .llm_client import LLMClient
+from .recipe_index import index_recipe
 import logging
 
-# بارگذاری متغیرهای محیطی از .env
-load_dotenv()
-
 # تنظیم logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# گرفتن کلید API از محیط
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in .env")
+# The model is created on first use: importing google.generativeai and
+# configuring it costs about a second, which workers shouldn't pay at startup.
+model = None
+_model_lock = threading.Lock()
 
-# تنظیم کلید برای Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+_settings = get_settings()
+llm = LLMClient(
+    name="gemini",
+    max_concurrency=_settings.gemini_max_concurrency,
+    timeout=_settings.gemini_timeout_seconds,
+    max_retries=_settings.gemini_max_retries,
+    failure_threshold=_settings.gemini_circuit_failures,
+    reset_timeout=_settings.gemini_circuit_reset_seconds,
+)
 
-# انتخاب مدل مناسب
-model = genai.GenerativeModel('gemini-2.5-pro')
 
-async def generate_recipe(ingredients: List[Dict], preferences: Optional[str] = None) -> Dict:
-    try:
-        ing_list = "\n".join([f"- {i['name']}: {i['quantity']} {i['unit']}" for i in ingredients])
-        prompt = f"""Create a recipe using ONLY these ingredients:
+def get_model():
+    """The configured model, created on the first call (GEMINI_FAKE_MODEL=true: local stub)"""
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                model = _create_model()
+    return model
+
+
+def _create_model():
+    settings = get_settings()
+    if settings.gemini_fake_model:
+        from .fake_model import FakeRecipeModel
+
+        return FakeRecipeModel()
+
+    # گرفتن کلید API از محیط
+    if not settings.gemini_api_key:
+        raise ValueError("GEMINI_API_KEY not found in .env")
+
+    import google.generativeai as genai
+
+    # تنظیم کلید برای Gemini
+    genai.configure(api_key=settings.gemini_api_key)
+    return genai.GenerativeModel(settings.gemini_model)
+
+
+def set_model(new_model) -> None:
+    """Swap the model used by generate_recipe (e.g. a FakeRecipeModel in tests)"""
+    global model
+    model = new_model
+
+
+def build_prompt(ingredients: List[Dict], preferences: Optional[str] = None) -> str:
+    ing_list = "\n".join(
+        [f"- {i['name']}: {i.get('quantity') or ''} {i.get('unit') or ''}".rstrip() for i in ingredients]
+    )
+    return f"""Create a recipe using ONLY these ingredients:
 {ing_list}
 
 {f'Preferences: {preferences}' if preferences else ''}
@@ -35,9 +74,17 @@ async def generate_recipe(ingredients: List[Dict], preferences: Optional[str] =
 Respond with ONLY valid JSON with fields:
 name, description, ingredients, instructions, prep_time, cook_time, servings, calories, difficulty, tags.
 """
-        # اجرای sync تابع generate_content در async با to_thread
-        response = await asyncio.to_thread(model.generate_content, prompt)
-        text = response.text.strip()
+
+
+def _generate_text(prompt: str) -> str:
+    return get_model().generate_content(prompt).text
+
+
+async def generate_recipe(ingredients: List[Dict], preferences: Optional[str] = None) -> Dict:
+    try:
+        prompt = build_prompt(ingredients, preferences)
+        # sync generate_content runs in the bounded pool; identical prompts share one call
+        text = (await llm.call(_generate_text, prompt, key=prompt)).strip()
         
         # اضافه کردن پرینت برای دیباگ
         print("Gemini output:", text)   # <--- اینجا داخل تابع باشه
@@ -54,3 +101,64 @@ name, description, ingredients, instructions, prep_time, cook_time, servings, ca
     except Exception as e:
         logger.error("❌ Error generating recipe: %s", e)
         return {"error": str(e)}
+
+
+def _parse_time(t) -> int:
+    try:
+        return int(str(t).split()[0])
+    except (ValueError, IndexError):
+        return 0
+
+
+def build_recipe(recipe_data: Dict, user_id: int) -> models.Recipe:
+    """Recipe row (with its ingredient index) from parsed model output"""
+    recipe = models.Recipe(
+        name=recipe_data.get("name", "Unknown Recipe"),
+        description=recipe_data.get("description", ""),
+        ingredients=recipe_data.get("ingredients", []),
+        instructions=recipe_data.get("instructions", []),
+        prep_time=_parse_time(recipe_data.get("prep_time", "0")),
+        cook_time=_parse_time(recipe_data.get("cook_time", "0")),
+        servings=recipe_data.get("servings", 1),
+        calories=recipe_data.get("calories", 0),
+        difficulty=recipe_data.get("difficulty", "Unknown"),
+        tags=recipe_data.get("tags", []),
+        user_id=user_id
+    )
+    index_recipe(recipe)
+    return recipe
+
+
+async def stream_recipe_text(ingredients: List[Dict], preferences: Optional[str] = None) -> AsyncIterator[str]:
+    """Yield the model's text as it is generated (Gemini streaming API)"""
+    prompt = build_prompt(ingredients, preferences)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        # the SDK's stream is a blocking iterator, so drain it in a worker thread
+        try:
+            for chunk in get_model().generate_content(prompt, stream=True):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    async with llm.slot() as slot:
+        producer = loop.run_in_executor(llm.executor, produce)
+        try:
+            while True:
+                # the deadline applies to the gap between chunks
+                item = await asyncio.wait_for(queue.get(), llm.timeout)
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except asyncio.TimeoutError:
+            llm.timeouts.inc()
+            raise
+        finally:
+            slot.pending = producer
@@ -0,0 +1,216 @@
+"""
+Catalog of canonical ingredients.
+
+Ingredient names ("Tomatoes", "2 medium tomatoes", "tomatoe") are reduced to a
+key with ingredient_parser.canonical_name and resolved to a canonical_ingredients
+row: the exact key first, then the closest catalog name by character trigram
+similarity, and otherwise a new catalog entry. Pantry items and recipe index
+rows store the resolved canonical_id when they are written (see the flush hook
+in app/models.py), so matching and aggregation compare integer ids.
+
+Each process keeps the catalog in an in-memory n-gram index, loaded on first use
+and extended incrementally (rows with a higher id) every CATALOG_REFRESH_SECONDS.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+
+from app import metrics, models
+from app.config import get_settings
+from app.database import get_catalog_engine
+from app.ingredient_parser import canonical_name, ngrams
+
+# Dice similarity of character trigrams needed for a fuzzy match ("tomatoe" -> "tomato")
+CATALOG_MATCH_THRESHOLD = get_settings().catalog_match_threshold
+CATALOG_REFRESH_SECONDS = get_settings().catalog_refresh_seconds
+NGRAM_SIZE = 3
+# keys shorter than this only match exactly ("egg" vs "eggo")
+MIN_FUZZY_LENGTH = 4
+
+# seeded by canonicalize_ingredients.py so common names get their usual spelling
+COMMON_INGREDIENTS = [
+    "apple", "avocado", "bacon", "baking powder", "baking soda", "banana", "basil", "bay leaf",
+    "bean", "beef", "bell pepper", "black pepper", "bread", "broccoli", "brown sugar", "butter",
+    "cabbage", "carrot", "cauliflower", "celery", "cheddar", "cheese", "chicken", "chicken breast",
+    "chickpea", "chili", "cinnamon", "cocoa powder", "coconut milk", "coriander", "corn", "cream",
+    "cucumber", "cumin", "egg", "eggplant", "feta", "flour", "garlic", "ginger", "honey", "lemon",
+    "lentil", "lettuce", "lime", "maple syrup", "milk", "mozzarella", "mushroom", "mustard",
+    "oats", "olive", "olive oil", "onion", "orange", "oregano", "paprika", "parmesan", "parsley",
+    "pasta", "pea", "peanut butter", "pepper", "pork", "potato", "rice", "salmon", "salt",
+    "shrimp", "soy sauce", "spinach", "sugar", "sweet potato", "thyme", "tofu", "tomato",
+    "tomato paste", "tuna", "vanilla", "vegetable oil", "vinegar", "water", "yogurt", "zucchini",
+]
+
+exact_hits = metrics.counter("ingredient_catalog_exact_hits_total", "Names resolved to a catalog entry by key")
+fuzzy_hits = metrics.counter("ingredient_catalog_fuzzy_hits_total", "Names resolved to the closest catalog entry")
+created = metrics.counter("ingredient_catalog_created_total", "Catalog entries created for unknown names")
+
+
+class NGramIndex:
+    """In-memory inverted index of catalog names by character n-gram"""
+
+    def __init__(self, n: int = NGRAM_SIZE):
+        self.n = n
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._sizes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, id_: int, name: str) -> None:
+        if name in self.ids:
+            return
+        grams = ngrams(name, self.n)
+        self.ids[name] = id_
+        self.names[id_] = name
+        self._sizes[id_] = len(grams)
+        for gram in grams:
+            self._postings[gram].add(id_)
+
+    def get(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def closest(self, name: str, threshold: float) -> Optional[Tuple[int, float]]:
+        """(id, similarity) of the most similar name scoring at least `threshold`"""
+        grams = ngrams(name, self.n)
+        # names whose gram count makes the threshold unreachable are skipped
+        low, high = len(grams) * threshold / (2 - threshold), len(grams) * (2 - threshold) / threshold
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        best = None
+        for id_, count in shared.items():
+            size = self._sizes[id_]
+            if not low <= size <= high:
+                continue
+            score = 2 * count / (len(grams) + size)
+            if score >= threshold and (best is None or (score, -id_) > (best[1], -best[0])):
+                best = (id_, score)
+        return best
+
+
+_index = NGramIndex()
+_loaded_up_to = 0
+_refreshed_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def reset() -> None:
+    """Forget the in-memory catalog (e.g. after pointing the app at another database)"""
+    global _index, _loaded_up_to, _refreshed_at
+    with _lock:
+        _index, _loaded_up_to, _refreshed_at = NGramIndex(), 0, None
+
+
+def _refresh(connection: Connection, force: bool = False) -> None:
+    """Load catalog rows added since the last refresh"""
+    global _loaded_up_to, _refreshed_at
+    now = time.monotonic()
+    if not force and _refreshed_at is not None and now - _refreshed_at < CATALOG_REFRESH_SECONDS:
+        return
+    table = models.CanonicalIngredient.__table__
+    rows = connection.execute(
+        select(table.c.id, table.c.name).where(table.c.id > _loaded_up_to).order_by(table.c.id)
+    ).all()
+    with _lock:
+        for id_, name in rows:
+            _index.add(id_, name)
+            _loaded_up_to = max(_loaded_up_to, id_)
+        _refreshed_at = now
+
+
+def _lookup(key: str) -> Optional[int]:
+    id_ = _index.get(key)
+    if id_ is not None:
+        exact_hits.inc()
+        return id_
+    if len(key) >= MIN_FUZZY_LENGTH:
+        match = _index.closest(key, CATALOG_MATCH_THRESHOLD)
+        if match:
+            fuzzy_hits.inc()
+            return match[0]
+    return None
+
+
+def _insert_missing(connection: Connection, keys: Set[str]) -> None:
+    table = models.CanonicalIngredient.__table__
+    if connection.dialect.name != "postgresql":
+        # SQLite allows a single writer, so stay on the caller's connection
+        stmt = sqlite.insert(table).values([{"name": key} for key in sorted(keys)])
+        result = connection.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+        created.inc(max(result.rowcount, 0))
+        return
+    # committed on a connection of its own: ids already in the in-memory index
+    # must not disappear when the caller's transaction rolls back
+    stmt = postgresql.insert(table).values([{"name": key} for key in sorted(keys)])
+    stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
+    if connection.dialect.is_async:
+        # not from the request pool: every pooled connection could be held by a
+        # flush waiting here for a second one
+        rowcount = await_only(_insert_on_catalog_engine(stmt))
+    else:
+        # scripts on the sync engine
+        with connection.engine.begin() as own:
+            rowcount = own.execute(stmt).rowcount
+    created.inc(max(rowcount, 0))
+
+
+async def _insert_on_catalog_engine(stmt) -> int:
+    async with get_catalog_engine().begin() as own:
+        return (await own.execute(stmt)).rowcount
+
+
+def resolve_ids(connection: Connection, names: Iterable[str], create: bool = True) -> Dict[str, Optional[int]]:
+    """name -> canonical ingredient id; unknown names get a new catalog entry unless `create` is False"""
+    keys = {name: canonical_name(name) for name in names}
+    if not keys:
+        return {}
+    _refresh(connection)
+    resolved: Dict[str, int] = {}
+    missing: Set[str] = set()
+    for key in set(keys.values()):
+        if not key:
+            continue
+        id_ = _lookup(key)
+        if id_ is None:
+            missing.add(key)
+        else:
+            resolved[key] = id_
+
+    if missing:
+        # other workers may have added them since the last refresh
+        if create:
+            _insert_missing(connection, missing)
+        _refresh(connection, force=True)
+        for key in missing:
+            id_ = _index.get(key)
+            if id_ is not None:
+                resolved[key] = id_
+    return {name: resolved.get(key) for name, key in keys.items()}
+
+
+def names_of(ids: Iterable[int]) -> Dict[int, str]:
+    """Catalog names of ids returned by resolve_ids"""
+    return {id_: _index.names[id_] for id_ in ids if id_ in _index.names}
+
+
+async def resolve(db: AsyncSession, names: Iterable[str], create: bool = True) -> Dict[str, Optional[int]]:
+    """Async version of resolve_ids on the session's connection"""
+    names = list(names)
+    return await db.run_sync(lambda session: resolve_ids(session.connection(), names, create))
+
+
+def seed(connection: Connection, names: Iterable[str] = COMMON_INGREDIENTS) -> None:
+    """Add catalog entries for `names` (keys as canonical_name would produce them)"""
+    keys = {canonical_name(name) for name in names} - {""}
+    if keys:
+        _insert_missing(connection, keys)
@@ -0,0 +1,172 @@
+"""
+Bulk ingredient import and export.
+
+Imports are read from the request body as a stream of CSV (with a header row) or
+NDJSON records, one per line. Rows are validated with IngredientCreate and
+written in batches with a single INSERT ... ON CONFLICT (user_id, name) DO UPDATE
+per batch, committed batch by batch so a bad row never rolls back the rest.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas, units
+from app.services import expiry_summary, ingredient_catalog
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = ["name", "category", "location", "quantity", "unit", "expiry_date"]
+
+_UPSERT_COLUMNS = [
+    "category", "location", "quantity", "unit", "expiry_date",
+    "canonical_quantity", "canonical_unit", "canonical_id",
+]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without reading it all into memory"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """(line number, dict or parse error message) for every non-empty record"""
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, f"Invalid JSON: {e}"
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            continue
+        if len(values) > len(header):
+            yield line_no, f"Expected at most {len(header)} columns, got {len(values)}"
+            continue
+        # empty CSV cells mean "not given"
+        yield line_no, {k: v for k, v in zip(header, values) if v.strip() != ""}
+
+
+def _validate(record) -> Tuple[Dict, List[str]]:
+    if isinstance(record, str):
+        return None, [record]
+    if not isinstance(record, dict):
+        return None, ["Expected an object"]
+    try:
+        data = schemas.IngredientCreate.model_validate(record).model_dump()
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+    data["name"] = data["name"].strip()
+    if not data["name"]:
+        return None, ["name: must not be empty"]
+    data["category"] = data.get("category") or "Unknown"
+    return data, []
+
+
+async def _upsert(db: AsyncSession, user_id: int, rows: Dict[str, Dict]) -> Dict[str, Tuple[int, bool]]:
+    """Upsert one batch (keyed by name); returns name -> (id, created)"""
+    existing = set(
+        (await db.execute(
+            select(models.Ingredient.name)
+            .where(models.Ingredient.user_id == user_id, models.Ingredient.name.in_(list(rows)))
+        )).scalars()
+    )
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    values, canonical_units = units.to_canonical_many(
+        [row["quantity"] for row in rows.values()],
+        [row["unit"] for row in rows.values()],
+        list(rows),
+    )
+    # Core inserts skip the flush hook that fills canonical_id on ORM writes
+    canonical_ids = await ingredient_catalog.resolve(db, list(rows))
+    stmt = dialect.insert(models.Ingredient).values([
+        {
+            **row, "user_id": user_id, "canonical_quantity": value, "canonical_unit": unit,
+            "canonical_id": canonical_ids[name],
+        }
+        for (name, row), value, unit in zip(rows.items(), values, canonical_units)
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "name"],
+        set_={
+            **{c: getattr(stmt.excluded, c) for c in _UPSERT_COLUMNS},
+            # a row without a category keeps the one already stored
+            "category": func.coalesce(func.nullif(stmt.excluded.category, "Unknown"), models.Ingredient.category),
+            "updated_at": datetime.utcnow(),
+        },
+    ).returning(models.Ingredient.id, models.Ingredient.name)
+    result = await db.execute(stmt)
+    ids = {name: (id_, name not in existing) for id_, name in result.all()}
+    await expiry_summary.invalidate(db, user_id)
+    await db.commit()
+    return ids
+
+
+async def import_ingredients(
+    db: AsyncSession, user_id: int, chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[Dict]:
+    """Import records from a byte stream, yielding one result dict per record"""
+    batch: List[Tuple[int, Dict]] = []
+
+    async def flush():
+        # the last row for a name wins; ON CONFLICT can't touch a row twice per statement
+        rows = {data["name"]: data for _, data in batch}
+        ids = await _upsert(db, user_id, rows)
+        results = [
+            {"line": line, "status": "created" if ids[data["name"]][1] else "updated",
+             "id": ids[data["name"]][0], "name": data["name"]}
+            for line, data in batch
+        ]
+        batch.clear()
+        return results
+
+    async for line, record in iter_records(iter_lines(chunks), fmt):
+        data, errors = _validate(record)
+        if errors:
+            yield {"line": line, "status": "error", "errors": errors}
+            continue
+        batch.append((line, data))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            for result in await flush():
+                yield result
+    if batch:
+        for result in await flush():
+            yield result
+
+
+def export_row(ingredient: models.Ingredient, fmt: str) -> str:
+    values = {f: getattr(ingredient, f) for f in EXPORT_FIELDS}
+    if values["expiry_date"] is not None:
+        values["expiry_date"] = values["expiry_date"].isoformat()
+    if fmt == "ndjson":
+        return json.dumps(values) + "\n"
+    return csv_line([values[f] for f in EXPORT_FIELDS])
+
+
+def csv_line(values: list) -> str:
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(["" if v is None else v for v in values])
+    return out.getvalue()
@@ -0,0 +1,116 @@
+"""
+Incremental parser for the JSON object streamed back by the model.
+
+Text is fed chunk by chunk; as soon as a top-level field is complete it is
+reported, and for top-level arrays (ingredients, instructions, tags) every
+element is reported on its own as soon as it closes. Anything before the first
+`{` (e.g. a ```json fence) and after the closing `}` is ignored.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._started = False
+        self.done = False
+
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._value_is_array = False
+        self._item_start: Optional[int] = None
+        self._items: List[Any] = []
+
+        self.result: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Consume a chunk of text and return the events it completed.
+
+        Events are `{"type": "field", "key", "value"}` for top-level values and
+        `{"type": "item", "key", "index", "value"}` for elements of top-level arrays.
+        Raises ValueError on malformed JSON.
+        """
+        self._buf += chunk
+        events: List[dict] = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._stack.append("{")
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._key_start = None
+                i += 1
+                continue
+
+            depth = len(self._stack)
+            in_top_array = depth == 2 and self._value_is_array
+
+            # start of a top-level key, top-level value or top-level array element
+            if depth == 1 and c not in _WHITESPACE + ",:}":
+                if self._key is None:
+                    if c != '"':
+                        raise ValueError(f"Expected a key at position {i}")
+                    self._key_start = i
+                elif self._value_start is None:
+                    self._value_start = i
+                    self._value_is_array = c == "["
+                    self._items = []
+            elif in_top_array and self._item_start is None and c not in _WHITESPACE + ",]":
+                self._item_start = i
+
+            if c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._stack.append(c)
+            elif in_top_array and c in ",]" and self._item_start is not None:
+                value = json.loads(buf[self._item_start:i])
+                events.append({"type": "item", "key": self._key, "index": len(self._items), "value": value})
+                self._items.append(value)
+                self._item_start = None
+                if c == "]":
+                    continue  # re-read the bracket to close the array
+            elif c in "}]":
+                self._stack.pop()
+                if len(self._stack) == 1 and self._value_is_array:
+                    self._finish(self._items, events, emit=False)
+                elif not self._stack:
+                    if self._value_start is not None:
+                        self._finish(json.loads(buf[self._value_start:i]), events)
+                    self.done = True
+            elif c == "," and depth == 1 and self._value_start is not None:
+                self._finish(json.loads(buf[self._value_start:i]), events)
+            i += 1
+
+        self._pos = i
+        return events
+
+    def _finish(self, value: Any, events: List[dict], emit: bool = True) -> None:
+        if emit:
+            events.append({"type": "field", "key": self._key, "value": value})
+        self.result[self._key] = value
+        self._key = None
+        self._value_start = None
+        self._value_is_array = False
+        self._items = []
@@ -0,0 +1,221 @@
+"""
+Call layer for blocking LLM SDK calls (Gemini).
+
+- a bounded thread pool plus a semaphore caps concurrent model calls; callers
+  beyond the limit wait in line (llm_queue_depth)
+- every attempt has a deadline (asyncio.wait_for); the slot is only given back
+  once the underlying thread has really finished
+- identical in-flight calls (same key, e.g. the prompt) share one model call
+- failures are retried with full-jitter exponential backoff
+- a circuit breaker fails fast after repeated failures and lets one trial
+  call through after `reset_timeout`
+"""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, on_change=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._on_change = on_change
+
+    def _set_state(self, state: int) -> None:
+        if state != self.state:
+            logger.warning("LLM circuit breaker %s -> %s", self.state, state)
+        self.state = state
+        if self._on_change:
+            self._on_change(state)
+
+    def before_call(self) -> None:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("LLM circuit breaker is open, try again later")
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trial_running:
+                raise CircuitOpenError("LLM circuit breaker is half-open, trial call in progress")
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_running = False
+        self._set_state(CLOSED)
+
+    def record_cancelled(self) -> None:
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+
+class _Slot:
+    # set to the executor future of a call that outlived its deadline
+    pending: Optional[asyncio.Future] = None
+
+
+class LLMClient:
+    def __init__(
+        self,
+        name: str = "llm",
+        max_concurrency: int = 4,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Any, asyncio.Future] = {}
+
+        self.queue_depth = metrics.gauge(f"{name}_queue_depth", "Calls waiting for a free slot")
+        self.in_flight = metrics.gauge(f"{name}_in_flight", "Model calls currently running")
+        self.latency = metrics.histogram(f"{name}_call_seconds", "Model call latency", buckets=LATENCY_BUCKETS)
+        self.calls = metrics.counter(f"{name}_calls_total", "Model calls attempted")
+        self.errors = metrics.counter(f"{name}_errors_total", "Model calls that failed")
+        self.timeouts = metrics.counter(f"{name}_timeouts_total", "Model calls that hit the deadline")
+        self.retries = metrics.counter(f"{name}_retries_total", "Model call retries")
+        self.coalesced = metrics.counter(f"{name}_coalesced_total", "Calls served by an identical in-flight call")
+        self.rejected = metrics.counter(f"{name}_circuit_rejected_total", "Calls rejected by the open circuit")
+        circuit_state = metrics.gauge(f"{name}_circuit_state", "0 closed, 1 open, 2 half-open")
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, on_change=circuit_state.set)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
+
+    def _release(self, *_) -> None:
+        self.in_flight.dec()
+        self.semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot (with circuit breaker bookkeeping) around a model call.
+
+        If the yielded slot's `pending` is set to a still-running executor future,
+        the slot is released when that future finishes instead of on exit.
+        """
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.rejected.inc()
+            raise
+        self.queue_depth.inc()
+        try:
+            await self.semaphore.acquire()
+        except BaseException:
+            self.breaker.record_cancelled()
+            raise
+        finally:
+            self.queue_depth.dec()
+        self.in_flight.inc()
+        self.calls.inc()
+        started = time.perf_counter()
+        slot = _Slot()
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        except BaseException:
+            self.errors.inc()
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+            if slot.pending is not None and not slot.pending.done():
+                slot.pending.add_done_callback(self._release)
+            else:
+                self._release()
+
+    async def _attempt(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        async with self.slot() as slot:
+            future = loop.run_in_executor(self.executor, fn, *args)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts.inc()
+                # the thread can't be cancelled; keep the slot until it really finishes
+                slot.pending = future
+                raise
+
+    async def _call_with_retries(self, fn: Callable, *args) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(fn, *args)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                self.retries.inc()
+                logger.warning("LLM call failed (%s), retry %d in %.2fs", str(e) or type(e).__name__, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def call(self, fn: Callable, *args, key: Any = None) -> Any:
+        """Run the blocking `fn(*args)` in the pool; calls with the same `key` are coalesced"""
+        if key is None:
+            return await self._call_with_retries(fn, *args)
+
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.coalesced.inc()
+            return await asyncio.shield(existing)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_with_retries(fn, *args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
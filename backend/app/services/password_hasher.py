@@ -0,0 +1,174 @@
+"""
+Password hashing on a dedicated, bounded thread pool.
+
+bcrypt is slow on purpose. Run on Starlette's shared threadpool (40 threads,
+also used by every sync endpoint), a burst of logins queued ahead of unrelated
+requests. Here:
+
+- hashes run on their own PASSWORD_HASH_WORKERS threads (bcrypt releases the
+  GIL, so they hash in parallel without blocking the event loop)
+- at most PASSWORD_HASH_QUEUE_SIZE calls wait for a thread; beyond that
+  PasswordHasherBusy is raised and the endpoint answers 503
+- the bcrypt cost is BCRYPT_ROUNDS (passlib's default, 12, when unset). Pick it
+  once per machine type with calibrate_bcrypt.py, which runs calibrate_rounds,
+  and pin it on every worker; nothing is measured at startup
+- verify_and_update returns a new hash when the stored one uses a lower cost,
+  so existing users are upgraded as they log in
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app import metrics
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+PASSWORD_HASH_WORKERS = _settings.password_hash_workers
+PASSWORD_HASH_QUEUE_SIZE = _settings.password_hash_queue_size
+BCRYPT_ROUNDS = _settings.bcrypt_rounds
+# calibration never goes below passlib's default, which existing hashes use
+MIN_ROUNDS, MAX_ROUNDS = 12, 16
+
+# bcrypt truncates at 72 bytes; longer passwords are cut consistently on hash and verify
+MAX_PASSWORD_BYTES = 72
+
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+in_flight = metrics.gauge("password_hash_in_flight", "Password hash/verify calls running or queued")
+rejected = metrics.counter("password_hash_rejected_total", "Password hash/verify calls rejected because the queue was full")
+rehashed = metrics.counter("password_rehash_total", "Stored password hashes upgraded to the current cost on login")
+hash_seconds = metrics.histogram("password_hash_seconds", "Time spent hashing or verifying one password", buckets=HASH_BUCKETS)
+wait_seconds = metrics.histogram("password_hash_wait_seconds", "Time a call waited for a hashing thread", buckets=HASH_BUCKETS)
+rounds_gauge = metrics.gauge("password_hash_bcrypt_rounds", "bcrypt cost used for new hashes")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes queued; the caller should retry later"""
+
+
+# ---------------------------
+# bcrypt cost
+# ---------------------------
+def calibrate_rounds(target_seconds: float) -> int:
+    """Highest bcrypt cost (MIN_ROUNDS..MAX_ROUNDS) that hashes within `target_seconds` here
+    (slow: run offline, see calibrate_bcrypt.py)"""
+    handler = pwd_context.handler("bcrypt")
+    rounds = MIN_ROUNDS
+    for candidate in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        start = time.perf_counter()
+        handler.using(rounds=candidate).hash("calibration password")
+        elapsed = time.perf_counter() - start
+        if elapsed > target_seconds and candidate > MIN_ROUNDS:
+            break
+        rounds = candidate
+        if elapsed * 2 > target_seconds:
+            break  # each extra round doubles the time
+    return rounds
+
+
+def configure(rounds: int = BCRYPT_ROUNDS) -> int:
+    """Set the bcrypt cost for new hashes; stored hashes below it are upgraded on login"""
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    rounds_gauge.set(rounds)
+    return rounds
+
+
+configure()
+
+
+def _secret(password: str) -> bytes:
+    return password.encode("utf-8")[:MAX_PASSWORD_BYTES]
+
+
+def hash_sync(password: str) -> str:
+    return pwd_context.hash(_secret(password))
+
+
+def verify_sync(password: str, hashed: str) -> bool:
+    return pwd_context.verify(_secret(password), hashed)
+
+
+def verify_and_update_sync(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(_secret(password), hashed)
+
+
+# ---------------------------
+# Pool
+# ---------------------------
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_size: int = PASSWORD_HASH_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+        in_flight.dec()
+
+    async def run(self, fn: Callable, *args):
+        """Run `fn(*args)` on a hashing thread; PasswordHasherBusy when the queue is full"""
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                rejected.inc()
+                raise PasswordHasherBusy()
+            self._pending += 1
+        in_flight.inc()
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            wait_seconds.observe(started - queued_at)
+            try:
+                return fn(*args)
+            finally:
+                hash_seconds.observe(time.perf_counter() - started)
+
+        future = self._executor.submit(timed)
+        # the slot is freed when the thread is done, even if the request was cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+
+hasher = PasswordHasher()
+
+
+async def hash_password(password: str) -> str:
+    return await hasher.run(hash_sync, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await hasher.run(verify_sync, password, hashed)
+
+
+async def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash or None); a new hash is returned when the stored one uses a lower cost"""
+    valid, new_hash = await hasher.run(verify_and_update_sync, password, hashed)
+    if new_hash:
+        rehashed.inc()
+    return valid, new_hash
+
+
+def _hold_thread(started: threading.Barrier) -> None:
+    try:
+        started.wait(timeout=5)  # keeps this thread busy, so the next call starts a new one
+    except threading.BrokenBarrierError:
+        pass
+
+
+async def warm_up() -> None:
+    """Start every hashing thread now rather than on the first logins"""
+    started = threading.Barrier(hasher.workers)
+    await asyncio.gather(*(hasher.run(_hold_thread, started) for _ in range(hasher.workers)))
+    logger.info("Password hashing: %d threads, bcrypt cost %d", hasher.workers, pwd_context.handler("bcrypt").default_rounds)
@@ -0,0 +1,124 @@
+"""
+Content-addressed cache for Gemini recipe generation.
+
+The key is a sha256 over the sorted, normalized (name, quantity, unit) triples and
+the normalized preferences, so the same request in a different order or casing
+hits the same entry. Entries live in a bounded in-process LRU and, unless
+RECIPE_CACHE_PERSIST=false, in the generated_recipe_cache table so they survive
+restarts and are shared between workers.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics, models
+from app.cache import TTLCache
+from app.config import get_settings
+from app.services import gemini_service
+from app.services.recipe_index import normalize_name
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+RECIPE_CACHE_SIZE = _settings.recipe_cache_size
+RECIPE_CACHE_TTL_SECONDS = _settings.recipe_cache_ttl_seconds
+RECIPE_CACHE_PERSIST = _settings.recipe_cache_persist
+
+_memory = TTLCache(maxsize=RECIPE_CACHE_SIZE, ttl=RECIPE_CACHE_TTL_SECONDS)
+
+memory_hits = metrics.counter("recipe_cache_memory_hits_total", "Generated recipes served from memory")
+db_hits = metrics.counter("recipe_cache_db_hits_total", "Generated recipes served from the cache table")
+misses = metrics.counter("recipe_cache_misses_total", "Generated recipes requested from the model")
+
+
+def _normalize_value(value) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).split()).lower()
+
+
+def _normalize_quantity(value) -> str:
+    """Quantities compare as numbers when they are numbers: 3, 3.0 and "3" are the same"""
+    text = _normalize_value(value)
+    try:
+        return f"{float(text):g}"
+    except ValueError:
+        return text
+
+
+def cache_key(ingredients: List[Dict], preferences: Optional[str] = None) -> str:
+    """Hash of the normalized ingredient set and preferences"""
+    items = sorted(
+        (
+            normalize_name(i.get("name", "")),
+            _normalize_quantity(i.get("quantity")),
+            _normalize_value(i.get("unit")),
+        )
+        for i in ingredients
+    )
+    payload = json.dumps({"ingredients": items, "preferences": _normalize_value(preferences)})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_valid_recipe(recipe: Dict) -> bool:
+    return "error" not in recipe and bool(recipe.get("ingredients")) and bool(recipe.get("instructions"))
+
+
+async def lookup(db: AsyncSession, key: str) -> Optional[Dict]:
+    """Cached recipe for a key from memory or the cache table, or None"""
+    recipe = _memory.get(key)
+    if recipe is not None:
+        memory_hits.inc()
+        return recipe
+
+    if RECIPE_CACHE_PERSIST:
+        row = await db.get(models.GeneratedRecipeCache, key)
+        if row is not None:
+            if row.created_at >= datetime.utcnow() - timedelta(seconds=RECIPE_CACHE_TTL_SECONDS):
+                db_hits.inc()
+                _memory.set(key, row.recipe)
+                return row.recipe
+            await db.delete(row)
+            await db.flush()
+    return None
+
+
+async def store(db: AsyncSession, key: str, recipe: Dict) -> None:
+    """Cache a valid recipe (the table row is committed with the caller's transaction)"""
+    if not is_valid_recipe(recipe):
+        # errors and unusable output are never cached
+        return
+    _memory.set(key, recipe)
+    if RECIPE_CACHE_PERSIST:
+        try:
+            async with db.begin_nested():
+                db.add(models.GeneratedRecipeCache(key=key, recipe=recipe))
+        except IntegrityError:
+            # another worker cached the same request first
+            logger.info("recipe cache entry %s already stored", key[:12])
+
+
+async def get_or_generate(
+    db: AsyncSession,
+    ingredients: List[Dict],
+    preferences: Optional[str] = None,
+) -> Dict:
+    """Return a cached recipe for this request or generate (and cache) a new one"""
+    key = cache_key(ingredients, preferences)
+    recipe = await lookup(db, key)
+    if recipe is not None:
+        return recipe
+
+    misses.inc()
+    recipe = await gemini_service.generate_recipe(ingredients, preferences)
+    await store(db, key, recipe)
+    return recipe
+
+
+def clear_memory() -> None:
+    _memory.clear()
@@ -0,0 +1,186 @@
+import json
+from datetime import date
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import Float, case, cast, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.ingredient_parser import canonical_name, parse_ingredient_line
+from app.services import ingredient_catalog
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an ingredient name for index lookups"""
+    return " ".join(str(name).split()).lower()
+
+
+def extract_ingredient_names(raw) -> Set[str]:
+    """Get the set of canonical ingredient names from a recipe's stored ingredients"""
+    data = raw
+    # ingredients may be stored as JSON text (sometimes encoded twice)
+    while isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except (TypeError, ValueError):
+            break
+    if isinstance(data, str) or not isinstance(data, list):
+        return set()
+
+    names = set()
+    for item in data:
+        if isinstance(item, dict):
+            name = canonical_name(item.get("name"))
+        else:
+            # free-text lines like "2 medium tomatoes"
+            name = parse_ingredient_line(str(item)).name if item else ""
+        if name:
+            names.add(name)
+    return names
+
+
+def index_recipe(recipe: models.Recipe) -> None:
+    """Rebuild the ingredient index rows of a recipe (flushed together with the recipe;
+    canonical ids are filled in by the flush hook in app/models.py)"""
+    recipe.ingredient_index = [
+        models.RecipeIngredient(name=name)
+        for name in sorted(extract_ingredient_names(recipe.ingredients))
+    ]
+
+
+async def match_recipe_ids(db: AsyncSession, ingredients: Iterable[str]) -> List[int]:
+    """Ids of recipes that contain all given ingredients (HAVING COUNT over the index)"""
+    names = {i for i in ingredients if i and canonical_name(i)}
+    if not names:
+        return []
+    ids = await ingredient_catalog.resolve(db, names, create=False)
+    if None in ids.values():
+        return []  # an ingredient no recipe has ever used
+    wanted = set(ids.values())
+    ri = models.RecipeIngredient
+    result = await db.execute(
+        select(ri.recipe_id)
+        .where(ri.canonical_id.in_(wanted))
+        .group_by(ri.recipe_id)
+        .having(func.count(func.distinct(ri.canonical_id)) == len(wanted))
+    )
+    return list(result.scalars())
+
+
+def rebuild_index(db: Session, batch_size: int = 1000) -> int:
+    """Re-index every recipe; used by reindex_recipes.py to backfill existing rows"""
+    count = 0
+    last_id = 0
+    while True:
+        recipes = (
+            db.query(models.Recipe)
+            .filter(models.Recipe.id > last_id)
+            .order_by(models.Recipe.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not recipes:
+            break
+        for recipe in recipes:
+            index_recipe(recipe)
+        db.commit()
+        count += len(recipes)
+        last_id = recipes[-1].id
+    return count
+
+
+async def rank_pantry_matches(db: AsyncSession, user_id: int, limit: int = 10) -> List[dict]:
+    """Top recipes of a user for their pantry, ranked by ingredient coverage.
+
+    Matched counts, recipe sizes and the soonest expiry used are aggregated over
+    the index, and the ranking (highest coverage, fewest missing, soonest expiring
+    pantry item used) and the limit are applied in SQL.
+    """
+    pantry = (
+        await db.execute(
+            select(models.Ingredient.canonical_id, models.Ingredient.expiry_date)
+            .where(models.Ingredient.user_id == user_id, models.Ingredient.canonical_id.isnot(None))
+        )
+    ).all()
+    expiry_by_id: Dict[int, date] = {}
+    for canonical_id, expiry_date in pantry:
+        current = expiry_by_id.get(canonical_id)
+        if canonical_id not in expiry_by_id or (expiry_date and (current is None or expiry_date < current)):
+            expiry_by_id[canonical_id] = expiry_date
+    if not expiry_by_id:
+        return []
+
+    ids_by_expiry: Dict[date, List[int]] = {}
+    for canonical_id, expiry_date in expiry_by_id.items():
+        if expiry_date:
+            ids_by_expiry.setdefault(expiry_date, []).append(canonical_id)
+    if ids_by_expiry:
+        expiry_of_name = case(
+            *[
+                (models.RecipeIngredient.canonical_id.in_(ids), expiry_date)
+                for expiry_date, ids in sorted(ids_by_expiry.items())
+            ],
+            else_=None,
+        )
+    else:
+        expiry_of_name = literal(None)
+
+    ri = models.RecipeIngredient
+    # names that resolve to the same catalog entry count once, as in match_recipe_ids
+    matched = (
+        select(
+            ri.recipe_id.label("recipe_id"),
+            func.count(func.distinct(ri.canonical_id)).label("matched"),
+            func.min(expiry_of_name).label("soonest_expiry"),
+        )
+        .join(models.Recipe, models.Recipe.id == ri.recipe_id)
+        .where(models.Recipe.user_id == user_id, ri.canonical_id.in_(list(expiry_by_id)))
+        .group_by(ri.recipe_id)
+        .subquery()
+    )
+    totals = (
+        select(
+            ri.recipe_id.label("recipe_id"),
+            (
+                func.count(func.distinct(ri.canonical_id))
+                + func.count().filter(ri.canonical_id.is_(None))  # names not in the catalog
+            ).label("total"),
+        )
+        .where(ri.recipe_id.in_(select(matched.c.recipe_id)))
+        .group_by(ri.recipe_id)
+        .subquery()
+    )
+    coverage = cast(matched.c.matched, Float) / totals.c.total
+    rows = (
+        await db.execute(
+            select(matched.c.recipe_id, matched.c.matched, totals.c.total, matched.c.soonest_expiry)
+            .join(totals, totals.c.recipe_id == matched.c.recipe_id)
+            .order_by(
+                coverage.desc(),
+                (totals.c.total - matched.c.matched).asc(),
+                matched.c.soonest_expiry.is_(None),  # recipes using a dated item first
+                matched.c.soonest_expiry.asc(),
+                matched.c.recipe_id,
+            )
+            .limit(limit)
+        )
+    ).all()
+    if not rows:
+        return []
+
+    result = await db.execute(
+        select(models.Recipe).where(models.Recipe.id.in_([row.recipe_id for row in rows]))
+    )
+    recipes = {r.id: r for r in result.scalars()}
+    return [
+        {
+            "recipe": recipes[row.recipe_id],
+            "coverage": row.matched / row.total,
+            "matched_count": row.matched,
+            "missing_count": row.total - row.matched,
+            "soonest_expiry": row.soonest_expiry,
+        }
+        for row in rows
+        if row.recipe_id in recipes
+    ]
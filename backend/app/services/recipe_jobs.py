@@ -0,0 +1,188 @@
+"""
+Batch recipe generation.
+
+Jobs are stored as one RecipeJob row plus one RecipeJobItem per ingredient set.
+Workers (recipe_worker.py) claim pending items with SELECT ... FOR UPDATE SKIP
+LOCKED, so several workers can share the queue without handing out the same
+item twice. Each batch is generated with bounded parallelism, and the resulting
+recipes are inserted together in one transaction.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.services import gemini_service, recipe_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)  # running items older than this were left by a dead worker
+
+
+async def create_job(db: AsyncSession, user_id: int, requests: List[Dict]) -> models.RecipeJob:
+    """Store a job and bulk-insert its items (each {ingredients, preferences})"""
+    job = models.RecipeJob(user_id=user_id, total=len(requests))
+    db.add(job)
+    await db.flush()
+    await db.execute(
+        insert(models.RecipeJobItem),
+        [
+            {"job_id": job.id, "ingredients": r["ingredients"], "preferences": r.get("preferences")}
+            for r in requests
+        ],
+    )
+    await db.commit()
+    return job
+
+
+async def job_recipe_ids(db: AsyncSession, job_id: int) -> List[int]:
+    result = await db.execute(
+        select(models.RecipeJobItem.recipe_id)
+        .where(models.RecipeJobItem.job_id == job_id, models.RecipeJobItem.recipe_id.isnot(None))
+        .order_by(models.RecipeJobItem.id)
+    )
+    return list(result.scalars())
+
+
+async def claim_items(db: AsyncSession, batch_size: int) -> List[models.RecipeJobItem]:
+    """Lock and mark a batch of pending (or stale running) items as running"""
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(models.RecipeJobItem)
+        .where(or_(
+            models.RecipeJobItem.status == "pending",
+            (models.RecipeJobItem.status == "running") & (models.RecipeJobItem.locked_at < now - STALE_AFTER),
+        ))
+        .order_by(models.RecipeJobItem.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    items = list(result.scalars())
+    if not items:
+        await db.commit()
+        return []
+    for item in items:
+        item.status = "running"
+        item.locked_at = now
+        item.attempts += 1
+    await db.execute(
+        update(models.RecipeJob)
+        .where(models.RecipeJob.id.in_({i.job_id for i in items}), models.RecipeJob.status == "pending")
+        .values(status="running", started_at=now)
+    )
+    await db.commit()
+    return items
+
+
+async def _generate_all(items: List[models.RecipeJobItem], concurrency: int) -> List[Dict]:
+    """One result per item; a failed generation becomes that item's {"error": ...} result"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(item):
+        async with semaphore:
+            try:
+                return await gemini_service.generate_recipe(item.ingredients, item.preferences)
+            except Exception as e:
+                # one bad item must not fail (and re-queue) the rest of the batch
+                logger.error("Error generating recipe for job item %s: %s", item.id, e)
+                return {"error": str(e) or type(e).__name__}
+
+    return await asyncio.gather(*[generate(item) for item in items])
+
+
+async def process_batch(db: AsyncSession, items: List[models.RecipeJobItem], concurrency: int = 4) -> int:
+    """Generate recipes for claimed items and store them in one transaction"""
+    results: Dict[int, Dict] = {}
+    keys = {item.id: recipe_cache.cache_key(item.ingredients, item.preferences) for item in items}
+    misses = []
+    for item in items:
+        cached = await recipe_cache.lookup(db, keys[item.id])
+        if cached is not None:
+            results[item.id] = cached
+        else:
+            misses.append(item)
+    if misses:
+        recipe_cache.misses.inc(len(misses))
+        # the session is not shared with the model calls, which run concurrently
+        for item, recipe_data in zip(misses, await _generate_all(misses, concurrency)):
+            results[item.id] = recipe_data
+            await recipe_cache.store(db, keys[item.id], recipe_data)
+
+    jobs = {
+        job.id: job
+        for job in (await db.execute(
+            select(models.RecipeJob).where(models.RecipeJob.id.in_({i.job_id for i in items}))
+        )).scalars()
+    }
+    recipes = {}
+    for item in items:
+        recipe_data = results[item.id]
+        if recipe_cache.is_valid_recipe(recipe_data):
+            recipes[item.id] = gemini_service.build_recipe(recipe_data, jobs[item.job_id].user_id)
+    db.add_all(recipes.values())
+    await db.flush()  # one multi-row INSERT for the recipes (and their index rows)
+
+    completed: Dict[int, int] = {}
+    failed: Dict[int, int] = {}
+    for item in items:
+        recipe = recipes.get(item.id)
+        if recipe is not None:
+            item.status = "done"
+            item.recipe_id = recipe.id
+            item.error = None
+            completed[item.job_id] = completed.get(item.job_id, 0) + 1
+        elif item.attempts >= MAX_ATTEMPTS:
+            item.status = "failed"
+            item.error = results[item.id].get("error", "invalid recipe data")
+            failed[item.job_id] = failed.get(item.job_id, 0) + 1
+        else:
+            item.status = "pending"  # picked up again by a later batch
+            item.error = results[item.id].get("error", "invalid recipe data")
+        item.locked_at = None
+
+    now = datetime.utcnow()
+    for job_id in set(completed) | set(failed):
+        # relative updates, so concurrent workers don't overwrite each other's counts
+        finished = models.RecipeJob.completed + models.RecipeJob.failed + completed.get(job_id, 0) + failed.get(job_id, 0)
+        await db.execute(
+            update(models.RecipeJob)
+            .where(models.RecipeJob.id == job_id)
+            .values(
+                completed=models.RecipeJob.completed + completed.get(job_id, 0),
+                failed=models.RecipeJob.failed + failed.get(job_id, 0),
+                status=case((finished >= models.RecipeJob.total, "done"), else_=models.RecipeJob.status),
+                finished_at=case((finished >= models.RecipeJob.total, now), else_=models.RecipeJob.finished_at),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    return len(recipes)
+
+
+async def run_worker(
+    session_factory,
+    batch_size: int = 20,
+    concurrency: int = 4,
+    poll_interval: float = 2.0,
+    once: bool = False,
+    stop: Optional[asyncio.Event] = None,
+) -> int:
+    """Process batches until stopped (or, with `once`, until the queue is empty)"""
+    processed = 0
+    while stop is None or not stop.is_set():
+        async with session_factory() as db:
+            items = await claim_items(db, batch_size)
+            if items:
+                created = await process_batch(db, items, concurrency)
+                processed += len(items)
+                logger.info("processed %d job items, %d recipes created", len(items), created)
+                continue
+        if once:
+            break
+        await asyncio.sleep(poll_interval)
+    return processed
@@ -0,0 +1,103 @@
+"""
+Shopping list planning: what is needed for a set of recipes minus what is
+already in the pantry.
+
+Recipe lines are parsed (app.ingredient_parser) into canonical names, converted
+to canonical units (app.units) in one batch and aggregated per (name, canonical
+unit). The pantry's stored canonical quantities are summed per (canonical
+ingredient id, canonical unit) in one grouped query. Quantities that can't be
+converted into each other (e.g. "2 pcs" onion vs "300 g" onion) are kept apart.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, units
+from app.ingredient_parser import canonical_name, parse_ingredient_line, parse_quantity
+from app.services import ingredient_catalog
+
+
+def required_quantities(recipes: List[Tuple[models.Recipe, float]]) -> Dict[Tuple[str, str], float]:
+    """(canonical name, canonical unit) -> amount for recipes scaled to the requested servings"""
+    names, amounts, unit_names = [], [], []
+    for recipe, servings in recipes:
+        scale = servings / recipe.servings if recipe.servings else 1
+        for entry in recipe.ingredients or []:
+            if isinstance(entry, dict):
+                name, quantity, unit = canonical_name(entry.get("name")), entry.get("quantity"), entry.get("unit")
+            else:
+                quantity, unit, name, _ = parse_ingredient_line(str(entry))
+            if not name:
+                continue
+            amount = parse_quantity(quantity)
+            names.append(name)
+            # no quantity given: one of it, in whatever unit it was listed
+            amounts.append(1 if amount is None else amount * scale)
+            unit_names.append(unit)
+
+    values, canonical_units = units.to_canonical_many(amounts, unit_names, names)
+    needed: Dict[Tuple[str, str], float] = defaultdict(float)
+    for name, value, unit in zip(names, values, canonical_units):
+        needed[(name, unit)] += value
+    return needed
+
+
+async def pantry_quantities(db: AsyncSession, user_id: int, canonical_ids) -> Dict[Tuple[int, str], float]:
+    """(canonical ingredient id, canonical unit) -> amount currently stocked"""
+    rows = await db.execute(
+        select(
+            models.Ingredient.canonical_id,
+            models.Ingredient.canonical_unit,
+            func.sum(models.Ingredient.canonical_quantity),
+        )
+        .where(
+            models.Ingredient.user_id == user_id,
+            models.Ingredient.canonical_id.in_(list(canonical_ids)),
+            models.Ingredient.canonical_unit.isnot(None),
+        )
+        .group_by(models.Ingredient.canonical_id, models.Ingredient.canonical_unit)
+    )
+    return {(canonical_id, unit): quantity or 0 for canonical_id, unit, quantity in rows}
+
+
+async def plan_items(
+    db: AsyncSession,
+    user_id: int,
+    recipes: List[Tuple[models.Recipe, float]],
+    subtract_pantry: bool = True,
+) -> List[Dict]:
+    """Shopping item rows (item_name, quantity, unit and canonical columns) still needed"""
+    needed = required_quantities(recipes)
+    if needed:
+        ids = await ingredient_catalog.resolve(db, {name for name, _ in needed}, create=False)
+        # names resolving to the same catalog entry ("tomato", "tomatoe") become one item
+        catalog_names = ingredient_catalog.names_of(i for i in ids.values() if i is not None)
+        merged: Dict[Tuple[str, str], float] = defaultdict(float)
+        id_of: Dict[str, int] = {}
+        for (name, unit), amount in needed.items():
+            display = catalog_names.get(ids.get(name), name)
+            merged[(display, unit)] += amount
+            id_of[display] = ids.get(name)
+        needed = merged
+        if subtract_pantry:
+            stocked = await pantry_quantities(db, user_id, {i for i in id_of.values() if i is not None})
+            needed = {
+                (name, unit): amount - stocked.get((id_of[name], unit), 0)
+                for (name, unit), amount in needed.items()
+            }
+
+    items = []
+    for (name, canonical_unit), amount in sorted(needed.items()):
+        if amount <= 1e-9:
+            continue
+        quantity, unit = units.display_quantity(amount, canonical_unit)
+        items.append({
+            "item_name": name,
+            "quantity": quantity,
+            "unit": unit,
+            "canonical_quantity": amount,
+            "canonical_unit": canonical_unit,
+        })
+    return items
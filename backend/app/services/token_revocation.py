@@ -0,0 +1,118 @@
+"""
+Revocation list for stateless access tokens.
+
+Access tokens are authorized from their claims alone (see auth.get_current_user),
+so logging out or changing a user's account revokes their token id (jti) or
+session id (sid) instead: a revoked_tokens row kept until the tokens expire.
+
+Each worker holds the revoked ids in a Bloom filter. A token whose ids are not in
+the filter is accepted without a query; a possible match (a revoked id or a rare
+false positive) is confirmed against the table. Revocations from this worker
+are added at once; rows written by other workers are picked up every
+TOKEN_REVOCATION_REFRESH_SECONDS, and the filter is rebuilt from the unexpired
+rows every TOKEN_REVOCATION_REBUILD_SECONDS so expired ids drop out.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics, models
+from app.bloom import BloomFilter
+from app.config import get_settings
+
+_settings = get_settings()
+TOKEN_REVOCATION_REFRESH_SECONDS = _settings.token_revocation_refresh_seconds
+TOKEN_REVOCATION_REBUILD_SECONDS = _settings.token_revocation_rebuild_seconds
+TOKEN_REVOCATION_CAPACITY = _settings.token_revocation_capacity
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+# incremental loads re-read this much history, for rows committed slightly out of order
+LOAD_OVERLAP = timedelta(seconds=60)
+
+db_checks = metrics.counter("token_revocation_db_checks_total", "Access tokens checked against revoked_tokens (Bloom filter match)")
+revoked_hits = metrics.counter("token_revocation_revoked_total", "Access tokens rejected as revoked")
+filter_size = metrics.gauge("token_revocation_filter_items", "Revoked ids in this worker's Bloom filter")
+
+_filter = BloomFilter(TOKEN_REVOCATION_CAPACITY, TOKEN_REVOCATION_ERROR_RATE)
+_loaded_since: Optional[datetime] = None  # created_at covered by the last load
+_refreshed_at: Optional[float] = None
+_rebuilt_at: Optional[float] = None
+
+
+def reset() -> None:
+    """Forget the in-memory filter (e.g. after pointing the app at another database)"""
+    global _filter, _loaded_since, _refreshed_at, _rebuilt_at
+    _filter = BloomFilter(TOKEN_REVOCATION_CAPACITY, TOKEN_REVOCATION_ERROR_RATE)
+    _loaded_since = _refreshed_at = _rebuilt_at = None
+    filter_size.set(0)
+
+
+async def _refresh(db: AsyncSession) -> None:
+    """Load revocations written since the last refresh, or rebuild the filter when it is due"""
+    global _filter, _loaded_since, _refreshed_at, _rebuilt_at
+    now = time.monotonic()
+    if _refreshed_at is not None and now - _refreshed_at < TOKEN_REVOCATION_REFRESH_SECONDS:
+        return
+    # claimed before awaiting, so concurrent requests don't all query; released if the
+    # load fails, so the next request retries instead of skipping revocations for a window
+    previous, _refreshed_at = _refreshed_at, now
+    table = models.RevokedToken.__table__
+    started = datetime.utcnow()
+    rebuild = _rebuilt_at is None or now - _rebuilt_at >= TOKEN_REVOCATION_REBUILD_SECONDS
+    stmt = select(table.c.jti).where(table.c.expires_at > started)
+    if not rebuild:
+        stmt = stmt.where(table.c.created_at >= _loaded_since - LOAD_OVERLAP)
+    try:
+        jtis = (await db.execute(stmt)).scalars().all()
+    except BaseException:
+        _refreshed_at = previous
+        raise
+
+    if rebuild:
+        fresh = BloomFilter(max(TOKEN_REVOCATION_CAPACITY, 2 * len(jtis)), TOKEN_REVOCATION_ERROR_RATE)
+        for jti in jtis:
+            fresh.add(jti)
+        _filter, _rebuilt_at = fresh, now
+    else:
+        for jti in jtis:
+            if jti not in _filter:
+                _filter.add(jti)
+    _loaded_since = started
+    filter_size.set(len(_filter))
+
+
+async def is_revoked(db: AsyncSession, *ids: Optional[str]) -> bool:
+    """Whether any of a token's ids (jti, sid) was revoked; queries only on a filter match"""
+    await _refresh(db)
+    candidates = [i for i in ids if i and i in _filter]
+    if not candidates:
+        return False
+    db_checks.inc()
+    table = models.RevokedToken.__table__
+    found = await db.scalar(
+        select(table.c.id).where(table.c.jti.in_(candidates), table.c.expires_at > datetime.utcnow()).limit(1)
+    )
+    if found is not None:
+        revoked_hits.inc()
+    return found is not None
+
+
+async def revoke(db: AsyncSession, ids: Iterable[str], expires_at: datetime) -> None:
+    """Revoke token / session ids until `expires_at` (the caller commits)"""
+    ids = sorted({i for i in ids if i})
+    if not ids:
+        return
+    table = models.RevokedToken.__table__
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    now = datetime.utcnow()
+    stmt = dialect.insert(table).values(
+        [{"jti": i, "expires_at": expires_at, "created_at": now} for i in ids]
+    )
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["jti"]))
+    for i in ids:
+        if i not in _filter:
+            _filter.add(i)
+    filter_size.set(len(_filter))
@@ -0,0 +1,161 @@
+"""
+Unit registry: canonical units, precomputed conversion factors and densities.
+
+Every known unit spelling maps to a dimension (mass, volume, count) and a
+factor to that dimension's canonical unit (g, ml, pcs). Volumes of ingredients
+with a known density are stored as mass, so "2 cups flour" and "1 kg flour"
+end up in the same unit. Unknown units are kept as their own canonical unit.
+
+`to_canonical_many` converts thousands of quantities in one call: each distinct
+(unit, ingredient) pair is resolved once and the rest is a multiplication.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MASS, VOLUME, COUNT = "mass", "volume", "count"
+CANONICAL_UNITS = {MASS: "g", VOLUME: "ml", COUNT: "pcs"}
+
+# unit -> (dimension, factor to the canonical unit)
+_UNIT_DEFINITIONS = {
+    MASS: {
+        1: ["g", "gr", "gram", "grams", "gramm"],
+        1000: ["kg", "kilo", "kilogram", "kilograms", "kilos"],
+        0.001: ["mg", "milligram", "milligrams"],
+        28.349523125: ["oz", "ounce", "ounces"],
+        453.59237: ["lb", "lbs", "pound", "pounds"],
+    },
+    VOLUME: {
+        1: ["ml", "milliliter", "milliliters", "millilitre", "millilitres"],
+        10: ["cl"],
+        100: ["dl"],
+        1000: ["l", "liter", "liters", "litre", "litres"],
+        4.92892159375: ["tsp", "teaspoon", "teaspoons"],
+        14.78676478125: ["tbsp", "tablespoon", "tablespoons"],
+        29.5735295625: ["fl oz", "floz"],
+        240: ["cup", "cups"],
+    },
+    COUNT: {
+        1: ["", "pc", "pcs", "piece", "pieces", "unit", "units", "x", "whole", "ea", "each"],
+        6: ["half dozen"],
+        12: ["dozen", "doz"],
+    },
+}
+UNITS: Dict[str, Tuple[str, float]] = {
+    alias: (dimension, factor)
+    for dimension, factors in _UNIT_DEFINITIONS.items()
+    for factor, aliases in factors.items()
+    for alias in aliases
+}
+
+# g per ml, for volume <-> mass
+DENSITIES: Dict[str, float] = {
+    "water": 1.0,
+    "milk": 1.03,
+    "cream": 1.01,
+    "yogurt": 1.03,
+    "butter": 0.911,
+    "oil": 0.92,
+    "olive oil": 0.91,
+    "vegetable oil": 0.92,
+    "honey": 1.42,
+    "maple syrup": 1.32,
+    "flour": 0.53,
+    "sugar": 0.85,
+    "brown sugar": 0.72,
+    "powdered sugar": 0.56,
+    "salt": 1.2,
+    "rice": 0.85,
+    "oats": 0.41,
+    "cocoa powder": 0.42,
+}
+
+# factor between any two units of the same dimension, precomputed
+CONVERSIONS: Dict[Tuple[str, str], float] = {
+    (a, b): fa / fb
+    for a, (da, fa) in UNITS.items()
+    for b, (db, fb) in UNITS.items()
+    if da == db
+}
+
+
+def normalize_unit_name(unit: Optional[str]) -> str:
+    return " ".join((unit or "").strip().lower().rstrip(".").split())
+
+
+def dimension_of(unit: Optional[str]) -> Tuple[str, float]:
+    """(dimension, factor to canonical) of a unit; unknown units are their own dimension"""
+    key = normalize_unit_name(unit)
+    return UNITS.get(key, (f"unit:{key}", 1.0))
+
+
+def density_of(name: Optional[str]) -> Optional[float]:
+    if not name:
+        return None
+    name = " ".join(name.split()).lower()
+    density = DENSITIES.get(name)
+    if density is None and name.endswith("s"):
+        density = DENSITIES.get(name[:-1])
+    return density
+
+
+def _resolve(unit: Optional[str], name: Optional[str]) -> Tuple[float, str]:
+    """(factor, canonical unit) for one unit of one ingredient"""
+    dimension, factor = dimension_of(unit)
+    if dimension == VOLUME:
+        density = density_of(name)
+        if density is not None:
+            return factor * density, CANONICAL_UNITS[MASS]
+    if dimension in CANONICAL_UNITS:
+        return factor, CANONICAL_UNITS[dimension]
+    return factor, dimension[len("unit:"):]
+
+
+def to_canonical(quantity: Optional[float], unit: Optional[str], name: Optional[str] = None) -> Tuple[Optional[float], str]:
+    """(quantity in the canonical unit, canonical unit)"""
+    factor, canonical = _resolve(unit, name)
+    return (None if quantity is None else quantity * factor), canonical
+
+
+def to_canonical_many(
+    quantities: Sequence[Optional[float]],
+    units: Sequence[Optional[str]],
+    names: Optional[Sequence[Optional[str]]] = None,
+) -> Tuple[List[Optional[float]], List[str]]:
+    """Batch version of to_canonical; each distinct (unit, name) pair is resolved once"""
+    if names is None:
+        names = [None] * len(quantities)
+    resolved: Dict[Tuple, Tuple[float, str]] = {}
+    for key in set(zip(units, names)):
+        resolved[key] = _resolve(*key)
+    factors = [resolved[key] for key in zip(units, names)]
+    values = [
+        None if q is None else q * factor
+        for q, (factor, _) in zip(quantities, factors)
+    ]
+    return values, [canonical for _, canonical in factors]
+
+
+def convert(quantity: float, from_unit: str, to_unit: str, name: Optional[str] = None) -> Optional[float]:
+    """Convert between two units; None when they can't be converted"""
+    a, b = normalize_unit_name(from_unit), normalize_unit_name(to_unit)
+    factor = CONVERSIONS.get((a, b))
+    if factor is not None:
+        return quantity * factor
+    value, canonical = to_canonical(quantity, a, name)
+    target_factor, target_canonical = _resolve(b, name)
+    if canonical != target_canonical:
+        return None
+    return value / target_factor
+
+
+def canonical_columns(quantity: Optional[float], unit: Optional[str], name: Optional[str] = None) -> Dict:
+    """Values for the stored canonical_quantity / canonical_unit columns"""
+    value, canonical = to_canonical(quantity, unit, name)
+    return {"canonical_quantity": value, "canonical_unit": canonical}
+
+
+def display_quantity(amount: float, canonical_unit: str) -> Tuple[float, str]:
+    """Round a canonical amount for display, switching g/ml to kg/l from 1000 on"""
+    larger = {"g": "kg", "ml": "l"}.get(canonical_unit)
+    if larger and amount >= 1000:
+        return round(amount / 1000, 2), larger
+    return round(amount, 2), canonical_unit
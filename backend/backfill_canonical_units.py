@@ -0,0 +1,47 @@
+# backfill_canonical_units.py
+# Fill canonical_quantity / canonical_unit for rows written before those columns existed
+from sqlalchemy import bindparam, select, update
+
+from app import models, units
+from app.database import SessionLocal
+
+BATCH_SIZE = 5000
+
+
+def backfill(db, model, name_column) -> int:
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.id, model.quantity, model.unit, name_column)
+            .where(model.id > last_id, model.canonical_unit.is_(None))
+            .order_by(model.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids, quantities, unit_names, names = zip(*rows)
+        values, canonical_units = units.to_canonical_many(quantities, unit_names, names)
+        db.connection().execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == bindparam("row_id"))
+            .values(canonical_quantity=bindparam("cq"), canonical_unit=bindparam("cu")),
+            [
+                {"row_id": id_, "cq": value, "cu": unit}
+                for id_, value, unit in zip(ids, values, canonical_units)
+            ],
+        )
+        db.commit()
+        count += len(rows)
+        last_id = ids[-1]
+    return count
+
+
+db = SessionLocal()
+try:
+    ingredients = backfill(db, models.Ingredient, models.Ingredient.name)
+    items = backfill(db, models.ShoppingItem, models.ShoppingItem.item_name)
+finally:
+    db.close()
+
+print(f"✅ Backfilled {ingredients} ingredients and {items} shopping items")
@@ -0,0 +1,55 @@
+# backfill_search_vectors.py
+# Fill recipes.search_vector / news.search_vector for rows written before
+# full-text search existed (alembic revision 0003_search_vectors)
+from sqlalchemy import bindparam, select, update
+
+from app import models, search
+from app.database import SessionLocal
+
+BATCH_SIZE = 1000
+
+
+def backfill(db, model) -> int:
+    dialect = db.get_bind().dialect.name
+    table = model.__table__
+    weights = [weight for _, weight in search.SEARCH_FIELDS[table.name]]
+    if dialect == "postgresql":
+        # the tsvector is built by the database from one text parameter per field
+        value = search.search_vector([(bindparam(f"part{i}"), w) for i, w in enumerate(weights)], dialect)
+    else:
+        value = bindparam("document")
+    stmt = update(table).where(table.c.id == bindparam("row_id")).values(search_vector=value)
+
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model)
+            .where(model.id > last_id, model.search_vector.is_(None))
+            .order_by(model.id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            parts = search.document(row)
+            if dialect == "postgresql":
+                params.append({"row_id": row.id, **{f"part{i}": text for i, (text, _) in enumerate(parts)}})
+            else:
+                params.append({"row_id": row.id, "document": search.search_vector(parts, dialect)})
+        db.connection().execute(stmt, params)
+        db.commit()
+        count += len(rows)
+        last_id = rows[-1].id
+    return count
+
+
+db = SessionLocal()
+try:
+    recipes = backfill(db, models.Recipe)
+    news = backfill(db, models.News)
+finally:
+    db.close()
+
+print(f"✅ Backfilled search vectors for {recipes} recipes and {news} news articles")
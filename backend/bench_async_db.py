@@ -0,0 +1,62 @@
+"""
+Benchmark the sync request path (blocking engine on a 40-thread pool, like
+FastAPI's default threadpool) against the async path (asyncpg engine on the
+event loop) with the same query workload.
+Run: python bench_async_db.py --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app import models
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+THREADPOOL_SIZE = 40  # anyio's default worker thread limit
+
+
+def _workload():
+    # same shape as GET /recipes/: one page of a user's recipes
+    return select(models.Recipe).order_by(models.Recipe.id).limit(20)
+
+
+def run_sync(requests: int) -> float:
+    def one_request(_):
+        with SessionLocal() as db:
+            db.execute(_workload()).scalars().all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        list(pool.map(one_request, range(requests)))
+    return time.perf_counter() - start
+
+
+async def run_async(requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                (await db.execute(_workload())).scalars().all()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    sync_elapsed = run_sync(args.requests)
+    engine.dispose()
+    async_elapsed = asyncio.run(run_async(args.requests, args.concurrency))
+
+    print(f"sync  (threadpool={THREADPOOL_SIZE}): {args.requests / sync_elapsed:8.1f} req/s")
+    print(f"async (concurrency={args.concurrency}): {args.requests / async_elapsed:8.1f} req/s")
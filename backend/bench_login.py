@@ -0,0 +1,93 @@
+# bench_login.py
+# Login load test: measures the latency of an unrelated endpoint on its own, then
+# again while --concurrency clients log in nonstop, and reports login throughput.
+#   python bench_login.py --concurrency 50 --seconds 10                  # in-process app
+#   python bench_login.py --url http://localhost:8000 --probe /health   # running server
+# Against a running server, start it with RATE_LIMIT_LOGIN=off so logins are not throttled.
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+import httpx
+
+parser = argparse.ArgumentParser(description="Login throughput and latency of other endpoints under a login storm")
+parser.add_argument("--url", help="base URL of a running server (default: the app in this process)")
+parser.add_argument("--concurrency", type=int, default=50, help="concurrent login clients")
+parser.add_argument("--seconds", type=float, default=10, help="duration of each phase")
+parser.add_argument("--probe", default="/health", help="unrelated endpoint to time")
+parser.add_argument("--email", default="bench-login@example.com")
+parser.add_argument("--password", default="bench-login-password")
+args = parser.parse_args()
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def client() -> httpx.AsyncClient:
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, timeout=60)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+async def probe(http: httpx.AsyncClient, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await http.get(args.probe)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def login(http: httpx.AsyncClient, stop: asyncio.Event, statuses: dict) -> None:
+    form = {"username": args.email, "password": args.password}
+    while not stop.is_set():
+        response = await http.post("/auth/login", data=form)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def phase(http: httpx.AsyncClient, logins: int):
+    stop, latencies, statuses = asyncio.Event(), [], {}
+    tasks = [asyncio.create_task(probe(http, stop, latencies))]
+    tasks += [asyncio.create_task(login(http, stop, statuses)) for _ in range(logins)]
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return latencies, statuses
+
+
+def report(name: str, latencies: list) -> None:
+    print(
+        f"{name:<22} {args.probe}: n={len(latencies):5d}  "
+        f"p50={statistics.median(latencies) * 1000:7.1f} ms  p99={percentile(latencies, 0.99) * 1000:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    async with client() as http:
+        response = await http.post(
+            "/auth/register",
+            json={"email": args.email, "username": args.email.split("@")[0], "password": args.password},
+        )
+        if response.status_code not in (200, 400):  # 400: already registered
+            raise SystemExit(f"Could not register the bench user: {response.status_code} {response.text}")
+
+        idle, _ = await phase(http, 0)
+        busy, statuses = await phase(http, args.concurrency)
+
+    report("idle", idle)
+    report(f"{args.concurrency} logins in flight", busy)
+    ok = statuses.get(200, 0)
+    print(f"logins: {ok / args.seconds:.1f}/s ok, responses by status {dict(sorted(statuses.items()))}")
+    print(f"✅ Login benchmark finished ({args.seconds:.0f} s per phase)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark checking off shopping list items one request at a time
+(PUT /shopping-lists/items/{id}) against one batch request
+(PATCH /shopping-lists/{id}/items), in-process against DATABASE_URL.
+A throwaway user and list are created and removed afterwards.
+Run: python bench_shopping_batch.py --items 30 --rounds 5
+"""
+import argparse
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal, async_engine
+from app.main import app
+from app.query_counter import QueryCounter
+
+
+def main(items: int, rounds: int):
+    client = TestClient(app)
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    email = f"{name}@example.com"
+    client.post("/auth/register", json={"email": email, "username": name, "password": "bench-password"})
+    token = client.post("/auth/login", data={"username": email, "password": "bench-password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    try:
+        list_id = client.post("/shopping-lists/", json={"name": "bench"}, headers=headers).json()["id"]
+        operations = [
+            {"op": "add", "item_name": f"item {i}", "quantity": 1, "unit": "pcs"} for i in range(items)
+        ]
+        shopping_list = client.patch(f"/shopping-lists/{list_id}/items", json={"operations": operations}, headers=headers).json()
+        item_ids = [item["id"] for item in shopping_list["items"]]
+
+        per_item = batch = 0.0
+        per_item_queries = batch_queries = 0
+        for round_ in range(rounds):
+            purchased = round_ % 2 == 0
+            with QueryCounter(async_engine) as counter:
+                start = time.perf_counter()
+                for item_id in item_ids:
+                    client.put(f"/shopping-lists/items/{item_id}", params={"is_purchased": purchased}, headers=headers)
+                per_item += time.perf_counter() - start
+            per_item_queries += counter.count
+
+            operations = [{"op": "update", "id": item_id, "is_purchased": not purchased} for item_id in item_ids]
+            with QueryCounter(async_engine) as counter:
+                start = time.perf_counter()
+                client.patch(f"/shopping-lists/{list_id}/items", json={"operations": operations}, headers=headers)
+                batch += time.perf_counter() - start
+            batch_queries += counter.count
+
+        print(f"{items} items, {rounds} rounds")
+        print(f"per-item PUT : {per_item / rounds * 1000:8.1f} ms/round, {per_item_queries / rounds:6.1f} queries/round")
+        print(f"batch PATCH  : {batch / rounds * 1000:8.1f} ms/round, {batch_queries / rounds:6.1f} queries/round")
+    finally:
+        with SessionLocal() as db:
+            user = db.query(models.User).filter(models.User.email == email).first()
+            if user:
+                for shopping_list in user.shopping_lists:
+                    db.delete(shopping_list)
+                db.delete(user)
+                db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    main(args.items, args.rounds)
@@ -0,0 +1,24 @@
+# calibrate_bcrypt.py
+# Picks the bcrypt cost for this machine type: the highest cost (12..16) that
+# hashes one password within --target-ms. Run it once on the production hardware
+# and pin the result as BCRYPT_ROUNDS on every worker; the app never calibrates.
+#   python calibrate_bcrypt.py --target-ms 250
+import argparse
+import time
+
+from app.services.password_hasher import MAX_ROUNDS, MIN_ROUNDS, calibrate_rounds, pwd_context
+
+parser = argparse.ArgumentParser(description="Suggest a BCRYPT_ROUNDS value for this machine")
+parser.add_argument("--target-ms", type=float, default=250, help="time one hash may take")
+args = parser.parse_args()
+
+rounds = calibrate_rounds(args.target_ms / 1000)
+
+handler = pwd_context.handler("bcrypt")
+print(f"bcrypt cost on this machine ({MIN_ROUNDS}..{MAX_ROUNDS}):")
+for candidate in range(MIN_ROUNDS, rounds + 1):
+    start = time.perf_counter()
+    handler.using(rounds=candidate).hash("calibration password")
+    print(f"  {candidate}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+print(f"✅ BCRYPT_ROUNDS={rounds}  (within {args.target_ms:.0f} ms per hash)")
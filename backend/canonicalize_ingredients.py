@@ -0,0 +1,46 @@
+# canonicalize_ingredients.py
+# Seed the canonical ingredient catalog and fill canonical_id for pantry items and
+# recipe index rows written before the catalog existed (alembic revision 0004)
+from sqlalchemy import bindparam, select, update
+
+from app import models
+from app.database import SessionLocal
+from app.services import ingredient_catalog
+from app.services.recipe_index import rebuild_index
+
+BATCH_SIZE = 5000
+
+
+def backfill_pantry(db) -> int:
+    table = models.Ingredient.__table__
+    stmt = update(table).where(table.c.id == bindparam("row_id")).values(canonical_id=bindparam("cid"))
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.Ingredient.id, models.Ingredient.name)
+            .where(models.Ingredient.id > last_id, models.Ingredient.canonical_id.is_(None))
+            .order_by(models.Ingredient.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids = ingredient_catalog.resolve_ids(db.connection(), {name for _, name in rows})
+        db.connection().execute(stmt, [{"row_id": id_, "cid": ids[name]} for id_, name in rows])
+        db.commit()
+        count += len(rows)
+        last_id = rows[-1].id
+    return count
+
+
+db = SessionLocal()
+try:
+    ingredient_catalog.seed(db.connection())
+    db.commit()
+    pantry = backfill_pantry(db)
+    # re-parses every recipe's ingredient lines; the flush hook resolves canonical ids
+    recipes = rebuild_index(db)
+finally:
+    db.close()
+
+print(f"✅ Canonicalized {pantry} pantry items and re-indexed {recipes} recipes")
@@ -0,0 +1,63 @@
+# check_import_time.py
+# Import-time budget for the API: imports app.main in a fresh interpreter with
+# `python -X importtime`, prints the slowest modules and exits 1 when the import
+# takes longer than the budget or pulls in a module that must stay lazy.
+#   python check_import_time.py --budget-ms 2000   (also run by test_import_time.py)
+import argparse
+import os
+import subprocess
+import sys
+
+# modules that are only needed once a request uses them
+LAZY_MODULES = ["google.generativeai"]
+
+parser = argparse.ArgumentParser(description="Check how long `import app.main` takes")
+parser.add_argument("--module", default="app.main")
+parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000")))
+parser.add_argument("--top", type=int, default=10, help="slowest modules to show")
+args = parser.parse_args()
+
+probe = f"import sys, {args.module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-W", "ignore", "-c", probe],
+    cwd=os.path.dirname(os.path.abspath(__file__)),
+    capture_output=True,
+    text=True,
+)
+if result.returncode != 0:
+    print(result.stderr)
+    sys.exit(result.returncode)
+
+# "import time: self [us] | cumulative | imported package", nested imports are
+# indented two spaces per level and listed before the module that imports them
+total_ms, children = None, []
+for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "cumulative" in line:
+        continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    depth = (len(name) - len(name.lstrip()) - 1) // 2
+    ms, name = int(cumulative) / 1000, name.strip()
+    if depth == 0:
+        if name == args.module:
+            total_ms = ms
+            break
+        children = []
+    elif depth == 1:
+        children.append((ms, name))
+
+print(f"Slowest direct imports of {args.module}:")
+for ms, name in sorted(children, reverse=True)[:args.top]:
+    print(f"  {ms:8.1f} ms  {name}")
+
+loaded = [m for m in result.stdout.strip().split(",") if m]
+failed = False
+if loaded:
+    print(f"❌ Imported eagerly: {', '.join(loaded)}")
+    failed = True
+if total_ms > args.budget_ms:
+    print(f"❌ import {args.module} took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = True
+if failed:
+    sys.exit(1)
+
+print(f"✅ import {args.module} took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
@@ -0,0 +1,112 @@
+# conftest.py
+# Shared pytest setup: the app runs in-process against a throwaway SQLite database
+# (migrated with Alembic) and the local fake Gemini model, so no network is needed.
+#   python -m pytest -q
+import itertools
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+# must be set before app modules read their settings
+_DB_DIR = tempfile.mkdtemp(prefix="grocerymate-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["GEMINI_FAKE_MODEL"] = "true"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"  # passlib's minimum; hashing cost is not under test
+os.environ["EXPIRY_SUMMARY_REFRESH_SECONDS"] = "0"
+os.environ["TOKEN_REVOCATION_REFRESH_SECONDS"] = "3600"  # no background reloads inside query budgets
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+from app.database import async_engine
+from app.query_counter import QueryCounter
+from app.services import gemini_service, recipe_cache
+from app.services.fake_model import FakeRecipeModel
+
+# scripts named test_*.py that are not pytest modules
+collect_ignore = ["test_generate.py"]
+
+_user_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+    yield
+    async_engine.sync_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from app.main import app
+
+    return TestClient(app)
+
+
+def register_user(client) -> dict:
+    """Register a new user and log in; returns the credentials and the login response"""
+    n = next(_user_ids)
+    email, password = f"user{n}@example.com", "test-password"
+    assert client.post("/auth/register", json={"email": email, "username": f"user{n}", "password": password}).status_code == 200
+    tokens = client.post("/auth/login", data={"username": email, "password": password}).json()
+    return {"email": email, "password": password, **tokens}
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header of a freshly registered user"""
+    return {"Authorization": f"Bearer {register_user(client)['access_token']}"}
+
+
+@pytest.fixture
+def other_headers(client):
+    """Authorization header of a second user"""
+    return {"Authorization": f"Bearer {register_user(client)['access_token']}"}
+
+
+@pytest.fixture
+def fake_model():
+    """A fresh FakeRecipeModel installed for the test, with the in-memory recipe cache emptied"""
+    previous, model = gemini_service.model, FakeRecipeModel()
+    gemini_service.set_model(model)
+    recipe_cache.clear_memory()
+    yield model
+    gemini_service.set_model(previous)
+
+
+class InvalidRecipeModel(FakeRecipeModel):
+    """Answers with a recipe that has no instructions"""
+
+    def _recipe_text(self, prompt):
+        return json.dumps({"name": "Broken", "ingredients": [{"name": "x"}], "instructions": []})
+
+
+@pytest.fixture
+def invalid_model(fake_model):
+    """An InvalidRecipeModel installed for the test; `fake_model` can be installed again with set_model"""
+    model = InvalidRecipeModel()
+    gemini_service.set_model(model)
+    return model
+
+
+@pytest.fixture
+def max_queries():
+    """Context manager failing the test when the block runs more than `budget` SQL statements:
+
+        with max_queries(2):
+            client.get("/shopping-lists/", headers=auth_headers)
+    """
+
+    @contextmanager
+    def check(budget: int):
+        with QueryCounter(async_engine) as counter:
+            yield counter
+        if counter.count > budget:
+            statements = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+            pytest.fail(f"Expected at most {budget} queries, got {counter.count}:\n{statements}")
+
+    return check
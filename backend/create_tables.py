@@ -1,8 +1,13 @@
 # create_tables.py
-from app.database import Base, engine
-import app.models  # تمام مدل‌ها اینجا import می‌شن
+# Bring the database schema up to date (same as `alembic upgrade head`).
+# Databases created before Alembic: apply migrations/*.sql, then
+#   alembic stamp 0001_initial && alembic upgrade head
+import os
 
-# ساخت تمام جداول در دیتابیس
-Base.metadata.create_all(bind=engine)
+from alembic import command
+from alembic.config import Config
 
-print("✅ All tables created successfully!")
+config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+command.upgrade(config, "head")
+
+print("✅ Database schema is up to date!")
@@ -0,0 +1,51 @@
+-- 0001_recipe_json_columns.sql
+-- Convert recipes.ingredients / instructions / tags from JSON-encoded TEXT to JSONB
+-- and add GIN indexes for tag / ingredient containment filters.
+--
+-- Run once against an existing database:
+--   psql "$DATABASE_URL" -f migrations/0001_recipe_json_columns.sql
+
+BEGIN;
+
+-- Parse a TEXT value into JSONB:
+--   * valid JSON is kept as-is
+--   * JSON strings holding JSON (create_recipe_manual used to json.dumps an
+--     already encoded string) are decoded a second time
+--   * anything else (e.g. newline-separated instructions) becomes a JSON string
+CREATE FUNCTION pg_temp.text_to_jsonb(value TEXT) RETURNS JSONB AS $$
+DECLARE
+    parsed JSONB;
+BEGIN
+    IF value IS NULL THEN
+        RETURN NULL;
+    END IF;
+    BEGIN
+        parsed := value::JSONB;
+    EXCEPTION WHEN others THEN
+        RETURN to_jsonb(value);
+    END;
+    IF jsonb_typeof(parsed) = 'string' THEN
+        BEGIN
+            RETURN (parsed #>> '{}')::JSONB;
+        EXCEPTION WHEN others THEN
+            RETURN parsed;
+        END;
+    END IF;
+    RETURN parsed;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+ALTER TABLE recipes
+    ALTER COLUMN ingredients TYPE JSONB USING pg_temp.text_to_jsonb(ingredients),
+    ALTER COLUMN instructions TYPE JSONB USING pg_temp.text_to_jsonb(instructions),
+    ALTER COLUMN tags TYPE JSONB USING COALESCE(pg_temp.text_to_jsonb(tags), '[]'::JSONB);
+
+-- Newline-separated instructions become a list of steps
+UPDATE recipes
+SET instructions = to_jsonb(regexp_split_to_array(instructions #>> '{}', E'\n'))
+WHERE jsonb_typeof(instructions) = 'string';
+
+CREATE INDEX IF NOT EXISTS ix_recipes_tags_gin ON recipes USING gin (tags);
+CREATE INDEX IF NOT EXISTS ix_recipes_ingredients_gin ON recipes USING gin (ingredients jsonb_path_ops);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- 0002_keyset_pagination_indexes.sql
+-- Composite indexes backing the (sort key, id) cursors of the list endpoints.
+-- CONCURRENTLY cannot run inside a transaction block, so run this file without -1:
+--   psql "$DATABASE_URL" -f migrations/0002_keyset_pagination_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ingredients_user_id_id ON ingredients (user_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_shopping_lists_user_id_id ON shopping_lists (user_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_user_id_id ON recipes (user_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_published_feed ON news (is_published, published_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_created_at_id ON news (created_at, id);
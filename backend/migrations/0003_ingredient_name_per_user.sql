@@ -0,0 +1,9 @@
+-- 0003_ingredient_name_per_user.sql
+-- Ingredient names were unique across all users; make them unique per user.
+-- (user_id, name) is also the conflict target of the bulk import upsert.
+--   psql "$DATABASE_URL" -1 -f migrations/0003_ingredient_name_per_user.sql
+
+DROP INDEX IF EXISTS ix_ingredients_name;
+CREATE INDEX ix_ingredients_name ON ingredients (name);
+ALTER TABLE ingredients
+    ADD CONSTRAINT uq_ingredients_user_id_name UNIQUE (user_id, name);
@@ -0,0 +1,10 @@
+-- 0004_canonical_quantities.sql
+-- Quantities converted to canonical units (g / ml / pcs, see app/units.py), so
+-- pantry sums and shopping list aggregation don't convert units at query time.
+--   psql "$DATABASE_URL" -1 -f migrations/0004_canonical_quantities.sql
+-- then fill existing rows with:  python backfill_canonical_units.py
+
+ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS canonical_quantity DOUBLE PRECISION;
+ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS canonical_unit VARCHAR;
+ALTER TABLE shopping_items ADD COLUMN IF NOT EXISTS canonical_quantity DOUBLE PRECISION;
+ALTER TABLE shopping_items ADD COLUMN IF NOT EXISTS canonical_unit VARCHAR;
@@ -0,0 +1,19 @@
+-- 0005_expiry_indexes.sql
+-- Per-user indexes for the expiring-soon feed and the location filter, plus the
+-- expiry_summaries table read by GET /ingredients/expiring/summary.
+-- (user_id, name) lookups are served by uq_ingredients_user_id_name from 0003.
+-- CONCURRENTLY cannot run inside a transaction block, so run this file without -1:
+--   psql "$DATABASE_URL" -f migrations/0005_expiry_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ingredients_user_id_expiry ON ingredients (user_id, expiry_date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ingredients_user_id_location ON ingredients (user_id, location, id);
+
+CREATE TABLE IF NOT EXISTS expiry_summaries (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+    expired INTEGER NOT NULL DEFAULT 0,
+    today INTEGER NOT NULL DEFAULT 0,
+    within_3_days INTEGER NOT NULL DEFAULT 0,
+    within_7_days INTEGER NOT NULL DEFAULT 0,
+    as_of DATE NOT NULL,
+    refreshed_at TIMESTAMP NOT NULL
+);
@@ -0,0 +1,24 @@
+# purge_expired_tokens.py
+# Delete expired refresh tokens and revocation entries; run from cron, e.g. daily
+# (expired rows are already ignored, this only keeps the tables small)
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from app import models
+from app.database import AsyncSessionLocal, async_engine
+
+
+async def main():
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        refresh = await db.execute(delete(models.RefreshToken).where(models.RefreshToken.expires_at <= now))
+        revoked = await db.execute(delete(models.RevokedToken).where(models.RevokedToken.expires_at <= now))
+        await db.commit()
+    await async_engine.dispose()
+    return refresh.rowcount, revoked.rowcount
+
+
+refresh_count, revoked_count = asyncio.run(main())
+print(f"✅ Deleted {refresh_count} expired refresh tokens and {revoked_count} revocation entries")
@@ -0,0 +1,33 @@
+# recipe_worker.py
+# Background worker for batch recipe generation jobs (POST /recipes/jobs).
+# Run one or more of these next to the API:  python recipe_worker.py --concurrency 4
+import argparse
+import asyncio
+import logging
+
+from app.database import AsyncSessionLocal
+from app.services import gemini_service
+from app.services.fake_model import FakeRecipeModel
+from app.services.recipe_jobs import run_worker
+
+parser = argparse.ArgumentParser(description="Process queued recipe generation jobs")
+parser.add_argument("--batch-size", type=int, default=20, help="items claimed per batch")
+parser.add_argument("--concurrency", type=int, default=4, help="parallel model calls per batch")
+parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds to wait when the queue is empty")
+parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+parser.add_argument("--fake", action="store_true", help="use the local fake model instead of Gemini")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO)
+
+if args.fake:
+    gemini_service.set_model(FakeRecipeModel())
+
+processed = asyncio.run(run_worker(
+    AsyncSessionLocal,
+    batch_size=args.batch_size,
+    concurrency=args.concurrency,
+    poll_interval=args.poll_interval,
+    once=args.once,
+))
+print(f"✅ Processed {processed} job items")
@@ -0,0 +1,17 @@
+# refresh_expiry_summary.py
+# Rebuild the per-user expiring-items summary; run from cron, e.g. every 15 minutes
+# (set EXPIRY_SUMMARY_REFRESH_SECONDS=0 to disable the in-app refresh loop instead)
+import asyncio
+
+from app.database import AsyncSessionLocal, async_engine
+from app.services.expiry_summary import refresh_all
+
+
+async def main() -> int:
+    async with AsyncSessionLocal() as db:
+        count = await refresh_all(db)
+    await async_engine.dispose()
+    return count
+
+
+print(f"✅ Refreshed {asyncio.run(main())} expiry summaries")
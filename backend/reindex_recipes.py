@@ -0,0 +1,12 @@
+# reindex_recipes.py
+# Backfill the recipe_ingredients index for recipes created before it existed
+from app.database import SessionLocal
+from app.services.recipe_index import rebuild_index
+
+db = SessionLocal()
+try:
+    count = rebuild_index(db)
+finally:
+    db.close()
+
+print(f"✅ Re-indexed {count} recipes")
@@ -3,12 +3,9 @@ Seed script to populate database with sample data
 Run: python seed_data.py
 """
 from datetime import date, timedelta
-import json
-from app.database import SessionLocal, engine
-from app.models import Base, Ingredient, Recipe
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from app.database import SessionLocal
+from app.models import Ingredient, Recipe
+from app.services.recipe_index import index_recipe
 
 def seed_ingredients():
     """Add sample ingredients"""
@@ -171,8 +168,15 @@ def seed_recipes():
         {
             "name": "Grilled Chicken Salad",
             "description": "Healthy protein-packed salad with fresh vegetables",
-            "ingredients": json.dumps(["chicken", "lettuce", "tomato", "cucumber", "olive oil"]),
-            "instructions": "1. Grill chicken breast until fully cooked\n2. Chop lettuce, tomatoes, and cucumber\n3. Slice grilled chicken\n4. Mix all ingredients in a bowl\n5. Drizzle with olive oil\n6. Season with salt and pepper to taste",
+            "ingredients": ["chicken", "lettuce", "tomato", "cucumber", "olive oil"],
+            "instructions": [
+                "1. Grill chicken breast until fully cooked",
+                "2. Chop lettuce, tomatoes, and cucumber",
+                "3. Slice grilled chicken",
+                "4. Mix all ingredients in a bowl",
+                "5. Drizzle with olive oil",
+                "6. Season with salt and pepper to taste",
+            ],
             "prep_time": 20,
             "servings": 2,
             "calories": 350,
@@ -181,8 +185,16 @@ def seed_recipes():
         {
             "name": "Vegetable Stir Fry",
             "description": "Quick and nutritious vegetable dish",
-            "ingredients": json.dumps(["broccoli", "carrot", "bell pepper", "soy sauce", "garlic"]),
-            "instructions": "1. Heat pan with small amount of oil\n2. Mince garlic and add to pan\n3. Add chopped vegetables\n4. Stir fry for 5-7 minutes\n5. Add soy sauce\n6. Cook for 2 more minutes\n7. Serve hot with rice",
+            "ingredients": ["broccoli", "carrot", "bell pepper", "soy sauce", "garlic"],
+            "instructions": [
+                "1. Heat pan with small amount of oil",
+                "2. Mince garlic and add to pan",
+                "3. Add chopped vegetables",
+                "4. Stir fry for 5-7 minutes",
+                "5. Add soy sauce",
+                "6. Cook for 2 more minutes",
+                "7. Serve hot with rice",
+            ],
             "prep_time": 15,
             "servings": 3,
             "calories": 180,
@@ -191,8 +203,16 @@ def seed_recipes():
         {
             "name": "Fruit Smoothie",
             "description": "Refreshing and vitamin-rich smoothie",
-            "ingredients": json.dumps(["banana", "strawberry", "yogurt", "honey"]),
-            "instructions": "1. Peel and slice bananas\n2. Wash strawberries\n3. Add all fruits to blender\n4. Add yogurt\n5. Add 1 tablespoon of honey\n6. Blend until smooth\n7. Serve immediately",
+            "ingredients": ["banana", "strawberry", "yogurt", "honey"],
+            "instructions": [
+                "1. Peel and slice bananas",
+                "2. Wash strawberries",
+                "3. Add all fruits to blender",
+                "4. Add yogurt",
+                "5. Add 1 tablespoon of honey",
+                "6. Blend until smooth",
+                "7. Serve immediately",
+            ],
             "prep_time": 5,
             "servings": 1,
             "calories": 220,
@@ -201,8 +221,18 @@ def seed_recipes():
         {
             "name": "Chicken Fried Rice",
             "description": "Delicious one-pan meal with vegetables",
-            "ingredients": json.dumps(["chicken", "rice", "carrot", "garlic", "soy sauce"]),
-            "instructions": "1. Cook rice and let it cool\n2. Cut chicken into small pieces\n3. Dice carrots and mince garlic\n4. Heat oil in large pan or wok\n5. Cook chicken until done, remove\n6. Stir fry vegetables\n7. Add rice and soy sauce\n8. Add chicken back\n9. Mix well and serve hot",
+            "ingredients": ["chicken", "rice", "carrot", "garlic", "soy sauce"],
+            "instructions": [
+                "1. Cook rice and let it cool",
+                "2. Cut chicken into small pieces",
+                "3. Dice carrots and mince garlic",
+                "4. Heat oil in large pan or wok",
+                "5. Cook chicken until done, remove",
+                "6. Stir fry vegetables",
+                "7. Add rice and soy sauce",
+                "8. Add chicken back",
+                "9. Mix well and serve hot",
+            ],
             "prep_time": 30,
             "servings": 4,
             "calories": 420,
@@ -211,8 +241,17 @@ def seed_recipes():
         {
             "name": "Garlic Roasted Vegetables",
             "description": "Simple and healthy roasted veggie medley",
-            "ingredients": json.dumps(["broccoli", "carrot", "bell pepper", "garlic", "olive oil"]),
-            "instructions": "1. Preheat oven to 200°C (400°F)\n2. Cut vegetables into similar-sized pieces\n3. Mince garlic\n4. Toss vegetables with olive oil and garlic\n5. Season with salt and pepper\n6. Spread on baking sheet\n7. Roast for 20-25 minutes\n8. Serve as side dish",
+            "ingredients": ["broccoli", "carrot", "bell pepper", "garlic", "olive oil"],
+            "instructions": [
+                "1. Preheat oven to 200°C (400°F)",
+                "2. Cut vegetables into similar-sized pieces",
+                "3. Mince garlic",
+                "4. Toss vegetables with olive oil and garlic",
+                "5. Season with salt and pepper",
+                "6. Spread on baking sheet",
+                "7. Roast for 20-25 minutes",
+                "8. Serve as side dish",
+            ],
             "prep_time": 25,
             "servings": 4,
             "calories": 120,
@@ -226,6 +265,7 @@ def seed_recipes():
         existing = db.query(Recipe).filter(Recipe.name == recipe_data["name"]).first()
         if not existing:
             recipe = Recipe(**recipe_data)
+            index_recipe(recipe)
             db.add(recipe)
             added += 1
     
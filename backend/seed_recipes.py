@@ -1,14 +1,11 @@
 # file: seed_recipes.py
 from datetime import datetime
-import json
-from app.database import get_db, Base, engine
+from app.database import get_sync_db
 from app import models
-
-# ساخت جدول‌ها (اگه قبلا حذف شده باشه)
-Base.metadata.create_all(bind=engine)
+from app.services.recipe_index import index_recipe
 
 # گرفتن session
-db = next(get_db())
+db = next(get_sync_db())
 
 # پیدا کردن اولین user برای login
 current_user = db.query(models.User).first()
@@ -56,16 +53,17 @@ for r in recipes_data:
     recipe = models.Recipe(
         name=r["name"],
         description=r["description"],
-        ingredients=json.dumps(r["ingredients"]),
-        instructions=json.dumps(r["instructions"]),
+        ingredients=r["ingredients"],
+        instructions=r["instructions"],
         prep_time=r["prep_time"],
         cook_time=r["cook_time"],
         servings=r["servings"],
         calories=r["calories"],
         difficulty=r["difficulty"],
-        tags=json.dumps(r["tags"]),
+        tags=r["tags"],
         user_id=current_user.id
     )
+    index_recipe(recipe)
     db.add(recipe)
 
 db.commit()
@@ -0,0 +1,94 @@
+# test_auth_tokens.py
+# Refresh token rotation and the ways a session ends: reuse of a used refresh
+# token, logout, and an admin deactivating the user.
+import asyncio
+
+import pytest
+from sqlalchemy import update
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.services import token_revocation
+from conftest import register_user
+
+
+def _headers(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def _refresh(client, refresh_token):
+    return client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def _make_admin(client):
+    user = register_user(client)
+    user_id = client.get("/auth/me", headers=_headers(user)).json()["id"]
+
+    async def promote():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(models.User).where(models.User.id == user_id).values(is_admin=True))
+            await db.commit()
+
+    asyncio.run(promote())
+    # roles are carried in the token, so log in again
+    response = client.post("/auth/login", data={"username": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    return _headers(response.json())
+
+
+def test_refresh_rotates_tokens(client):
+    user = register_user(client)
+    response = _refresh(client, user["refresh_token"])
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["refresh_token"] != user["refresh_token"]
+    assert client.get("/auth/me", headers=_headers(tokens)).status_code == 200
+    # the new refresh token works once more
+    assert _refresh(client, tokens["refresh_token"]).status_code == 200
+
+
+def test_refresh_token_reuse_revokes_family(client):
+    user = register_user(client)
+    rotated = _refresh(client, user["refresh_token"]).json()
+
+    # the used token presented again: the whole session ends
+    assert _refresh(client, user["refresh_token"]).status_code == 401
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+    assert client.get("/auth/me", headers=_headers(rotated)).status_code == 401
+    assert client.get("/auth/me", headers=_headers(user)).status_code == 401
+
+
+def test_logout_ends_session(client):
+    user = register_user(client)
+    other_session = client.post("/auth/login", data={"username": user["email"], "password": user["password"]}).json()
+
+    response = client.post("/auth/logout", json={"refresh_token": user["refresh_token"]}, headers=_headers(user))
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=_headers(user)).status_code == 401
+    assert _refresh(client, user["refresh_token"]).status_code == 401
+    # other sessions of the user are untouched
+    assert client.get("/auth/me", headers=_headers(other_session)).status_code == 200
+
+
+def test_admin_deactivation_revokes_sessions(client):
+    admin_headers = _make_admin(client)
+    user = register_user(client)
+    user_id = client.get("/auth/me", headers=_headers(user)).json()["id"]
+
+    response = client.patch(f"/admin/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=_headers(user)).status_code == 401
+    assert _refresh(client, user["refresh_token"]).status_code == 401
+
+
+class FailingSession:
+    async def execute(self, stmt):
+        raise ConnectionError("database down")
+
+
+def test_failed_refresh_is_retried(monkeypatch):
+    monkeypatch.setattr(token_revocation, "_refreshed_at", None)
+    with pytest.raises(ConnectionError):
+        asyncio.run(token_revocation._refresh(FailingSession()))
+    # not marked as refreshed: the next request loads the revocations again
+    assert token_revocation._refreshed_at is None
@@ -0,0 +1,63 @@
+# test_expiry_summary.py
+# The per-user summary is upserted, so periodic refreshes and rebuilds on read
+# can race each other without primary key errors.
+import asyncio
+from datetime import date, timedelta
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.services import expiry_summary
+
+
+def _add(client, headers, name, days):
+    body = {"name": name, "location": "Fridge", "quantity": 1, "unit": "pcs",
+            "expiry_date": (date.today() + timedelta(days=days)).isoformat()}
+    assert client.post("/ingredients/", json=body, headers=headers).status_code == 200
+
+
+def _user_id(client, headers):
+    return client.get("/auth/me", headers=headers).json()["id"]
+
+
+async def _in_sessions(*calls):
+    async def run(call):
+        async with AsyncSessionLocal() as db:
+            return await call(db)
+
+    return await asyncio.gather(*(run(call) for call in calls))
+
+
+def test_summary_counts(client, auth_headers):
+    for name, days in [("old milk", -1), ("yoghurt", 0), ("cheese", 2), ("ham", 6), ("jam", 30)]:
+        _add(client, auth_headers, name, days)
+    summary = client.get("/ingredients/expiring/summary", headers=auth_headers).json()
+    assert (summary["expired"], summary["today"], summary["within_3_days"], summary["within_7_days"]) == (1, 1, 2, 3)
+
+
+def test_concurrent_rebuilds_and_refreshes(client, auth_headers):
+    _add(client, auth_headers, "cream", 1)
+    user_id = _user_id(client, auth_headers)
+
+    # the readers miss the row and rebuild it; the refreshes rewrite every row
+    summaries = asyncio.run(_in_sessions(
+        *[lambda db: expiry_summary.get_summary(db, user_id)] * 8,
+        expiry_summary.refresh_all,
+        expiry_summary.refresh_all,
+    ))
+    assert [s.within_3_days for s in summaries[:8]] == [1] * 8
+    assert client.get("/ingredients/expiring/summary", headers=auth_headers).json()["within_3_days"] == 1
+
+
+def test_refresh_drops_users_with_nothing_expiring(client, auth_headers):
+    _add(client, auth_headers, "lettuce", 1)
+    user_id = _user_id(client, auth_headers)
+    asyncio.run(_in_sessions(expiry_summary.refresh_all))
+
+    ingredient_id = client.get("/ingredients/", headers=auth_headers).json()[0]["id"]
+    client.put(f"/ingredients/{ingredient_id}", json={"expiry_date": (date.today() + timedelta(days=20)).isoformat()}, headers=auth_headers)
+    asyncio.run(_in_sessions(expiry_summary.refresh_all))
+
+    [row] = asyncio.run(_in_sessions(lambda db: db.get(models.ExpirySummary, user_id)))
+    assert row is None
+    summary = client.get("/ingredients/expiring/summary", headers=auth_headers).json()
+    assert (summary["within_7_days"], summary["as_of"]) == (0, date.today().isoformat())
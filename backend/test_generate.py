@@ -1,11 +1,11 @@
 import asyncio
-import json
 from app import models
-from app.database import get_db
+from app.database import get_sync_db
 from app.services.gemini_service import generate_recipe
+from app.services.recipe_index import index_recipe
 
 # اتصال به DB
-db = next(get_db())
+db = next(get_sync_db())
 
 # نمونه کاربر برای ذخیره recipe
 current_user = db.query(models.User).first()
@@ -32,14 +32,15 @@ else:
     new_recipe = models.Recipe(
         name=recipe_data.get("name", "Unknown Recipe"),
         description=recipe_data.get("description", ""),
-        ingredients=json.dumps(recipe_data.get("ingredients", [])),
-        instructions=json.dumps(recipe_data.get("instructions", [])),
+        ingredients=recipe_data.get("ingredients", []),
+        instructions=recipe_data.get("instructions", []),
         prep_time=parse_time(recipe_data.get("prep_time", "0")),
         servings=recipe_data.get("servings", 1),
         calories=recipe_data.get("calories", 0),
         is_healthy=True,
         user_id=current_user.id
     )
+    index_recipe(new_recipe)
 
     db.add(new_recipe)
     db.commit()
@@ -0,0 +1,18 @@
+# test_import_time.py
+# Runs check_import_time.py: importing app.main stays within its budget
+# (IMPORT_TIME_BUDGET_MS, default 2000) and leaves google.generativeai unloaded.
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_import_time_budget():
+    result = subprocess.run(
+        [sys.executable, os.path.join(BACKEND_DIR, "check_import_time.py")],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
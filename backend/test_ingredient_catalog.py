@@ -0,0 +1,73 @@
+# test_ingredient_catalog.py
+# Catalog resolution: exact keys, plural / spelling variants through the n-gram
+# index, and new entries for unknown names.
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import models
+from app.database import ASYNC_DATABASE_URL, AsyncSessionLocal
+from app.services import ingredient_catalog
+from app.services.ingredient_catalog import NGramIndex
+
+
+def _resolve(names, create=True):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            ids = await ingredient_catalog.resolve(db, names, create=create)
+            await db.commit()
+            return ids
+
+    return asyncio.run(run())
+
+
+def test_ngram_index_closest():
+    index = NGramIndex()
+    for id_, name in enumerate(["tomato", "tomato paste", "potato", "cherry tomato"], start=1):
+        index.add(id_, name)
+
+    assert index.get("tomato") == 1 and index.get("tomatoes") is None
+    id_, score = index.closest("tomatoe", 0.8)
+    assert id_ == 1 and score >= 0.8
+    assert index.closest("tomato pastes", 0.8)[0] == 2
+    assert index.closest("avocado", 0.8) is None
+    assert index.closest("potatoe", 0.99) is None  # below the threshold
+
+
+def test_resolve_variants_to_one_id():
+    parsley_root = _resolve(["Parsley root"])["Parsley root"]
+    ids = _resolve(["PARSLEY ROOTS", "parsley rooot", " parsley  root "], create=False)
+    assert set(ids.values()) == {parsley_root}
+
+
+def test_resolve_without_create():
+    assert _resolve(["dragon fruit jam"], create=False) == {"dragon fruit jam": None}
+    created = _resolve(["dragon fruit jam"])["dragon fruit jam"]
+    assert created is not None
+    assert _resolve(["Dragon fruit jams"], create=False) == {"Dragon fruit jams": created}
+
+
+def test_short_names_only_match_exactly():
+    ids = _resolve(["yam", "ham", "jam"])
+    assert len(set(ids.values())) == 3
+
+
+def test_async_inserts_commit_on_the_catalog_engine(monkeypatch):
+    # the PostgreSQL path: the insert commits on its own engine, not on the caller's connection
+    catalog_engine = create_async_engine(ASYNC_DATABASE_URL)
+    monkeypatch.setattr(ingredient_catalog, "get_catalog_engine", lambda: catalog_engine)
+    caller = SimpleNamespace(dialect=SimpleNamespace(name="postgresql", is_async=True))
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(lambda session: ingredient_catalog._insert_missing(caller, {"kumquat marmalade"}))
+            await db.rollback()  # the caller's transaction doesn't own the row
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(models.CanonicalIngredient.id).where(models.CanonicalIngredient.name == "kumquat marmalade")
+            )
+
+    assert asyncio.run(run()) is not None
+    asyncio.run(catalog_engine.dispose())
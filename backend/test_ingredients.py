@@ -0,0 +1,34 @@
+# test_ingredients.py
+# Bulk import: one NDJSON result per input row, batches committed as they fill.
+import json
+
+from app.services import ingredient_import
+
+
+def _import(client, headers, body, content_type="text/csv"):
+    response = client.post("/ingredients/import", content=body, headers={**headers, "Content-Type": content_type})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_import_csv_in_batches(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(ingredient_import, "IMPORT_BATCH_SIZE", 2)
+    body = "name,quantity,unit,location\nMilk,1,l,Fridge\nEggs,6,pcs,Fridge\nRice,abc,kg,Pantry\nFlour,1,kg,Pantry\nMilk,2,l,Fridge\n"
+
+    results = _import(client, auth_headers, body)
+    assert [(r["line"], r["status"]) for r in results] == [
+        (2, "created"), (3, "created"), (4, "error"), (5, "created"), (6, "updated"),
+    ]
+    assert results[2]["errors"][0].startswith("quantity:")
+
+    stored = client.get("/ingredients/", headers=auth_headers).json()
+    assert sorted((i["name"], i["quantity"]) for i in stored) == [("Eggs", 6), ("Flour", 1), ("Milk", 2)]
+
+
+def test_import_ndjson(client, auth_headers):
+    body = '{"name": "Butter", "location": "Fridge", "quantity": 250, "unit": "g"}\nnot json\n{"quantity": 1}\n'
+    results = _import(client, auth_headers, body, "application/x-ndjson")
+    # errors are reported at once, rows when their batch is committed
+    assert [(r["line"], r["status"]) for r in results] == [(2, "error"), (3, "error"), (1, "created")]
+    assert results[0]["errors"][0].startswith("Invalid JSON")
@@ -0,0 +1,80 @@
+# test_json_stream.py
+# The incremental parser must give the same result as json.loads however the text
+# is split into chunks, and report fields / array items as soon as they close.
+import json
+
+import pytest
+
+from app.services.json_stream import IncrementalJSONParser
+
+RECIPE = {
+    "name": 'Tom "the" Soup \\ {not: an object} [or, an array]',
+    "description": "café — line\nbreak",
+    "ingredients": [{"name": "tomato", "quantity": "2", "unit": "pcs"}, {"name": "salt, sea", "quantity": None}],
+    "instructions": ["Chop, then boil", "Serve \"hot\""],
+    "grid": [[1, 2], [], [[3]]],
+    "servings": 2,
+    "tags": [],
+    "is_healthy": True,
+}
+# \u escapes in the text too, so chunks can split inside them
+TEXT = "```json\n" + json.dumps(RECIPE, indent=1) + "\n```"
+
+
+def _parse(chunks):
+    parser = IncrementalJSONParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return parser, events
+
+
+def test_whole_text():
+    parser, events = _parse([TEXT])
+    assert parser.done and parser.result == RECIPE
+    fields = [e["key"] for e in events if e["type"] == "field"]
+    assert fields == ["name", "description", "servings", "is_healthy"]  # arrays come as items
+    assert [e["value"] for e in events if e["key"] == "ingredients"] == RECIPE["ingredients"]
+    assert [e["value"] for e in events if e["key"] == "grid"] == RECIPE["grid"]
+    assert [e["index"] for e in events if e["key"] == "instructions"] == [0, 1]
+
+
+def test_every_split_point():
+    _, expected = _parse([TEXT])
+    for i in range(len(TEXT) + 1):
+        parser, events = _parse([TEXT[:i], TEXT[i:]])
+        assert parser.done and parser.result == RECIPE, f"split at {i}: {TEXT[i - 5:i]!r}|{TEXT[i:i + 5]!r}"
+        assert events == expected
+
+
+def test_single_characters():
+    parser, events = _parse(list(TEXT))
+    assert parser.done and parser.result == RECIPE
+    assert events == _parse([TEXT])[1]
+
+
+@pytest.mark.parametrize("chunks", [
+    ['{"name": "a \\', '"quoted\\" b", "x": 1}'],  # split right after a backslash
+    ['{"name": "caf\\u00', 'e9", "x": 1}'],  # split inside a \u escape
+    ['{"name": "ends with \\\\', '", "x": 1}'],  # escaped backslash before the closing quote
+])
+def test_split_escapes(chunks):
+    parser, _ = _parse(chunks)
+    assert parser.done
+    assert parser.result == json.loads("".join(chunks))
+
+
+def test_truncated_stream():
+    cut = TEXT.index('"Serve')  # inside the instructions array
+    parser, events = _parse([TEXT[:cut]])
+    assert not parser.done
+    assert parser.result == {"name": RECIPE["name"], "description": RECIPE["description"], "ingredients": RECIPE["ingredients"]}
+    assert [e["value"] for e in events if e["key"] == "instructions"] == ["Chop, then boil"]
+
+
+def test_text_after_the_object_is_ignored():
+    parser, _ = _parse(['{"a": 1}', ' trailing {"b": ', "2}"])
+    assert parser.done and parser.result == {"a": 1}
+
+
+def test_malformed_key():
+    with pytest.raises(ValueError):
+        IncrementalJSONParser().feed("{name: 1}")
@@ -0,0 +1,118 @@
+# test_llm_client.py
+# Single-flight calls, slots held by timed-out threads and the circuit breaker,
+# with blocking fake model functions.
+import asyncio
+import threading
+
+import pytest
+
+from app.services.llm_client import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, LLMClient
+
+
+class BlockingCall:
+    """Blocks the calling thread until released; counts and records calls"""
+
+    def __init__(self, result="done"):
+        self.result = result
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5), "never released"
+        return self.result
+
+
+def _fail(*args):
+    raise RuntimeError("model error")
+
+
+async def _wait_started(call: BlockingCall):
+    assert await asyncio.get_running_loop().run_in_executor(None, call.started.wait, 5)
+
+
+def test_identical_calls_share_one_model_call():
+    client = LLMClient("test_llm_single_flight", max_retries=0)
+    fn = BlockingCall()
+
+    async def run():
+        tasks = [asyncio.create_task(client.call(fn, "prompt", key="prompt")) for _ in range(3)]
+        await _wait_started(fn)
+        await asyncio.sleep(0.05)  # let the other callers join
+        fn.release.set()
+        return await asyncio.gather(*tasks)
+
+    coalesced = client.coalesced.value
+    assert asyncio.run(run()) == ["done"] * 3
+    assert fn.calls == 1
+    assert client.coalesced.value == coalesced + 2
+
+
+def test_slot_held_until_timed_out_thread_finishes():
+    client = LLMClient("test_llm_timeout", max_concurrency=1, timeout=0.05, max_retries=0)
+    slow, fast = BlockingCall(), BlockingCall("fast")
+    fast.release.set()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await client.call(slow)
+        # the thread is still running, so its slot is not free yet
+        assert client.semaphore.locked()
+        waiting = asyncio.create_task(client.call(fast))
+        await asyncio.sleep(0.1)
+        assert not fast.started.is_set()
+
+        slow.release.set()
+        assert await asyncio.wait_for(waiting, 5) == "fast"
+        assert not client.semaphore.locked()
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_at_threshold():
+    client = LLMClient("test_llm_threshold", max_retries=0, failure_threshold=3, reset_timeout=60)
+    fn = BlockingCall()
+    fn.release.set()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await client.call(_fail)
+        assert client.breaker.state == CLOSED
+        with pytest.raises(RuntimeError):
+            await client.call(_fail)
+        assert client.breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await client.call(fn)
+
+    asyncio.run(run())
+    assert fn.calls == 0
+
+
+def test_half_open_allows_one_trial():
+    client = LLMClient("test_llm_half_open", max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    trial, other = BlockingCall(), BlockingCall()
+    other.release.set()
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await client.call(_fail)
+        with pytest.raises(CircuitOpenError):
+            await client.call(other)
+
+        await asyncio.sleep(0.06)
+        running = asyncio.create_task(client.call(trial))
+        await _wait_started(trial)
+        assert client.breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await client.call(other)
+
+        trial.release.set()
+        assert await running == "done"
+        assert client.breaker.state == CLOSED
+        assert await client.call(other) == "done"
+
+    asyncio.run(run())
+    assert other.calls == 1
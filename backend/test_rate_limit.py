@@ -0,0 +1,114 @@
+# test_rate_limit.py
+# Token buckets, the 429 response and rule configuration. The middleware is
+# tested on a small app with its own rules (the API app runs with it disabled).
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app import rate_limit
+from app.auth import create_access_token
+from app.rate_limit import MemoryBackend, RateLimitMiddleware, Rule, load_rules, parse_limit
+
+RULE = Rule("expensive", frozenset({("POST", "/expensive")}), 6, 60, 2)  # one token per 10 s
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _take(backend, key="k", rule=RULE):
+    return asyncio.run(backend.take(key, rule))
+
+
+def test_bucket_burst_and_refill(clock):
+    backend = MemoryBackend()
+    assert _take(backend) == (True, 1)
+    assert _take(backend) == (True, 0)
+    assert _take(backend)[0] is False
+
+    clock[0] += 10  # one token back
+    assert _take(backend)[0] is True
+    assert _take(backend)[0] is False
+
+    clock[0] += 3600  # never more than the burst
+    assert [_take(backend)[0] for _ in range(3)] == [True, True, False]
+
+
+def _app(monkeypatch, backend=None, rule=RULE):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+
+    async def expensive(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/expensive", expensive, methods=["POST"])])
+    return TestClient(RateLimitMiddleware(app, rules=[rule], backend=backend or MemoryBackend()))
+
+
+def _bearer(user_id):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+
+def test_throttled_with_retry_after(monkeypatch, clock):
+    client = _app(monkeypatch)
+    assert [client.post("/expensive").status_code for _ in range(2)] == [200, 200]
+
+    clock[0] += 4  # 0.4 tokens: 6 s until the next one
+    response = client.post("/expensive")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "6"
+
+    clock[0] += 6
+    assert client.post("/expensive").status_code == 200
+
+
+def test_per_user_and_per_ip_keys(monkeypatch, clock):
+    client = _app(monkeypatch)
+    for headers in ({}, _bearer(1), _bearer(2)):
+        # users get their own bucket, separate from anonymous requests of their IP
+        assert [client.post("/expensive", headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+
+    client = _app(monkeypatch, rule=RULE._replace(per="ip"))
+    assert [client.post("/expensive", headers=_bearer(n)).status_code for n in (1, 2, 3)] == [200, 200, 429]
+
+
+def test_parse_limit():
+    assert parse_limit("30/3600:5") == (30, 3600, 5)
+    assert parse_limit("10/60") == (10, 60, 10)
+    assert parse_limit("5") == (5, 1, 5)
+    assert parse_limit(" OFF ") is None
+    assert parse_limit("0") is None
+    with pytest.raises(ValueError):
+        parse_limit("ten/60")
+
+
+def test_load_rules_overrides(monkeypatch):
+    settings = SimpleNamespace(rate_limit_login="off", rate_limit_generate="60/3600:3", rate_limit_register="lots")
+    monkeypatch.setattr(rate_limit, "get_settings", lambda: settings)
+    rules = {rule.name: rule for rule in load_rules()}
+
+    assert "login" not in rules
+    assert (rules["generate"].requests, rules["generate"].period, rules["generate"].burst) == (60, 3600, 3)
+    # an invalid override keeps the default
+    default = next(rule for rule in rate_limit.DEFAULT_RULES if rule.name == "register")
+    assert rules["register"] == default
+    assert rules["recipe_jobs"] in rate_limit.DEFAULT_RULES
+
+
+class BrokenBackend:
+    async def take(self, key, rule):
+        raise ConnectionError("rate limit store down")
+
+
+def test_store_failure_allows_request(monkeypatch):
+    client = _app(monkeypatch, backend=BrokenBackend())
+    errors = rate_limit.backend_errors.value
+    assert [client.post("/expensive").status_code for _ in range(3)] == [200, 200, 200]
+    assert rate_limit.backend_errors.value == errors + 3
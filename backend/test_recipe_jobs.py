@@ -0,0 +1,91 @@
+# test_recipe_jobs.py
+# Batch generation end to end: POST /recipes/jobs, then the worker loop
+# (run_worker(once=True) drains the queue) with the local fake model.
+import asyncio
+
+from sqlalchemy import select
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.services import gemini_service, recipe_jobs
+
+
+def _job_items(*names):
+    return {"items": [{"ingredients": [{"name": n, "quantity": "1", "unit": "pcs"}]} for n in names]}
+
+
+def _run_worker(**kwargs):
+    return asyncio.run(recipe_jobs.run_worker(AsyncSessionLocal, poll_interval=0, once=True, **kwargs))
+
+
+def _item_rows(job_id):
+    async def load():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(models.RecipeJobItem)
+                .where(models.RecipeJobItem.job_id == job_id)
+                .order_by(models.RecipeJobItem.id)
+            )
+            return list(result.scalars())
+
+    return asyncio.run(load())
+
+
+def test_job_runs_to_done(client, auth_headers, fake_model):
+    created = client.post("/recipes/jobs/", json=_job_items("fennel", "celeriac", "kohlrabi"), headers=auth_headers)
+    assert created.status_code == 202
+    job = created.json()
+    assert (job["status"], job["total"], job["recipe_ids"]) == ("pending", 3, [])
+
+    assert _run_worker(batch_size=2) == 3
+    job = client.get(f"/recipes/jobs/{job['id']}", headers=auth_headers).json()
+    assert (job["status"], job["completed"], job["failed"]) == ("done", 3, 0)
+    assert job["finished_at"] is not None
+    names = [client.get(f"/recipes/{i}", headers=auth_headers).json()["name"] for i in job["recipe_ids"]]
+    assert names == ["Fake fennel", "Fake celeriac", "Fake kohlrabi"]
+    assert fake_model.calls == 3
+
+
+def test_invalid_output_is_retried_then_failed(client, auth_headers, invalid_model):
+    job = client.post("/recipes/jobs/", json=_job_items("salsify"), headers=auth_headers).json()
+
+    # the item goes back to pending after each failure, until MAX_ATTEMPTS
+    assert _run_worker() == recipe_jobs.MAX_ATTEMPTS
+    assert invalid_model.calls == recipe_jobs.MAX_ATTEMPTS
+    job = client.get(f"/recipes/jobs/{job['id']}", headers=auth_headers).json()
+    assert (job["status"], job["completed"], job["failed"], job["recipe_ids"]) == ("done", 0, 1, [])
+    [item] = _item_rows(job["id"])
+    assert (item.status, item.attempts) == ("failed", recipe_jobs.MAX_ATTEMPTS)
+    assert item.error
+
+
+def test_generation_error_only_fails_its_item(client, auth_headers, fake_model, monkeypatch):
+    generate_recipe = gemini_service.generate_recipe
+
+    async def flaky(ingredients, preferences=None):
+        if ingredients[0]["name"] == "okra":
+            raise RuntimeError("model exploded")
+        return await generate_recipe(ingredients, preferences)
+
+    monkeypatch.setattr(gemini_service, "generate_recipe", flaky)
+    monkeypatch.setattr(recipe_jobs, "MAX_ATTEMPTS", 1)
+    job = client.post("/recipes/jobs/", json=_job_items("okra", "chard"), headers=auth_headers).json()
+
+    assert _run_worker() == 2
+    job = client.get(f"/recipes/jobs/{job['id']}", headers=auth_headers).json()
+    assert (job["status"], job["completed"], job["failed"], len(job["recipe_ids"])) == ("done", 1, 1, 1)
+    okra, chard = _item_rows(job["id"])
+    assert (okra.status, okra.error) == ("failed", "model exploded")
+    assert chard.status == "done"
+
+
+def test_cache_hits_inside_a_batch(client, auth_headers, fake_model):
+    client.post("/recipes/generate", json=_job_items("endive")["items"][0], headers=auth_headers)
+    assert fake_model.calls == 1
+
+    body = _job_items("endive", "ENDIVE", "rutabaga")
+    job = client.post("/recipes/jobs/", json=body, headers=auth_headers).json()
+    assert _run_worker() == 3
+    job = client.get(f"/recipes/jobs/{job['id']}", headers=auth_headers).json()
+    assert (job["status"], job["completed"], len(job["recipe_ids"])) == ("done", 3, 3)
+    assert fake_model.calls == 2  # only rutabaga went to the model
@@ -0,0 +1,202 @@
+# test_recipes.py
+import asyncio
+import json
+from datetime import date, timedelta
+
+from app.database import AsyncSessionLocal
+from app.services import gemini_service, recipe_cache, recipe_index
+
+
+def _create_recipe(client, headers, name, tags):
+    recipe = {
+        "name": name, "description": "", "ingredients": [{"name": "tomato", "quantity": 1, "unit": "pcs"}],
+        "instructions": ["Cook"], "prep_time": 5, "cook_time": 5, "servings": 2, "tags": tags,
+    }
+    response = client.post("/recipes/", json=recipe, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_filter_recipes_by_tag(client, auth_headers):
+    _create_recipe(client, auth_headers, "Salad", ["vegan", "quick"])
+    _create_recipe(client, auth_headers, "Steak", ["meat"])
+    _create_recipe(client, auth_headers, "Veganish", ["vegan-ish"])
+
+    response = client.get("/recipes/", params={"tag": "vegan"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [r["name"] for r in response.json()] == ["Salad"]
+    assert client.get("/recipes/", params={"tag": "none"}, headers=auth_headers).json() == []
+
+
+# ---------------------------
+# Generation cache (POST /recipes/generate)
+# ---------------------------
+def test_generate_cache_ignores_order_and_case(client, auth_headers, fake_model):
+    first = client.post("/recipes/generate", headers=auth_headers, json={
+        "ingredients": [{"name": "Leek", "quantity": "2", "unit": "pcs"}, {"name": "potato", "quantity": 3, "unit": "PCS"}],
+        "preferences": "Soup",
+    })
+    assert first.status_code == 200, first.text
+    assert fake_model.calls == 1
+
+    again = client.post("/recipes/generate", headers=auth_headers, json={
+        "ingredients": [{"name": "POTATO", "quantity": "3", "unit": "pcs"}, {"name": " leek ", "quantity": "2", "unit": "Pcs"}],
+        "preferences": "soup",
+    })
+    assert again.status_code == 200, again.text
+    assert fake_model.calls == 1
+    assert again.json()["name"] == first.json()["name"]
+    assert again.json()["id"] != first.json()["id"]  # still saved as the user's own recipe
+
+    recipe_cache.clear_memory()  # a fresh worker reads the cache table
+    assert client.post("/recipes/generate", headers=auth_headers, json={
+        "ingredients": [{"name": "potato", "quantity": "3", "unit": "pcs"}, {"name": "leek", "quantity": "2", "unit": "pcs"}],
+        "preferences": "soup",
+    }).status_code == 200
+    assert fake_model.calls == 1
+
+
+def test_generate_does_not_cache_invalid_output(client, auth_headers, fake_model, invalid_model):
+    body = {"ingredients": [{"name": "turnip", "quantity": "1", "unit": "pcs"}]}
+    for _ in range(2):
+        response = client.post("/recipes/generate", headers=auth_headers, json=body)
+        assert response.status_code == 500
+    assert invalid_model.calls == 2
+
+    gemini_service.set_model(fake_model)
+    response = client.post("/recipes/generate", headers=auth_headers, json=body)
+    assert response.status_code == 200, response.text
+    assert fake_model.calls == 1
+
+
+# ---------------------------
+# Streaming generation (POST /recipes/generate/stream)
+# ---------------------------
+def _sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_generate_stream_events(client, auth_headers, fake_model):
+    fake_model.chunk_size = 7  # many small chunks
+    body = {"ingredients": [{"name": "parsnip", "quantity": "2", "unit": "pcs"}, {"name": "honey"}]}
+    with client.stream("POST", "/recipes/generate/stream", headers=auth_headers, json=body) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.read().decode())
+
+    kinds = [(name, data.get("key")) for name, data in events]
+    assert kinds == [
+        ("start", None),
+        ("field", "name"),
+        ("field", "description"),
+        ("item", "ingredients"), ("item", "ingredients"),
+        ("item", "instructions"), ("item", "instructions"), ("item", "instructions"),
+        ("field", "prep_time"), ("field", "cook_time"), ("field", "servings"), ("field", "calories"),
+        ("field", "difficulty"),
+        ("item", "tags"),
+        ("recipe", None),
+    ]
+    assert events[1][1]["value"] == "Fake parsnip & honey"
+    assert [d["index"] for name, d in events if d.get("key") == "instructions"] == [0, 1, 2]
+
+    recipe = events[-1][1]
+    saved = client.get(f"/recipes/{recipe['id']}", headers=auth_headers)
+    assert saved.status_code == 200
+    assert saved.json() == recipe
+    assert recipe["instructions"] == ["Prepare the parsnip", "Prepare the honey", "Serve"]
+    assert recipe["prep_time"] == 10 and recipe["tags"] == ["fake"]
+    assert fake_model.calls == 1
+
+    # the same request again is replayed from the cache
+    with client.stream("POST", "/recipes/generate/stream", headers=auth_headers, json=body) as response:
+        replayed = _sse_events(response.read().decode())
+    assert [(name, data.get("key")) for name, data in replayed] == kinds
+    assert fake_model.calls == 1
+
+
+# ---------------------------
+# Pantry matching (GET /recipes/match/pantry)
+# ---------------------------
+def _add_pantry_item(client, headers, name, expires_in=None):
+    body = {"name": name, "location": "Pantry", "quantity": 1, "unit": "pcs"}
+    if expires_in is not None:
+        body["expiry_date"] = (date.today() + timedelta(days=expires_in)).isoformat()
+    assert client.post("/ingredients/", json=body, headers=headers).status_code == 200
+
+
+def _create_with_ingredients(client, headers, name, ingredients):
+    recipe = {
+        "name": name, "description": "", "ingredients": [{"name": i, "quantity": 1, "unit": "pcs"} for i in ingredients],
+        "instructions": ["Cook"], "prep_time": 5, "cook_time": 5, "servings": 2, "tags": [],
+    }
+    response = client.post("/recipes/", json=recipe, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_match_pantry_ranking(client, auth_headers, other_headers):
+    for name, expires_in in [("zucchini", 5), ("shallot", 1), ("fennel seed", None), ("orzo", 10)]:
+        _add_pantry_item(client, auth_headers, name, expires_in)
+    _create_with_ingredients(client, auth_headers, "Late full", ["zucchini", "orzo"])
+    _create_with_ingredients(client, auth_headers, "Half", ["zucchini", "tarragon"])
+    _create_with_ingredients(client, auth_headers, "Soon full", ["zucchini", "shallot"])
+    _create_with_ingredients(client, auth_headers, "Undated full", ["fennel seed"])
+    _create_with_ingredients(client, auth_headers, "Third", ["fennel seed", "veal", "polenta"])
+    _create_with_ingredients(client, auth_headers, "Unrelated", ["veal"])
+    # another user's recipe that the pantry would cover completely
+    _create_with_ingredients(client, other_headers, "Not mine", ["zucchini", "shallot"])
+
+    matches = client.get("/recipes/match/pantry", headers=auth_headers).json()
+    ranked = [(m["recipe"]["name"], round(m["coverage"], 2), m["matched_count"], m["missing_count"]) for m in matches]
+    assert ranked == [
+        ("Soon full", 1.0, 2, 0),  # full coverage, soonest expiring item used first
+        ("Late full", 1.0, 2, 0),
+        ("Undated full", 1.0, 1, 0),  # no dated pantry item used
+        ("Half", 0.5, 1, 1),
+        ("Third", 0.33, 1, 2),
+    ]
+    assert matches[0]["soonest_expiry"] == (date.today() + timedelta(days=1)).isoformat()
+    assert matches[2]["soonest_expiry"] is None
+
+    limited = client.get("/recipes/match/pantry", params={"limit": 2}, headers=auth_headers).json()
+    assert [m["recipe"]["name"] for m in limited] == ["Soon full", "Late full"]
+    assert client.get("/recipes/match/pantry", headers=other_headers).json() == []
+
+
+def test_match_pantry_counts_catalog_ids_once(client, auth_headers):
+    _add_pantry_item(client, auth_headers, "rhubarb", 3)
+    _add_pantry_item(client, auth_headers, "quince", 3)
+    # "rhubarbs" is the same name, "rhubarbb" a fuzzy catalog match: all one ingredient
+    _create_with_ingredients(client, auth_headers, "Compote", ["rhubarb", "Rhubarbs", "rhubarbb", "quince", "star anise"])
+
+    [match] = client.get("/recipes/match/pantry", headers=auth_headers).json()
+    assert (match["matched_count"], match["missing_count"]) == (2, 1)
+    assert round(match["coverage"], 2) == 0.67
+
+
+def test_match_ingredients_subset(client, auth_headers):
+    all_three = _create_with_ingredients(client, auth_headers, "Salsa verde", ["kohlrabi", "tomatillo", "sorrel"])
+    # "Tomatillos" collapses onto the catalog entry of "tomatillo"
+    two = _create_with_ingredients(client, auth_headers, "Slaw", ["Kohlrabi", "Tomatillos"])
+    _create_with_ingredients(client, auth_headers, "Roast", ["kohlrabi"])
+
+    def matched(*ingredients):
+        response = client.get("/recipes/match/ingredients", params={"ingredients": list(ingredients)})
+        assert response.status_code == 200
+        return sorted(r["id"] for r in response.json())
+
+    assert matched("kohlrabi", "tomatillo") == sorted([all_three["id"], two["id"]])
+    # plural and misspelled names find the same recipes
+    assert matched("kohlrabis", "tomatilloo") == sorted([all_three["id"], two["id"]])
+    assert matched("kohlrabi", "sorrel", "tomatillos") == [all_three["id"]]
+    assert matched("kohlrabi", "dragonfruit") == []
+
+    async def lookup():
+        async with AsyncSessionLocal() as db:
+            return await recipe_index.match_recipe_ids(db, ["Tomatillos", "sorrel"])
+
+    assert asyncio.run(lookup()) == [all_three["id"]]
@@ -0,0 +1,41 @@
+# test_response_cache.py
+# A failing cache store (e.g. Redis down) must not break public reads or the
+# admin writes that invalidate them.
+import asyncio
+
+import pytest
+
+from app import response_cache
+
+
+class BrokenBackend:
+    async def version(self, namespace):
+        raise ConnectionError("cache store down")
+
+    async def bump(self, namespace):
+        raise ConnectionError("cache store down")
+
+    async def get(self, key):
+        raise ConnectionError("cache store down")
+
+    async def set(self, key, entry):
+        raise ConnectionError("cache store down")
+
+
+@pytest.fixture
+def broken_backend(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", BrokenBackend())
+
+
+def test_reads_fall_back_to_uncached(client, broken_backend):
+    errors = response_cache.backend_errors.value
+    response = client.get("/news/public")
+    assert response.status_code == 200
+    assert "ETag" in response.headers
+    assert response_cache.backend_errors.value == errors + 1
+
+
+def test_invalidate_does_not_raise(broken_backend):
+    errors = response_cache.backend_errors.value
+    asyncio.run(response_cache.invalidate("news"))
+    assert response_cache.backend_errors.value == errors + 1
@@ -0,0 +1,48 @@
+# test_shopping_lists.py
+# GET /shopping-lists/ must stay at a fixed number of SQL statements however many
+# lists and items a page holds (the list query plus one selectinload for the items).
+LIST_PAGE_BUDGET = 2
+
+
+def _seed_lists(client, headers, lists: int, items: int):
+    for n in range(lists):
+        list_id = client.post("/shopping-lists/", json={"name": f"list {n}"}, headers=headers).json()["id"]
+        operations = [{"op": "add", "item_name": f"item {i}", "quantity": 1, "unit": "pcs"} for i in range(items)]
+        response = client.patch(f"/shopping-lists/{list_id}/items", json={"operations": operations}, headers=headers)
+        assert response.status_code == 200
+
+
+def test_list_page_query_budget(client, auth_headers, max_queries):
+    _seed_lists(client, auth_headers, lists=2, items=2)
+    client.get("/shopping-lists/", headers=auth_headers)  # warm per-process caches
+
+    with max_queries(LIST_PAGE_BUDGET):
+        small = client.get("/shopping-lists/", headers=auth_headers)
+    _seed_lists(client, auth_headers, lists=8, items=5)
+    with max_queries(LIST_PAGE_BUDGET):
+        large = client.get("/shopping-lists/", headers=auth_headers)
+
+    assert small.status_code == large.status_code == 200
+    assert len(small.json()) == 2 and len(large.json()) == 10
+    assert sum(len(l["items"]) for l in large.json()) == 2 * 2 + 8 * 5
+
+
+def test_list_page_without_items_skips_item_query(client, auth_headers, max_queries):
+    _seed_lists(client, auth_headers, lists=3, items=3)
+    client.get("/shopping-lists/", headers=auth_headers)
+
+    with max_queries(1):
+        response = client.get("/shopping-lists/", params={"fields": "id,name"}, headers=auth_headers)
+    assert [sorted(l) for l in response.json()] == [["id", "name"]] * 3
+
+
+def test_projected_items_use_the_response_schema(client, auth_headers):
+    _seed_lists(client, auth_headers, lists=1, items=2)
+
+    full = client.get("/shopping-lists/", headers=auth_headers).json()
+    projected = client.get("/shopping-lists/", params={"fields": "id,items"}, headers=auth_headers).json()
+
+    assert [sorted(l) for l in projected] == [["id", "items"]]
+    # nested items carry exactly the schema's fields, not every column of the row
+    assert projected[0]["items"] == full[0]["items"]
+    assert not {"canonical_quantity", "canonical_unit"} & set(projected[0]["items"][0])
@@ -1,5 +1,5 @@
 import axios from 'axios'
-import { getToken } from '../stores/auth'
+import { getToken, refreshAccessToken } from '../stores/auth'
 
 const API_URL = import.meta.env.VITE_API_URL  // آدرس API را از متغیر محیطی می‌گیرد
 
@@ -19,36 +19,59 @@ api.interceptors.request.use((config) => {
   return config
 })
 
-// Handle 401 errors (redirect to login)
+// Handle 401 errors: refresh the access token once and retry, otherwise redirect to login
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const config = error.config
     if (error.response?.status === 401) {
+      if (config && !config._retried && await refreshAccessToken()) {
+        config._retried = true
+        config.headers.Authorization = `Bearer ${getToken()}`
+        return api(config)
+      }
       window.location.href = '/login'
     }
     return Promise.reject(error)
   }
 )
 
+// List endpoints are cursor-paginated: follow X-Next-Cursor so callers
+// still receive the full list in response.data
+const getAllPages = async (url, params = {}) => {
+  const first = await api.get(url, { params })
+  const data = [...first.data]
+  let cursor = first.headers['x-next-cursor']
+  while (cursor) {
+    const page = await api.get(url, { params: { ...params, cursor } })
+    data.push(...page.data)
+    cursor = page.headers['x-next-cursor']
+  }
+  return { ...first, data }
+}
+
 // Ingredients API
 export const ingredientsAPI = {
   getAll: (location = null) => {
     const params = location ? { location } : {}
-    return api.get('/ingredients/', { params })
+    return getAllPages('/ingredients/', params)
   },
   getById: (id) => api.get(`/ingredients/${id}`),
   create: (data) => api.post('/ingredients/', data),
   update: (id, data) => api.put(`/ingredients/${id}`, data),
   delete: (id) => api.delete(`/ingredients/${id}`),
   getExpiringSoon: (days = 7) =>
-    api.get('/ingredients/expiring/soon', { params: { days } }),
+    getAllPages('/ingredients/expiring/soon', { days }),
 }
 
 // Shopping Lists API
 export const shoppingListsAPI = {
-  getAll: () => api.get('/shopping-lists/'),
+  getAll: () => getAllPages('/shopping-lists/'),
   getById: (id) => api.get(`/shopping-lists/${id}`),
   create: (data) => api.post('/shopping-lists/', data),
+  // recipes: [{ recipe_id, servings }]; pantry stock is subtracted by the server
+  createFromRecipes: (recipes, name) =>
+    api.post('/shopping-lists/from-recipes', { recipes, name }),
   delete: (id) => api.delete(`/shopping-lists/${id}`),
   addItem: (listId, item) => api.post(`/shopping-lists/${listId}/items`, item),
   updateItem: (itemId, isPurchased) =>
@@ -56,24 +79,35 @@ export const shoppingListsAPI = {
       params: { is_purchased: isPurchased },
     }),
   deleteItem: (itemId) => api.delete(`/shopping-lists/items/${itemId}`),
+  // operations: [{ op: 'add' | 'update' | 'delete', ... }], applied in one transaction
+  batchItems: (listId, operations) =>
+    api.patch(`/shopping-lists/${listId}/items`, { operations }),
 }
 
 // Recipes API
 export const recipesAPI = {
   getAll: (healthyOnly = false) =>
-    api.get('/recipes/', { params: { healthy_only: healthyOnly } }),
+    getAllPages('/recipes/', { healthy_only: healthyOnly }),
   getById: (id) => api.get(`/recipes/${id}`),
   create: (data) => api.post('/recipes/', data),
   delete: (id) => api.delete(`/recipes/${id}`),
   findMatching: () => api.get('/recipes/match/ingredients'),
+  matchPantry: (limit = 10) =>
+    api.get('/recipes/match/pantry', { params: { limit } }),
   seedSample: () => api.post('/recipes/seed-sample'),
+  // ranked hits ({ recipe, rank, highlights }); next page cursor in the X-Next-Cursor header
+  search: (q, cursor = null, limit = 20) =>
+    api.get('/recipes/search', { params: { q, cursor, limit } }),
 }
 
 // News API
 export const newsAPI = {
-  getAllPublic: (skip = 0, limit = 10) =>
-    api.get('/news/public', { params: { skip, limit } }),
+  // one page, newest first; next page cursor in the X-Next-Cursor header
+  getAllPublic: (cursor = null, limit = 10) =>
+    api.get('/news/public', { params: { cursor, limit } }),
   getBySlug: (slug) => api.get(`/news/public/${slug}`),
+  search: (q, cursor = null, limit = 10) =>
+    api.get('/news/search', { params: { q, cursor, limit } }),
 
   // admin endpoints (نیاز به توکن admin)
   getAllAdmin: (token) =>
@@ -9,6 +9,7 @@ const API_URL = import.meta.env.VITE_API_URL  //
 // ---------- State ----------
 const user = ref(null)
 export const token = ref(localStorage.getItem('token') || '')
+const refreshToken = ref(localStorage.getItem('refresh_token') || '')
 export const isAuthenticated = ref(!!token.value)
 export const isAdmin = computed(() => user.value?.is_admin ?? false)
 
@@ -27,19 +28,46 @@ api.interceptors.request.use(config => {
 })
 
 // ---------- Token Management ----------
-export const saveToken = (newToken) => {
+export const saveToken = (newToken, newRefreshToken = null) => {
   token.value = newToken
   isAuthenticated.value = true
   localStorage.setItem('token', newToken)
+  if (newRefreshToken) {
+    refreshToken.value = newRefreshToken
+    localStorage.setItem('refresh_token', newRefreshToken)
+  }
 }
 
 export const getToken = () => token.value
 
+// Trade the refresh token for a new token pair (each refresh token works once,
+// so concurrent 401s share a single request)
+let refreshing = null
+export function refreshAccessToken() {
+  if (!refreshToken.value) return Promise.resolve(false)
+  if (!refreshing) {
+    refreshing = axios.post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken.value })
+      .then((response) => {
+        saveToken(response.data.access_token, response.data.refresh_token)
+        return true
+      })
+      .catch(() => false)
+      .finally(() => { refreshing = null })
+  }
+  return refreshing
+}
+
 export function logout() {
+  if (token.value) {
+    // end the session on the server too; the local logout doesn't wait for it
+    api.post('/auth/logout', { refresh_token: refreshToken.value || null }).catch(() => {})
+  }
   token.value = null
+  refreshToken.value = ''
   user.value = null
   isAuthenticated.value = false
   localStorage.removeItem('token')
+  localStorage.removeItem('refresh_token')
 }
 
 // ---------- Actions ----------
@@ -55,7 +83,7 @@ export async function login(email, password) {
       headers: { 'Content-Type': 'application/x-www-form-urlencoded' }
     })
 
-    saveToken(response.data.access_token)
+    saveToken(response.data.access_token, response.data.refresh_token)
     await fetchCurrentUser()
     return true
   } catch (error) {